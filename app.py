@@ -1,5 +1,4 @@
 import os
-import tempfile
 import base64
 import streamlit as st
 from dotenv import load_dotenv
@@ -7,16 +6,16 @@ import pandas as pd
 from google.oauth2.service_account import Credentials
 import gspread
 import altair as alt
-from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 
-from risk_assessment.extract_pdf import extract_clauses
-from risk_assessment.analyze_clauses import analyze_all_batches
+from risk_assessment.extract_pdf import extract_clauses_cached
+from risk_assessment.analyze_clauses import (
+    analyze_iter, is_valid_clause, needs_rewrite, open_run_journal, rewrite_clauses
+)
 from risk_assessment.notification_alert import send_compliance_alert
+from risk_assessment.reports import generate_rewritten_pdf
+from risk_assessment.versioning import analyze_revision, risk_delta
 
-from config import ModelManager
+from config import CASCADE_ENABLED, ModelManager
 
 # Load environment variables
 load_dotenv()
@@ -225,8 +224,17 @@ else:
 def upload_page():
     show_sidebar()
     show_header()
+    # A revised draft can be linked to an earlier contract; only changed clauses are re-analyzed
+    revision_of = None
+    if st.session_state.contracts:
+        choice = st.selectbox(
+            "🔁 Revised version of",
+            options=["New contract"] + list(st.session_state.contracts.keys()),
+            index=0,
+        )
+        revision_of = None if choice == "New contract" else choice
     uploaded_file = st.file_uploader("📝 Upload your contract (PDF)", type=["pdf"])
-    batch_size = 5
+    max_workers = None  # tuned profile, else ANALYSIS_CONCURRENCY
 
     if uploaded_file:
         # 🔑 Reset results for every new upload
@@ -234,21 +242,54 @@ def upload_page():
         st.session_state.results = None
         st.session_state.df = None
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            tmp.write(uploaded_file.read())
-            tmp_path = tmp.name
+        extracting = st.empty()
+        extracting.info("📂 Extracting clauses...")
+        found = []
 
-        st.info("📂 Extracting clauses...")
-        st.session_state.clauses = extract_clauses(tmp_path)
+        def on_extracted(clause):
+            found.append(clause)
+            if len(found) % 25 == 0:
+                extracting.info(f"📂 Extracting clauses... {len(found)} found so far")
 
+        # parsed page by page straight from the upload buffer; re-uploads of the same PDF hit the extraction cache
+        st.session_state.clauses = extract_clauses_cached(uploaded_file.getvalue(), on_clause=on_extracted)
+        extracting.info(f"📂 Extracted {len(st.session_state.clauses)} clauses")
+
+        parent = st.session_state.contracts.get(revision_of) if revision_of else None
+        changes = None
         with st.spinner("Analyzing clauses..."):
             progress = st.progress(0)
-            results = []
-            for i in range(0, len(st.session_state.clauses), batch_size):
-                batch = st.session_state.clauses[i:i + batch_size]
-                batch_results = analyze_all_batches(batch, start_id=i+1, batch_size=batch_size)
-                results.extend(batch_results)
-                progress.progress(min((i + batch_size) / len(st.session_state.clauses), 1.0))
+            if parent:
+                results, changes = analyze_revision(
+                    parent["clauses"],
+                    parent["results"],
+                    st.session_state.clauses,
+                    start_id=1,
+                    max_workers=max_workers,
+                    progress_callback=lambda done, total: progress.progress(done / total),
+                )
+            else:
+                # results arrive riskiest first; High-risk findings are shown while the rest is analyzed.
+                # If the session dies mid-run, uploading the same PDF again resumes from the journal
+                total = max(1, sum(1 for cl in st.session_state.clauses if is_valid_clause(cl)))
+                findings = st.empty()
+                by_id = {}
+                for res in analyze_iter(
+                    st.session_state.clauses,
+                    start_id=1,
+                    max_workers=max_workers,
+                    journal=open_run_journal(st.session_state.clauses, "cascade" if CASCADE_ENABLED else "single"),
+                ):
+                    by_id[res["Clause ID"]] = res
+                    progress.progress(min(1.0, len(by_id) / total))
+                    if res.get("Risk Level") == "High":
+                        high = [r for r in by_id.values() if r.get("Risk Level") == "High"]
+                        findings.warning(
+                            f"⚠️ {len(high)} High-risk clause(s) found so far: "
+                            + ", ".join(f"#{r['Clause ID']}" for r in sorted(high, key=lambda r: r["Clause ID"])[:10])
+                        )
+                findings.empty()
+                results = sorted(by_id.values(), key=lambda x: x["Clause ID"])
             progress.empty()
             st.success("✅ Analysis completed!")
             st.session_state.results = results
@@ -260,8 +301,13 @@ def upload_page():
         try:
             rows = [st.session_state.df.columns.tolist()] + st.session_state.df.astype(str).values.tolist()
 
-            # Contract-specific sheet name
-            new_name = f"Contract {len(st.session_state.contracts)+1}"
+            # Contract-specific sheet name; revisions are numbered after the first version
+            if parent:
+                family = parent.get("family", revision_of)
+                version = sum(1 for name, c in st.session_state.contracts.items() if c.get("family", name) == family) + 1
+                new_name = f"{family} v{version}"
+            else:
+                new_name = f"Contract {len(st.session_state.contracts)+1}"
 
             # Try to open existing sheet, else create
             try:
@@ -276,7 +322,10 @@ def upload_page():
             st.session_state.contracts[new_name] = {
                 "df": st.session_state.df.copy(),
                 "clauses": st.session_state.clauses.copy(),
-                "results": st.session_state.results.copy()
+                "results": st.session_state.results.copy(),
+                "family": parent.get("family", revision_of) if parent else new_name,
+                "parent": revision_of if parent else None,
+                "changes": changes,
             }
             st.session_state.current_contract = new_name
 
@@ -305,35 +354,32 @@ def upload_page():
 
 
 
-# PDF Export Helper 
-def generate_rewritten_pdf(df):
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    styles = getSampleStyleSheet()
-    story = []
-
-    story.append(Paragraph("<b>AI-Rewritten Contract Clauses Report</b>", styles["Title"]))
-    story.append(Spacer(1, 20))
+# On-demand rewrites: the analysis pass only assesses risk, so AI-Modified Clauses
+# for High-risk clauses are generated the first time they are shown or exported
+def ensure_rewrites():
+    results = st.session_state.results or []
+    if any(needs_rewrite(res) for res in results):
+        with st.spinner("⚡ Generating AI-Modified Clauses..."):
+            results = rewrite_clauses(results)
+        df = pd.DataFrame(results)
+        df["Risk Score"] = df.get("Risk Score", "0%").fillna("0%")
+        st.session_state.results = results
+        st.session_state.df = df
+        current = st.session_state.current_contract
+        if current in st.session_state.contracts:
+            st.session_state.contracts[current]["results"] = results.copy()
+            st.session_state.contracts[current]["df"] = df.copy()
+    return st.session_state.df
 
-    for _, row in df.iterrows():
-        clause_id = row["Clause ID"]
-        original = row["Contract Clause"]
-        risk_level = row.get("Risk Level", "Unknown")
-        modified = row.get("AI-Modified Clause", "⚠️ Not available")
-        modified_risk = row.get("AI-Modified Risk Level", "Unknown")
 
-        story.append(Paragraph(f"<b>Clause ID:</b> {clause_id}", styles["Heading2"]))
-        story.append(Spacer(1, 6))
-        story.append(Paragraph(f"<b>Original Risk Level:</b> {risk_level}", styles["Normal"]))
-        story.append(Paragraph(f"<b>Original Clause:</b> {original}", styles["Normal"]))
-        story.append(Spacer(1, 6))
-        story.append(Paragraph(f"<b>AI-Modified Clause:</b> {modified}", styles["Normal"]))
-        story.append(Paragraph(f"<b>AI-Modified Risk Level:</b> {modified_risk}", styles["Normal"]))
-        story.append(Spacer(1, 15))
+# PDF of every clause with its AI-Modified version (where one was generated), for the compliance alert
+def rewritten_pdf_file(pdf_path="ai_modified_clauses.pdf"):
+    df = ensure_rewrites()
+    pdf_data = generate_rewritten_pdf(df)
+    with open(pdf_path, "wb") as f:
+        f.write(pdf_data)
+    return pdf_path
 
-    doc.build(story)
-    buffer.seek(0)
-    return buffer.getvalue()
 
 # Mail alert modal
 def email_modal(high, medium, low, gsheet_url):
@@ -362,10 +408,7 @@ def email_modal(high, medium, low, gsheet_url):
         cancel_btn = col2.form_submit_button("❌ Cancel")
 
         if send_btn:
-            pdf_path = "ai_modified_clauses.pdf"
-            pdf_data = generate_rewritten_pdf(st.session_state.df)
-            with open(pdf_path, "wb") as f:
-                f.write(pdf_data)
+            pdf_path = rewritten_pdf_file()
 
             success, msg = send_compliance_alert(
                 subject="Compliance Risk Report",
@@ -397,6 +440,32 @@ def email_modal(high, medium, low, gsheet_url):
 
 
 # Results Page
+# Risk delta between a revised contract and the version it was linked to
+def show_risk_delta(parent_name, parent, record):
+    changes = record["changes"]
+    delta = risk_delta(parent["results"], st.session_state.results or [], changes)
+
+    st.markdown(f"### 🔁 Changes since {parent_name}")
+    counts = {kind: sum(1 for change, _, _ in changes if change == kind)
+              for kind in ("unchanged", "modified", "inserted", "deleted")}
+    st.caption(
+        f"{counts['modified']} modified, {counts['inserted']} inserted and {counts['deleted']} deleted clauses "
+        f"were re-assessed; {counts['unchanged']} unchanged clauses kept their previous results."
+    )
+
+    col1, col2, col3, col4 = st.columns(4)
+    for col, (level, icon) in zip((col1, col2, col3), (("High", "🔴"), ("Medium", "🟡"), ("Low", "🟢"))):
+        _, new, diff = delta["levels"][level]
+        # more High/Medium clauses is worse, more Low clauses is better
+        col.metric(f"{icon} {level} Risk", new, f"{diff:+d}", delta_color="normal" if level == "Low" else "inverse")
+    _, new_avg, avg_diff = delta["average_score"]
+    col4.metric("📈 Avg. Risk Score", f"{new_avg}%", f"{avg_diff:+.1f}%", delta_color="inverse")
+
+    if delta["clauses"]:
+        with st.expander("🔁 Changed clauses (click to expand)"):
+            st.dataframe(pd.DataFrame(delta["clauses"]), use_container_width=True, height=300)
+
+
 def results_page():
     show_sidebar()   
     df = st.session_state.df
@@ -432,6 +501,11 @@ def results_page():
     col3.metric("🟡 Medium Risk", medium, "Clauses with moderate compliance risk")
     col4.metric("🟢 Low Risk", low, "Clauses with low compliance risk")
 
+    record = st.session_state.contracts.get(st.session_state.current_contract, {})
+    parent_name = record.get("parent")
+    if parent_name in st.session_state.contracts and record.get("changes") is not None:
+        show_risk_delta(parent_name, st.session_state.contracts[parent_name], record)
+
 
 
     # Charts Section
@@ -526,6 +600,7 @@ def results_page():
 
     # Show AI-modified clauses only if button clicked
     if st.session_state.show_rewrites:
+        df = ensure_rewrites()
         # Filter High-risk clauses
         high_risk_df = df[df["Risk Level"] == "High"].copy()
         
@@ -597,14 +672,10 @@ def results_page():
     st.markdown("---")
     st.subheader("📧 Compliance Alert")
 
-    # Generate PDF
-    pdf_path = "ai_modified_clauses.pdf"
-    pdf_data = generate_rewritten_pdf(df)
-    with open(pdf_path, "wb") as f:
-        f.write(pdf_data)
-
     # Use the same gsheet_url (safe version)
     if st.button("📨 Send to Compliance Officer"):
+        # PDF is generated (and High-risk clauses rewritten) only when an alert is sent
+        pdf_path = rewritten_pdf_file()
         success, msg = send_compliance_alert(
             subject="Compliance Risk Report",
             high_risk_count=high,
@@ -0,0 +1,47 @@
+"""
+Serial vs. process-pool PDF extraction on synthetic contracts.
+
+    python -m benchmarks.bench_extraction --pages 10 50 200 400 --workers 2 4
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import write_synthetic_pdf
+from risk_assessment.extract_pdf import extract_clauses
+
+
+def time_extraction(pdf_path, workers, repeat):
+    best = None
+    clauses = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        clauses = extract_clauses(pdf_path, workers=workers)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, clauses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50, 200, 400])
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"cpus: {os.cpu_count()}")
+        print(f"{'pages':>6} {'mode':>10} {'seconds':>9} {'speedup':>8} {'clauses':>8}")
+        for pages in args.pages:
+            pdf_path = write_synthetic_pdf(os.path.join(tmp, f"contract_{pages}.pdf"), pages)
+            serial, serial_clauses = time_extraction(pdf_path, 1, args.repeat)
+            print(f"{pages:>6} {'serial':>10} {serial:>9.3f} {1.0:>8.2f} {len(serial_clauses):>8}")
+            for workers in args.workers:
+                elapsed, clauses = time_extraction(pdf_path, workers, args.repeat)
+                assert clauses == serial_clauses, "parallel extraction changed the clause list"
+                print(f"{pages:>6} {f'{workers} procs':>10} {elapsed:>9.3f} {serial / elapsed:>8.2f} {len(clauses):>8}")
+
+
+if __name__ == "__main__":
+    main()
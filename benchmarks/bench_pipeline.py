@@ -0,0 +1,290 @@
+"""
+End-to-end pipeline timings on synthetic contracts, stage by stage: PDF text extraction,
+clause splitting, analysis plus High-risk rewrites (against the deterministic fake LLM
+backend, so no API key or network is needed), normalization of the raw model output,
+the results sink (sheet rows and the JSON result record), the AI-modified PDF report and
+the alert email (built in full, handed to a null SMTP server).
+
+Timings are compared with a saved baseline (benchmarks/data/pipeline_baseline.json by
+default) and a stage that got slower by more than --tolerance (and by at least
+--min-delta seconds) is reported as a regression; the exit status is 1 if there is any.
+With --check page counts the baseline has no timings for also fail.
+
+Timings only compare on the machine that recorded them, so the baseline is not
+committed (it is in .gitignore): the first run on a machine records it, later runs
+compare against it, and --save-baseline records it again after an intended change.
+
+    python -m benchmarks.bench_pipeline --check
+    python -m benchmarks.bench_pipeline --save-baseline
+    python -m benchmarks.bench_pipeline --pages 10 200 2000 --tolerance 0.25
+    python -m benchmarks.bench_pipeline --llm-time-scale 0.05 --malformed-rate 0.05 --rate-limit-rate 0.02
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+# caches, journals and profiles go to a scratch directory, so runs neither reuse nor
+# pollute .cache; the limiter and tuner would only add sleeps and state of their own
+_SCRATCH = tempfile.mkdtemp(prefix="bench_pipeline_")
+atexit.register(shutil.rmtree, _SCRATCH, True)
+os.environ.update({
+    "LLM_BACKEND": "fake",
+    "ANALYSIS_CACHE_PATH": os.path.join(_SCRATCH, "analysis_cache.sqlite3"),
+    "REWRITE_CACHE_PATH": os.path.join(_SCRATCH, "rewrite_cache.sqlite3"),
+    "SIMILARITY_INDEX_PATH": os.path.join(_SCRATCH, "similarity_index.sqlite3"),
+    "REGULATION_INDEX_PATH": os.path.join(_SCRATCH, "regulation_index.sqlite3"),
+    "RUN_JOURNAL_DIR": os.path.join(_SCRATCH, "runs"),
+    "EXTRACTION_CACHE_DIR": os.path.join(_SCRATCH, "extractions"),
+    "AUTOTUNE_PROFILE_PATH": os.path.join(_SCRATCH, "autotune_profile.json"),
+    "RATE_LIMIT_STATE_PATH": os.path.join(_SCRATCH, "groq_rate_limits.json"),
+    "AUTOTUNE_ENABLED": "0",
+    "RATE_LIMITER_ENABLED": "0",
+})
+
+import pandas as pd  # noqa: E402
+
+from benchmarks.synthetic import write_synthetic_pdf  # noqa: E402
+from main import write_record  # noqa: E402
+from risk_assessment import analyze_clauses as analyzer  # noqa: E402
+from risk_assessment import notification_alert  # noqa: E402
+from risk_assessment.backends import FakeBackend  # noqa: E402
+from risk_assessment.extract_pdf import extract_text, split_text_into_clauses  # noqa: E402
+from risk_assessment.reports import generate_rewritten_pdf, sheet_rows  # noqa: E402
+
+STAGES = ("extract", "split", "analyze", "normalize", "sink", "pdf", "email")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "data", "pipeline_baseline.json")
+
+
+class RecordingBackend(FakeBackend):
+    """FakeBackend that keeps the raw assessment completions for the normalize stage."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.completions = []
+
+    def create(self, model, messages, **kwargs):
+        response = super().create(model, messages, **kwargs)
+        prompt = messages[-1]["content"]
+        if prompt.startswith(analyzer.PROMPT_PREFIX) and not kwargs.get("stream"):
+            self.completions.append((prompt, response.choices[0].message.content))
+        return response
+
+
+class NullSMTP:
+    """Stands in for smtplib.SMTP: takes the message without a network round trip."""
+
+    sent_bytes = 0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def sendmail(self, sender, recipients, message):
+        NullSMTP.sent_bytes += len(message)
+
+    def quit(self):
+        pass
+
+
+def reset_caches():
+    """Forget every stored analysis so each repeat pays for the full analyze stage."""
+    analyzer.analysis_cache.clear()
+    analyzer.rewrite_cache.clear()
+    if analyzer.similarity_index is not None:
+        analyzer.similarity_index.clear()
+
+
+def normalize(completions):
+    parsed = 0
+    for prompt, content in completions:
+        items = json.loads(prompt.strip().rsplit("\n", 1)[-1])
+        ids = [cid for cid, _ in items]
+        parsed += len(analyzer.safe_json_parse(content, [text for _, text in items], ids[0], ids))
+    return parsed
+
+
+def run_pipeline(pdf_path, tmp, backend_options, workers):
+    """One pass over every stage; returns ({stage: seconds}, details)."""
+    timings = {}
+
+    def timed(stage, fn, *args, **kwargs):
+        started = time.perf_counter()
+        out = fn(*args, **kwargs)
+        timings[stage] = time.perf_counter() - started
+        return out
+
+    reset_caches()
+    backend = RecordingBackend(**backend_options)
+    previous = analyzer.set_backend(backend)
+    try:
+        text = timed("extract", extract_text, pdf_path)
+        clauses = timed("split", split_text_into_clauses, text)
+
+        def analyze():
+            results = analyzer.analyze_all_batches(clauses, start_id=1, max_workers=workers, cascade=False)
+            return analyzer.rewrite_clauses(results, max_workers=workers)
+
+        results = timed("analyze", analyze)
+    finally:
+        analyzer.set_backend(previous)
+    timed("normalize", normalize, backend.completions)
+
+    def sink():
+        rows = sheet_rows(results)
+        # the Sheets client sends the rows as a JSON body
+        json.dumps(rows, ensure_ascii=False)
+        write_record(os.path.join(tmp, "result.json"), {"contract": pdf_path, "results": results})
+
+    timed("sink", sink)
+
+    df = pd.DataFrame(results)
+    report_path = os.path.join(tmp, "ai_modified_clauses.pdf")
+
+    def pdf():
+        # the alert's report: every clause, with its AI-Modified version where there is one
+        with open(report_path, "wb") as f:
+            f.write(generate_rewritten_pdf(df))
+
+    timed("pdf", pdf)
+
+    counts = df["Risk Level"].value_counts()
+    ok, message = timed(
+        "email", notification_alert.send_compliance_alert,
+        subject="Compliance Risk Report",
+        high_risk_count=int(counts.get("High", 0)),
+        medium_risk_count=int(counts.get("Medium", 0)),
+        low_risk_count=int(counts.get("Low", 0)),
+        gsheet_link="https://docs.google.com/spreadsheets/d/benchmark",
+        contract_name=os.path.basename(pdf_path),
+        total_clauses=len(results),
+        ai_modified_filepaths=[report_path],
+    )
+    if not ok:
+        raise RuntimeError(f"email stage failed: {message}")
+    details = {
+        "clauses": len(clauses),
+        "failed": sum(1 for res in results if analyzer.is_failed_result(res)),
+        "calls": backend.calls,
+        "tokens": backend.total_tokens(),
+        "faults": {k: v for k, v in backend.faults.items() if v},
+    }
+    return timings, details
+
+
+def load_baseline(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def environment():
+    return {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()}
+
+
+def save_baseline(path, baseline, measured):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # pages not measured this time keep their previous timings
+    baseline = baseline or {"pages": {}}
+    baseline["pages"].update({str(p): {s: round(t, 4) for s, t in m.items()} for p, m in measured.items()})
+    baseline.update(environment())
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+def regressions(measured, baseline, tolerance, min_delta):
+    """(pages, stage, baseline seconds, seconds) for every stage slower than the baseline allows."""
+    slower = []
+    for pages, timings in measured.items():
+        base = baseline.get("pages", {}).get(str(pages), {})
+        for stage, seconds in timings.items():
+            before = base.get(stage)
+            if before is not None and seconds > before * (1 + tolerance) and seconds - before >= min_delta:
+                slower.append((pages, stage, before, seconds))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 200, 2000])
+    parser.add_argument("--repeat", type=int, default=1, help="best of N runs per contract")
+    parser.add_argument("--workers", type=int, default=None, help="analysis concurrency (default ANALYSIS_CONCURRENCY)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-time-scale", type=float, default=0.0,
+                        help="fraction of the fake backend's simulated latency to actually sleep (0: instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--truncate-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write these timings as the new baseline")
+    parser.add_argument("--check", action="store_true",
+                        help="fail when the baseline has no timings for a measured page count instead of skipping it")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown per stage (0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=0.05, help="ignore slowdowns below this many seconds")
+    args = parser.parse_args()
+
+    backend_options = {
+        "seed": args.seed,
+        "time_scale": args.llm_time_scale,
+        "error_rate": args.error_rate,
+        "rate_limit_rate": args.rate_limit_rate,
+        "truncate_rate": args.truncate_rate,
+        "malformed_rate": args.malformed_rate,
+    }
+    notification_alert.smtplib = SimpleNamespace(SMTP=NullSMTP)
+
+    measured = {}
+    print(f"{'pages':>6} {'clauses':>8} " + " ".join(f"{stage:>9}" for stage in STAGES) + f" {'total':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            pdf_path = write_synthetic_pdf(os.path.join(tmp, f"contract_{pages}.pdf"), pages, seed=args.seed)
+            best = None
+            for _ in range(args.repeat):
+                timings, details = run_pipeline(pdf_path, tmp, backend_options, args.workers)
+                best = timings if best is None else {s: min(best[s], timings[s]) for s in STAGES}
+            measured[pages] = best
+            print(f"{pages:>6} {details['clauses']:>8} " + " ".join(f"{best[s]:>9.3f}" for s in STAGES)
+                  + f" {sum(best.values()):>9.3f}")
+            print(f"{'':>15} {details['calls']} LLM calls, {details['tokens']} tokens, "
+                  f"{details['failed']} failed clauses, faults {details['faults'] or 'none'}")
+
+    baseline = load_baseline(args.baseline)
+    if args.save_baseline or not baseline:
+        save_baseline(args.baseline, baseline, measured)
+        print(f"baseline saved to {args.baseline}" if baseline else
+              f"no baseline yet: these timings are saved to {args.baseline} for later runs to compare with")
+        return 0
+    recorded_on = {key: baseline.get(key) for key in ("python", "machine", "cpus")}
+    if recorded_on != environment():
+        print(f"warning: baseline recorded on {recorded_on}, this is {environment()}; "
+              f"run with --save-baseline to record one here")
+    unknown = [pages for pages in measured if str(pages) not in baseline.get("pages", {})]
+    if unknown:
+        print(f"no baseline timings for {', '.join(map(str, unknown))} pages; run with --save-baseline to add them")
+        if args.check:
+            return 1
+
+    slower = regressions(measured, baseline, args.tolerance, args.min_delta)
+    for pages, stage, before, seconds in slower:
+        print(f"REGRESSION {pages} pages, {stage}: {before:.3f}s -> {seconds:.3f}s (+{seconds / before - 1:.0%})")
+    if not slower:
+        print(f"no stage slower than the baseline by more than {args.tolerance:.0%}")
+    return 1 if slower else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
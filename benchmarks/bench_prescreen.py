@@ -0,0 +1,105 @@
+"""
+Local pre-screener against the labelled sample set, and the LLM calls it avoids on real contracts.
+
+    python -m benchmarks.bench_prescreen
+    python -m benchmarks.bench_prescreen contracts/*.pdf
+"""
+import argparse
+import json
+import os
+import time
+
+from risk_assessment.analyze_clauses import PROMPT_TOKENS, REGULATION_LIST, clean_clause_text, is_valid_clause
+from risk_assessment.batch_planner import plan_batches_by_id
+from risk_assessment.extract_pdf import extract_clauses
+from risk_assessment.prescreen import PreScreener
+
+SAMPLES_PATH = os.path.join(os.path.dirname(__file__), "data", "prescreen_samples.jsonl")
+
+
+def load_samples(path=SAMPLES_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate(screener, samples):
+    """Skip decisions and regulation tags compared with the labels."""
+    counts = {"skipped_ok": 0, "skipped_wrong": 0, "missed_skip": 0, "kept_ok": 0}
+    tag_hits = tag_expected = tag_found = 0
+    errors = []
+    for sample in samples:
+        screen = screener.screen(sample["text"])
+        skipped = not screen["substantive"]
+        if skipped:
+            key = "skipped_wrong" if sample["substantive"] else "skipped_ok"
+        else:
+            key = "kept_ok" if sample["substantive"] else "missed_skip"
+        counts[key] += 1
+        if key in ("skipped_wrong", "missed_skip"):
+            errors.append((key, sample["text"]))
+
+        expected = set(sample["regulations"])
+        found = set(screen["regulations"])
+        tag_hits += len(expected & found)
+        tag_expected += len(expected)
+        tag_found += len(found)
+        if expected != found:
+            errors.append((f"tags {sorted(found)} != {sorted(expected)}", sample["text"]))
+
+    skipped = counts["skipped_ok"] + counts["skipped_wrong"]
+    non_substantive = counts["skipped_ok"] + counts["missed_skip"]
+    return {
+        **counts,
+        "skip_precision": counts["skipped_ok"] / skipped if skipped else 1.0,
+        "skip_recall": counts["skipped_ok"] / non_substantive if non_substantive else 1.0,
+        "tag_precision": tag_hits / tag_found if tag_found else 1.0,
+        "tag_recall": tag_hits / tag_expected if tag_expected else 1.0,
+        "errors": errors,
+    }
+
+
+def calls_avoided(screener, pdf_path):
+    """Clauses screened out and first-pass LLM calls saved on one contract."""
+    clauses = [clean_clause_text(cl) for cl in extract_clauses(pdf_path) if is_valid_clause(cl)]
+    started = time.perf_counter()
+    kept = [cl for cl in clauses if screener.screen(cl)["substantive"]]
+    elapsed = time.perf_counter() - started
+
+    def calls(texts):
+        return len(plan_batches_by_id(texts, list(range(len(texts))), prompt_tokens=PROMPT_TOKENS))
+
+    return {
+        "clauses": len(clauses),
+        "skipped": len(clauses) - len(kept),
+        "calls_before": calls(clauses),
+        "calls_after": calls(kept),
+        "ms": elapsed * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="*")
+    parser.add_argument("--samples", default=SAMPLES_PATH, help="labelled JSONL sample set")
+    args = parser.parse_args()
+
+    screener = PreScreener(REGULATION_LIST)
+    report = evaluate(screener, load_samples(args.samples))
+    print(f"samples: {sum(report[k] for k in ('skipped_ok', 'skipped_wrong', 'missed_skip', 'kept_ok'))}")
+    print(f"skipped correctly: {report['skipped_ok']}, substantive skipped: {report['skipped_wrong']}, "
+          f"non-substantive sent to model: {report['missed_skip']}")
+    print(f"skip precision: {report['skip_precision']:.0%}, skip recall: {report['skip_recall']:.0%}")
+    print(f"regulation tags precision: {report['tag_precision']:.0%}, recall: {report['tag_recall']:.0%}")
+    for kind, text in report["errors"]:
+        print(f"  {kind}: {text[:90]}")
+
+    if args.pdfs:
+        print(f"\n{'contract':<40} {'clauses':>8} {'skipped':>8} {'calls':>6} {'after':>6} {'ms':>8}")
+        for pdf in args.pdfs:
+            row = calls_avoided(screener, pdf)
+            print(f"{os.path.basename(pdf)[:40]:<40} {row['clauses']:>8} {row['skipped']:>8} "
+                  f"{row['calls_before']:>6} {row['calls_after']:>6} {row['ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
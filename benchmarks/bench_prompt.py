@@ -0,0 +1,184 @@
+"""
+Input tokens (and, with --live, latency) per analysis request, one prompt change at a time:
+
+    baseline   the original combined assessment + rewrite prompt, verbatim
+    assess     the assessment-only prompt with the inline regulation list (rewrites split off)
+    codebook   the codebook prompt with [Clause ID, clause text] pairs, default JSON separators
+    compact    the codebook prompt as sent: compact separators and raw UTF-8
+
+so the codebook's savings (assess -> codebook) and the separators' savings
+(codebook -> compact) are reported separately.
+
+    python -m benchmarks.bench_prompt
+    python -m benchmarks.bench_prompt --sizes 1 4 12 --live llama-3.3-70b-versatile --repeat 3
+"""
+import argparse
+import json
+import time
+
+from benchmarks.synthetic import synthetic_contract_text
+from risk_assessment.analyze_clauses import PROMPT_PREFIX, SYSTEM_PROMPT, analysis_messages, clean_clause_text
+from risk_assessment.batch_planner import estimate_tokens
+from risk_assessment.extract_pdf import split_text_into_clauses
+
+# the regulation list inlined in the prompt before the codebook
+LEGACY_REGULATION_LIST = (
+    "GDPR, UK GDPR, HIPAA, SOX, ITAR, SEC, FCPA, PCI-DSS, RBI, SEBI, IT Act, "
+    "CCPA, CPRA, GLBA, FERPA, COPPA, NIST, ISO 27001, SOC 2, SOC 1, SOC 3, "
+    "FINRA, MiFID II, EMIR, DORA, eIDAS, PIPEDA, LGPD, PDPA, APPI, POPIA, "
+    "BDSG, Swiss FADP, CIS Controls, NYDFS, MAS TRM, Basel III, AML/KYC, "
+    "OFAC, EAR, Export Control Act, Bank Secrecy Act, FedRAMP, FISMA, "
+    "HITECH, CMMC, CSA STAR, IRAP, ENS, NIS2, PSD2, ePrivacy Directive, "
+    "DPA 2018 (UK), PECR, PRA/FCA (UK), OSFI (Canada), HKMA, SAMA, "
+    "DFSA, DIFC, QFCRA, APRA CPS 234, OAIC (Australia), Privacy Act 1988, "
+    "Brazil LGPD, Mexico Federal Data Law, Chile Data Protection Bill, "
+    "South Africa POPIA, Kenya Data Protection Act, Nigeria NDPR, "
+    "Singapore PDPA, Malaysia PDPA, India DPDP Act 2023, China PIPL, "
+    "China CSL, China DSL, Russia Federal Data Law 152-FZ, UAE PDPL, "
+    "Qatar PDP Law, Bahrain PDPL, Turkey KVKK"
+)
+
+BASELINE_SYSTEM_PROMPT = "You are a legal compliance analyst. Respond ONLY with valid JSON. Risk Score must include %."
+
+# the assessment prompt after the rewrites were split off, before the codebook
+ASSESS_PROMPT_PREFIX = f"""
+You are a legal compliance analyst. Analyze the following contract clauses for regulatory compliance risk.
+
+For each clause, return ONLY valid JSON in this format:
+
+[
+  {{
+    "Clause ID": 1,
+    "Regulation": "Best matching regulation(s) from: {LEGACY_REGULATION_LIST}",
+    "Risk Level": "High/Medium/Low (determine strictly based on regulation compliance risk. Never use Unknown.)",
+    "Risk Score": "0%-100% (strictly must always include % sign)",
+    "Clause Identification": "short explanation (max 100 words)"
+  }}
+]
+
+Clauses:
+"""
+
+
+def baseline_messages(clauses, start_id=1):
+    """The original analyze_batch request, verbatim."""
+    regulation_list = LEGACY_REGULATION_LIST
+    prompt = f"""
+You are a legal compliance analyst. Analyze the following contract clauses. 
+
+For each contract clause, analyze risks and rewrite it into an "AI-Modified Clause" that strictly reduces risk.  
+
+⚖️ Rules:
+- The rewritten "AI-Modified Clause" must always reduce High risk into Medium/Low.
+- Preserve the intent of the original clause but make it safer and compliant.
+For each clause, return ONLY valid JSON in this format:
+
+[
+  {{
+    "Clause ID": 1,
+    "Contract Clause": "...",
+    "Regulation": "Best matching regulation(s) from: {regulation_list}",
+    "Risk Level": "High/Medium/Low (determine strictly based on regulation compliance risk. Never use Unknown.)",
+    "Risk Score": "0%-100% (strictly must always include % sign)",
+    "Clause Identification": "short explanation (max 100 words)",
+    "Clause Feedback & Fix": "feedback with fix (max 100 words)",
+    "AI-Modified Clause": "rewritten safer clause which always reduce High risk into Medium/Low",
+    "AI-Modified Risk Level": "Reassess the rewritten clause's risk. Must be either Medium or Low, never High or Unknown."
+  }}
+]
+
+Clauses:
+{json.dumps([{"Clause ID": i + start_id, "Contract Clause": cl} for i, cl in enumerate(clauses)])}
+"""
+    return [
+        {"role": "system", "content": BASELINE_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def assess_messages(clauses, start_id=1):
+    payload = json.dumps([{"Clause ID": i + start_id, "Contract Clause": cl} for i, cl in enumerate(clauses)])
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": ASSESS_PROMPT_PREFIX + payload + "\n"},
+    ]
+
+
+def codebook_messages(clauses, start_id=1):
+    payload = json.dumps([[i + start_id, cl] for i, cl in enumerate(clauses)])
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": PROMPT_PREFIX + payload + "\n"},
+    ]
+
+
+def compact_messages(clauses, start_id=1):
+    return analysis_messages([(i + start_id, cl) for i, cl in enumerate(clauses)])
+
+
+PROMPTS = {
+    "baseline": baseline_messages,
+    "assess": assess_messages,
+    "codebook": codebook_messages,
+    "compact": compact_messages,
+}
+
+
+def input_tokens(messages):
+    return sum(estimate_tokens(m["content"]) for m in messages)
+
+
+def time_request(client, model, messages, repeat):
+    """Best time-to-first-token and total latency over `repeat` streamed requests."""
+    ttft = total = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        first = None
+        stream = client.chat.completions.create(
+            model=model, messages=messages, max_tokens=1024, temperature=0, stream=True
+        )
+        for chunk in stream:
+            if first is None and chunk.choices and chunk.choices[0].delta.content:
+                first = time.perf_counter() - started
+        elapsed = time.perf_counter() - started
+        ttft = first if ttft is None or (first is not None and first < ttft) else ttft
+        total = elapsed if total is None else min(total, elapsed)
+    return ttft or 0.0, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4, 8, 12], help="clauses per batch")
+    parser.add_argument("--live", metavar="MODEL", help="also time real requests against this Groq model")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = "\n".join(line for page in synthetic_contract_text(5) for line in page)
+    clauses = [clean_clause_text(cl) for cl in split_text_into_clauses(text)]
+
+    client = None
+    if args.live:
+        from risk_assessment.analyze_clauses import llm_client as client
+
+    header = (f"{'batch':>6} " + " ".join(f"{name:>9}" for name in PROMPTS)
+              + f" {'codebook saved':>15} {'separators saved':>17} {'total saved':>12}")
+    if client:
+        header += " " + " ".join(f"{'ttft ' + name:>14} {'total ' + name:>15}" for name in PROMPTS)
+    print(header)
+    for size in args.sizes:
+        batch = clauses[:size]
+        tokens = {name: input_tokens(build(batch)) for name, build in PROMPTS.items()}
+        codebook_saved = 1 - tokens["codebook"] / tokens["assess"]
+        separators_saved = 1 - tokens["compact"] / tokens["codebook"]
+        total_saved = 1 - tokens["compact"] / tokens["baseline"]
+        row = (f"{size:>6} " + " ".join(f"{tokens[name]:>9}" for name in PROMPTS)
+               + f" {codebook_saved:>15.1%} {separators_saved:>17.1%} {total_saved:>12.1%}")
+        if client:
+            for name, build in PROMPTS.items():
+                ttft, total = time_request(client, args.live, build(batch), args.repeat)
+                row += f" {ttft:>13.2f}s {total:>14.2f}s"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Similarity index lookups at scale: latency, reuse of near-duplicates (other party names,
+dates and amounts) and false reuse of unrelated clauses. Lookups slow down as more stored
+clauses share long passages with the query, since each of them is a bucket candidate.
+
+    python -m benchmarks.bench_similarity
+    python -m benchmarks.bench_similarity --size 300000 --queries 2000 --threshold 0.8
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.synthetic import SENTENCES
+from risk_assessment.similarity_index import SimilarityIndex
+
+COMPANIES = [
+    "Acme Holdings Inc.", "Globex Partners LLC", "Northwind Traders Ltd.", "Contoso Pharmaceuticals GmbH",
+    "Initech Corporation", "Umbrella Capital PLC", "Stark Industries Co.", "Wayne Enterprises Limited",
+]
+VOCABULARY = sorted({w.strip(".,").lower() for s in SENTENCES for w in s.split()})
+
+
+def make_clause(rnd):
+    """A clause plus a near-duplicate of it that differs only in party, amount and date."""
+    body = rnd.choice(SENTENCES) + " " + " ".join(rnd.choices(VOCABULARY, k=24))
+    first, second = rnd.sample(COMPANIES, 2)
+    clause = f"{body} as agreed with {first} for ${rnd.randint(1, 999)},000 by March {rnd.randint(1, 28)}, 2024."
+    variant = f"{body} as agreed with {second} for ${rnd.randint(1, 999)},000 by June {rnd.randint(1, 28)}, 2026."
+    return clause, variant
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def timed_lookups(index, texts):
+    times, hits = [], 0
+    for text in texts:
+        started = time.perf_counter()
+        hit = index.lookup(text)
+        times.append(time.perf_counter() - started)
+        hits += hit is not None
+    return times, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=200000, help="clauses stored in the index")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--path", help="index file (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.path or os.path.join(tempfile.mkdtemp(), "similarity_index.sqlite3")
+    index = SimilarityIndex(path, prompt_version="bench", threshold=args.threshold, max_entries=args.size)
+    rnd = random.Random(0)
+    pairs = [make_clause(rnd) for _ in range(args.size)]
+
+    started = time.perf_counter()
+    for i in range(0, len(pairs), 5000):
+        index.add_many([(clause, {"Risk Level": "High"}) for clause, _ in pairs[i:i + 5000]], "bench")
+    build = time.perf_counter() - started
+    print(f"indexed {len(index)} clauses in {build:.1f}s ({build / args.size * 1e6:.0f} us/clause), "
+          f"{os.path.getsize(path) / 2 ** 20:.0f} MiB")
+
+    near = [variant for _, variant in rnd.sample(pairs, args.queries)]
+    unrelated = [" ".join(rnd.choices(VOCABULARY, k=40)) for _ in range(args.queries)]
+    print(f"\n{'queries':<14} {'n':>6} {'reused':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, texts in (("near-duplicate", near), ("unrelated", unrelated)):
+        times, hits = timed_lookups(index, texts)
+        print(f"{name:<14} {len(texts):>6} {hits / len(texts):>7.1%} "
+              f"{percentile(times, 50) * 1000:>8.3f} {percentile(times, 99) * 1000:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import os
+import random
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+# vocabulary loosely modelled on stock purchase / credit agreements
+HEADINGS = [
+    "Definitions", "Purchase and Sale", "Representations and Warranties", "Indemnification",
+    "Confidentiality", "Personal Data", "Termination", "Governing Law", "Notices",
+    "Export Controls", "Limitation of Liability", "Severability",
+]
+SENTENCES = [
+    "The Seller shall indemnify and hold harmless the Purchaser from any and all losses arising from a breach of this Agreement.",
+    "Each party shall keep confidential all information disclosed by the other party and shall not use it for any other purpose.",
+    "The Company shall process personal data only in accordance with applicable data protection laws and the instructions of the Purchaser.",
+    "This Agreement shall be governed by and construed in accordance with the laws of the State of New York.",
+    "Either party may terminate this Agreement upon thirty days written notice if the other party materially breaches any provision hereof.",
+    "The Purchaser shall not export, re-export or transfer any technical data except in compliance with all applicable export control laws.",
+    "In no event shall either party be liable for any indirect, incidental or consequential damages arising out of this Agreement.",
+    "All notices under this Agreement shall be in writing and delivered by hand, courier or certified mail to the addresses set forth below.",
+    "The aggregate purchase price for the Shares shall be $2,500,000 payable in immediately available funds at the Closing.",
+    "If any provision of this Agreement is held invalid, the remaining provisions shall continue in full force and effect.",
+]
+
+
+def synthetic_contract_text(pages, seed=0, lines_per_page=46):
+    """Deterministic contract-like text, one list entry per page."""
+    rnd = random.Random(seed)
+    out, section, sub = [], 0, 0
+    for _ in range(pages):
+        lines = []
+        while len(lines) < lines_per_page:
+            if rnd.random() < 0.08:
+                section += 1
+                sub = 0
+                lines.append(f"{section}. {rnd.choice(HEADINGS)}")
+            elif rnd.random() < 0.2:
+                sub += 1
+                lines.append(f"{section}.{sub} {rnd.choice(SENTENCES)}")
+            else:
+                lines.append(rnd.choice(SENTENCES))
+        out.append(lines)
+    return out
+
+
+def write_synthetic_pdf(path, pages, seed=0):
+    """Render a synthetic contract of `pages` pages to `path` (long lines are wrapped)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    c = canvas.Canvas(path, pagesize=A4)
+    for lines in synthetic_contract_text(pages, seed=seed):
+        y = 800
+        for line in lines:
+            words, current = line.split(), ""
+            for w in words:
+                if len(current) + len(w) > 95:
+                    c.drawString(40, y, current)
+                    y -= 12
+                    current = w
+                else:
+                    current = f"{current} {w}".strip()
+            c.drawString(40, y, current)
+            y -= 12
+            if y < 40:
+                break
+        c.showPage()
+    c.save()
+    return path
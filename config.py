@@ -1,11 +1,75 @@
 import os
 import itertools
+import random
+import threading
+import time
+from collections import deque
 from dotenv import load_dotenv
 
 load_dotenv()
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
+# "groq" for the Groq API or "fake" for the deterministic local stand-in used by the
+# benchmarks and offline runs (see risk_assessment/backends.py), with its fault rates
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+FAKE_LLM_OPTIONS = {
+    "seed": int(os.getenv("FAKE_LLM_SEED", 0)),
+    "time_scale": float(os.getenv("FAKE_LLM_TIME_SCALE", 1.0)),
+    "error_rate": float(os.getenv("FAKE_LLM_ERROR_RATE", 0.0)),
+    "rate_limit_rate": float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", 0.0)),
+    "truncate_rate": float(os.getenv("FAKE_LLM_TRUNCATE_RATE", 0.0)),
+    "malformed_rate": float(os.getenv("FAKE_LLM_MALFORMED_RATE", 0.0)),
+}
+
+# clause analysis cache (see risk_assessment/analysis_cache.py)
+ANALYSIS_CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", os.path.join(".cache", "analysis_cache.sqlite3"))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", 50000))
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_DAYS", 30)) * 24 * 3600
+# AI-Modified Clauses from the on-demand rewrite pass, cached separately from assessments
+REWRITE_CACHE_PATH = os.getenv("REWRITE_CACHE_PATH", os.path.join(".cache", "rewrite_cache.sqlite3"))
+
+# "recursive" is the original 500-char RecursiveCharacterTextSplitter with 50-char
+# overlap; "structure" (opt-in) splits on numbered headings without overlap. Switching
+# changes the clauses and their IDs; extractions are cached per splitter and run
+# journals per clause texts, so neither is reused across a switch
+CLAUSE_SPLITTER = os.getenv("CLAUSE_SPLITTER", "recursive")
+
+# score signature/address blocks, recitals and plain definitions Low locally instead of
+# sending them to the model (see risk_assessment/prescreen.py)
+PRESCREEN_ENABLED = os.getenv("PRESCREEN_ENABLED", "1") == "1"
+# dispatch batches in order of a local keyword risk prior instead of document order,
+# so the riskiest clauses are analyzed (and reported) first
+RISK_PRIORITY_ENABLED = os.getenv("RISK_PRIORITY_ENABLED", "1") == "1"
+
+# reuse the analysis of a near-duplicate clause from an earlier contract (party names,
+# dates and amounts aside) instead of calling the model (see risk_assessment/similarity_index.py)
+SIMILARITY_INDEX_ENABLED = os.getenv("SIMILARITY_INDEX_ENABLED", "1") == "1"
+SIMILARITY_INDEX_PATH = os.getenv("SIMILARITY_INDEX_PATH", os.path.join(".cache", "similarity_index.sqlite3"))
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", 0.85))
+SIMILARITY_INDEX_MAX_ENTRIES = int(os.getenv("SIMILARITY_INDEX_MAX_ENTRIES", 500000))
+
+# regulation -> analyzed clauses across the result files, and the re-evaluation queue
+# (see risk_assessment/regulation_index.py and `main.py --reevaluate`)
+REGULATION_INDEX_PATH = os.getenv("REGULATION_INDEX_PATH", os.path.join(".cache", "regulation_index.sqlite3"))
+# LLM calls one re-evaluation run may make (a hard cap); the rest stays queued for the next run
+REEVALUATION_CALL_BUDGET = int(os.getenv("REEVALUATION_CALL_BUDGET", 100))
+
+# quick-scan mode (see risk_assessment/quick_scan.py and `main.py --quick`): share of the
+# clauses that need a model call that is sampled, the smallest sample, and the interval level
+QUICK_SCAN_FRACTION = float(os.getenv("QUICK_SCAN_FRACTION", 0.2))
+QUICK_SCAN_MIN_SAMPLE = int(os.getenv("QUICK_SCAN_MIN_SAMPLE", 12))
+QUICK_SCAN_CONFIDENCE = float(os.getenv("QUICK_SCAN_CONFIDENCE", 0.95))
+
+# per-run journals of finished batches, so an interrupted run resumes where it stopped
+# (see risk_assessment/run_journal.py); finished journals are kept for RUN_JOURNAL_TTL_DAYS
+RUN_JOURNAL_DIR = os.getenv("RUN_JOURNAL_DIR", os.path.join(".cache", "runs"))
+RUN_JOURNAL_TTL_SECONDS = int(os.getenv("RUN_JOURNAL_TTL_DAYS", 7)) * 24 * 3600
+
+# extracted clause lists by PDF content hash (see risk_assessment/extraction_cache.py)
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", os.path.join(".cache", "extractions"))
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", 500))
+
 # list of models for substitution
 MODEL_LIST = [
     "moonshotai/kimi-k2-instruct",
@@ -21,14 +85,277 @@ MODEL_LIST = [
     "meta-llama/llama-4-maverick-17b-128e-instruct"
 ]
 
-class ModelManager:
+# context window and completion cap (tokens) per model, used by the batch planner
+MODEL_LIMITS = {
+    "moonshotai/kimi-k2-instruct": {"context": 131072, "max_output": 16384},
+    "moonshotai/kimi-k2-instruct-0905": {"context": 262144, "max_output": 16384},
+    "llama-3.3-70b-versatile": {"context": 131072, "max_output": 32768},
+    "openai/gpt-oss-20b": {"context": 131072, "max_output": 65536},
+    "openai/gpt-oss-120b": {"context": 131072, "max_output": 65536},
+    "meta-llama/llama-4-scout-17b-16e-instruct": {"context": 131072, "max_output": 8192},
+    "deepseek-r1-distill-llama-70b": {"context": 131072, "max_output": 16384},
+    "qwen/qwen3-32b": {"context": 131072, "max_output": 40960},
+    "gemma2-9b-it": {"context": 8192, "max_output": 8192},
+    "llama-3.1-8b-instant": {"context": 131072, "max_output": 8192},
+    "meta-llama/llama-4-maverick-17b-128e-instruct": {"context": 131072, "max_output": 8192},
+}
+DEFAULT_MODEL_LIMITS = {"context": 8192, "max_output": 4096}
+
+# Groq requests/tokens per minute per model, shared by every process on the host
+# (see risk_assessment/rate_limiter.py)
+RATE_LIMITS = {
+    "moonshotai/kimi-k2-instruct": {"rpm": 60, "tpm": 10000},
+    "moonshotai/kimi-k2-instruct-0905": {"rpm": 60, "tpm": 10000},
+    "llama-3.3-70b-versatile": {"rpm": 30, "tpm": 12000},
+    "openai/gpt-oss-20b": {"rpm": 30, "tpm": 8000},
+    "openai/gpt-oss-120b": {"rpm": 30, "tpm": 8000},
+    "meta-llama/llama-4-scout-17b-16e-instruct": {"rpm": 30, "tpm": 30000},
+    "deepseek-r1-distill-llama-70b": {"rpm": 30, "tpm": 6000},
+    "qwen/qwen3-32b": {"rpm": 60, "tpm": 6000},
+    "gemma2-9b-it": {"rpm": 30, "tpm": 15000},
+    "llama-3.1-8b-instant": {"rpm": 30, "tpm": 6000},
+    "meta-llama/llama-4-maverick-17b-128e-instruct": {"rpm": 30, "tpm": 6000},
+}
+DEFAULT_RATE_LIMITS = {"rpm": 30, "tpm": 6000}
+# off by default on the fake backend, which has no limits to respect and must not spend the shared budget
+RATE_LIMITER_ENABLED = os.getenv("RATE_LIMITER_ENABLED", "1" if LLM_BACKEND == "groq" else "0") == "1"
+RATE_LIMIT_STATE_PATH = os.getenv("RATE_LIMIT_STATE_PATH", os.path.join(".cache", "groq_rate_limits.json"))
+
+# per-clause retries of failed analyses (see risk_assessment/retry_scheduler.py)
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", 2))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", 1.0))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", 30.0))
+
+# hedged requests: resend a slow batch to a second model (see risk_assessment/hedging.py).
+# Streamed requests (the app's live results) are never hedged: both streams would feed
+# the same clauses to the live view, so they fall back to plain retries
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", 0.9))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", 2.0))
+HEDGE_MAX_EXTRA_FRACTION = float(os.getenv("HEDGE_MAX_EXTRA_FRACTION", 0.1))
+
+# two-tier cascade: a fast model triages every clause and only risky or uncertain
+# ones get the full analysis from a large model (see analyze_cascade)
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "0") == "1"
+CASCADE_TRIAGE_MODEL = os.getenv("CASCADE_TRIAGE_MODEL", "llama-3.1-8b-instant")
+CASCADE_MIN_CONFIDENCE = int(os.getenv("CASCADE_MIN_CONFIDENCE", 70))   # % below which a Low rating is escalated
+CASCADE_TRIAGE_BATCH_SIZE = int(os.getenv("CASCADE_TRIAGE_BATCH_SIZE", 40))
+CASCADE_ESCALATION_MODELS = [
+    "moonshotai/kimi-k2-instruct",
+    "moonshotai/kimi-k2-instruct-0905",
+    "llama-3.3-70b-versatile",
+    "openai/gpt-oss-120b",
+    "deepseek-r1-distill-llama-70b",
+    "qwen/qwen3-32b",
+    "meta-llama/llama-4-maverick-17b-128e-instruct",
+]
+
+# batch planner budgets: long completions are slow and lose more work when truncated
+PLANNER_MAX_OUTPUT_TOKENS = int(os.getenv("PLANNER_MAX_OUTPUT_TOKENS", 6000))
+PLANNER_MAX_CLAUSES = int(os.getenv("PLANNER_MAX_CLAUSES", 12))
+# concurrent batches per analysis run when neither the caller nor a tuned profile says otherwise
+ANALYSIS_CONCURRENCY = int(os.getenv("ANALYSIS_CONCURRENCY", 3))
+
+# per-model batch size / concurrency autotuner (see risk_assessment/autotuner.py): when
+# enabled, live runs record latency, tokens and parse failures per setting and use the
+# best setting whose failure rate stays within AUTOTUNE_MAX_FAILURE_RATE
+AUTOTUNE_ENABLED = os.getenv("AUTOTUNE_ENABLED", "0") == "1"
+AUTOTUNE_PROFILE_PATH = os.getenv("AUTOTUNE_PROFILE_PATH", os.path.join(".cache", "autotune_profile.json"))
+# `main.py --autotune` measures the fake backend, so its profile is kept apart and never
+# steers live traffic
+AUTOTUNE_OFFLINE_PROFILE_PATH = os.getenv(
+    "AUTOTUNE_OFFLINE_PROFILE_PATH", os.path.join(".cache", "autotune_offline_profile.json")
+)
+AUTOTUNE_MAX_FAILURE_RATE = float(os.getenv("AUTOTUNE_MAX_FAILURE_RATE", 0.05))
+AUTOTUNE_MIN_REQUESTS = int(os.getenv("AUTOTUNE_MIN_REQUESTS", 5))
+
+# model routing / circuit breaker tuning
+EWMA_ALPHA = 0.3
+DEFAULT_LATENCY_PRIOR = 5.0        # seconds assumed for a model we have not measured yet
+BREAKER_FAILURE_THRESHOLD = 3      # consecutive failures that open a model's circuit
+BREAKER_BASE_COOLDOWN = 30.0       # seconds before an open circuit is probed again
+BREAKER_MAX_COOLDOWN = 600.0
+RATE_LIMIT_COOLDOWN = 20.0
+DECOMMISSIONED_COOLDOWN = 3600.0
+
+
+class ModelStats:
+    """Rolling health of a single model."""
+
     def __init__(self):
-        self.models = list(MODEL_LIST)
+        self.latency_ewma = None
+        self.error_rate = 0.0
+        self.parse_failure_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.parse_failures = 0
+        self.rate_limited = 0
+        self.consecutive_failures = 0
+        self.in_flight = 0
+        self.state = "closed"          # closed -> open -> half_open -> closed/open
+        self.open_until = 0.0
+        self.cooldown = BREAKER_BASE_COOLDOWN
+
+    def score(self, latency_prior=DEFAULT_LATENCY_PRIOR):
+        """Lower is better: expected latency inflated by recent error and parse-failure rates."""
+        latency = self.latency_ewma if self.latency_ewma is not None else latency_prior
+        return latency * (1 + 3 * self.error_rate + 2 * self.parse_failure_rate) * (1 + self.in_flight)
+
+    def as_dict(self):
+        return {
+            "state": self.state,
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "parse_failure_rate": round(self.parse_failure_rate, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "parse_failures": self.parse_failures,
+            "rate_limited": self.rate_limited,
+        }
+
+
+class ModelManager:
+    """
+    Health-aware model router. Tracks per-model latency (EWMA), error rate,
+    JSON-parse-failure rate and 429s, and routes each request to an available
+    model with probability weighted towards the best scores (so healthy models
+    get most traffic without a single one absorbing every request). Failing
+    models are taken out of rotation by a circuit breaker and probed back in
+    after a cooldown. Thread-safe.
+    """
+
+    def __init__(self, models=None, seed=None):
+        self.models = list(models or MODEL_LIST)
         self.index = 0
+        self.stats = {m: ModelStats() for m in self.models}
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        # latencies of recent successful requests across all models, for hedging thresholds
+        self._recent_latencies = deque(maxlen=200)
+
+    def get_next_model(self, candidates=None):
+        with self._lock:
+            now = time.time()
+            pool = [m for m in (candidates or self.models) if m in self.stats] or list(self.models)
+            # rotate the pool so ties are broken round-robin
+            if self.index >= len(pool):
+                self.index = 0
+            pool = pool[self.index:] + pool[:self.index]
+            self.index += 1
+
+            # an open circuit whose cooldown has passed gets a single probe request
+            for m in pool:
+                st = self.stats[m]
+                if st.state == "open" and now >= st.open_until:
+                    st.state = "half_open"
+                    st.in_flight += 1
+                    return m
+
+            closed = [m for m in pool if self.stats[m].state == "closed"]
+            if closed:
+                # unmeasured models are assumed to be as fast as the typical measured one, so they get explored
+                measured = sorted(self.stats[m].latency_ewma for m in closed if self.stats[m].latency_ewma is not None)
+                prior = measured[len(measured) // 2] if measured else DEFAULT_LATENCY_PRIOR
+                weights = [1.0 / self.stats[m].score(prior) ** 2 for m in closed]
+                model = self._rng.choices(closed, weights=weights)[0]
+            else:
+                # everything is tripped: fall back to the model that recovers soonest
+                model = min(pool, key=lambda m: self.stats[m].open_until)
+            self.stats[model].in_flight += 1
+            return model
+
+    def record_success(self, model, latency, parse_ok=True):
+        """Record a completed request. A response that could not be parsed counts against the model."""
+        with self._lock:
+            st = self.stats.get(model)
+            if st is None:
+                return
+            st.in_flight = max(0, st.in_flight - 1)
+            st.requests += 1
+            st.latency_ewma = latency if st.latency_ewma is None else (
+                EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * st.latency_ewma
+            )
+            st.error_rate *= 1 - EWMA_ALPHA
+            self._recent_latencies.append(latency)
+            st.parse_failure_rate = EWMA_ALPHA * (0 if parse_ok else 1) + (1 - EWMA_ALPHA) * st.parse_failure_rate
+            if parse_ok:
+                st.consecutive_failures = 0
+                st.state = "closed"
+                st.cooldown = BREAKER_BASE_COOLDOWN
+            else:
+                st.parse_failures += 1
+                self._register_failure(st, BREAKER_BASE_COOLDOWN)
+
+    def release(self, model):
+        """Give back the slot get_next_model took for a request that was never sent (e.g. a cancelled hedge)."""
+        with self._lock:
+            st = self.stats.get(model)
+            if st is None:
+                return
+            st.in_flight = max(0, st.in_flight - 1)
+            if st.state == "half_open":
+                # the probe never ran: the next request probes again
+                st.state = "open"
+
+    def record_failure(self, model, latency, error=None):
+        """Record a failed request; `error` is the raised exception, used to spot 429s and retired models."""
+        with self._lock:
+            st = self.stats.get(model)
+            if st is None:
+                return
+            st.in_flight = max(0, st.in_flight - 1)
+            st.requests += 1
+            st.failures += 1
+            st.error_rate = EWMA_ALPHA + (1 - EWMA_ALPHA) * st.error_rate
+            # a timeout tells us the model is at least this slow
+            st.latency_ewma = latency if st.latency_ewma is None else (
+                EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * st.latency_ewma
+            )
+
+            kind = self.classify_error(error)
+            if kind == "rate_limited":
+                st.rate_limited += 1
+                self._open(st, RATE_LIMIT_COOLDOWN)
+            elif kind == "decommissioned":
+                self._open(st, DECOMMISSIONED_COOLDOWN)
+            else:
+                self._register_failure(st, st.cooldown)
+
+    def _register_failure(self, st, cooldown):
+        st.consecutive_failures += 1
+        if st.state == "half_open" or st.consecutive_failures >= BREAKER_FAILURE_THRESHOLD:
+            self._open(st, cooldown)
+            st.cooldown = min(st.cooldown * 2, BREAKER_MAX_COOLDOWN)
+
+    @staticmethod
+    def _open(st, cooldown):
+        st.state = "open"
+        st.open_until = time.time() + cooldown
+
+    @staticmethod
+    def classify_error(error):
+        if error is None:
+            return "error"
+        status = getattr(error, "status_code", None)
+        text = str(error).lower()
+        if status == 429 or "rate limit" in text or "rate_limit" in text:
+            return "rate_limited"
+        if status == 404 or "decommissioned" in text or "model_not_found" in text or "does not exist" in text:
+            return "decommissioned"
+        return "error"
+
+    def latency_percentile(self, p, min_samples=10):
+        """Latency at quantile `p` (0-1) of recent successful requests, or None with too little history."""
+        with self._lock:
+            samples = sorted(self._recent_latencies)
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+    def available_models(self):
+        with self._lock:
+            return [m for m in self.models if self.stats[m].state != "open"]
 
-    def get_next_model(self):
-        if self.index >= len(self.models):
-            self.index = 0
-        model = self.models[self.index]
-        self.index += 1
-        return model
+    def snapshot(self):
+        with self._lock:
+            return {m: st.as_dict() for m, st in self.stats.items()}
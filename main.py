@@ -1,11 +1,378 @@
-from risk_assessment.extract_pdf import extract_clauses
-from risk_assessment.ingestion_processing import ingest_to_sheet
+"""
+Batch compliance analysis of contract PDFs.
 
-# Path to your contract PDF
-pdf_path = r"C:\Users\satya\OneDrive\AI_Powered_Compilance_regulatory_checker\contracts\Law_Insider_americas-diamond-corp_exhibit-101-stock-purchase-agreement-stock-purchase-agreement-dated-as-of-february-11-2013-and-wi_Filed_01-03-2013_Contract.pdf"
+    python main.py contracts/                                  # every PDF in a folder
+    python main.py "contracts/**/*.pdf" --out results --contracts 2 --workers 3
+    python main.py contract.pdf --sheet                        # one contract into Google Sheets
+    python main.py contracts/ --cascade                        # fast triage model first, large model for risky clauses
+    python main.py contracts/ --rewrite                        # also write AI-Modified Clauses for High-risk clauses
+    python main.py --reevaluate GDPR DORA --budget 50          # re-analyze clauses affected by a regulation update
+    python main.py dealroom/ --quick                           # estimated risk mix from a sample of each contract
+    python main.py dealroom/ --quick --promote 0.1             # ...and fully analyze those that may be >= 10% High
+    python main.py contracts/ --autotune llama-3.3-70b-versatile  # tune batch size / concurrency offline
 
-# Step 1: Extract clauses from the PDF
-clauses = extract_clauses(pdf_path)
+Each contract's results are written to <out>/<name>.json. Contracts whose PDF
+content matches an existing result file are skipped, so an interrupted overnight
+run can simply be started again.
 
-# Step 2: Analyze and ingest results into Google Sheets
-ingest_to_sheet(clauses, batch_size=3)
\ No newline at end of file
+--reevaluate looks up, in the regulation index of the result files, every clause
+that cites the given regulations or that the pre-screener tags with them, queues
+them and re-analyzes the queue (riskiest clauses first) within the call budget,
+updating the result files in place. Each batch is sent once, so --budget caps the
+calls actually made; whatever does not fit or fails stays queued; run
+`main.py --reevaluate` without regulations to continue.
+
+--quick analyzes a stratified sample of each contract's clauses and prints the
+estimated High/Medium/Low shares with confidence intervals instead of writing
+result files. The sampled clauses are journaled, so running the same contracts
+again without --quick completes the analysis without re-billing them. With
+--promote SHARE, a contract whose High share may reach SHARE (the upper bound of
+its interval) is completed into a full analysis in the same run, reusing the
+sampled results, and its result file is written.
+
+--autotune searches each model's batch size and concurrency against the fake
+backend (no API calls), using the clauses of the given contracts, and writes them
+to a separate offline profile (AUTOTUNE_OFFLINE_PROFILE_PATH) that live runs never
+read. Live runs tune themselves from their own requests with AUTOTUNE_ENABLED=1.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config import (
+    ANALYSIS_CONCURRENCY,
+    AUTOTUNE_MAX_FAILURE_RATE,
+    AUTOTUNE_MIN_REQUESTS,
+    AUTOTUNE_OFFLINE_PROFILE_PATH,
+    PLANNER_MAX_CLAUSES,
+    REEVALUATION_CALL_BUDGET,
+    REGULATION_INDEX_PATH,
+)
+from risk_assessment.analyze_clauses import (
+    REWRITE_FIELDS,
+    analysis_cache,
+    analyze_all_batches,
+    analyze_cascade,
+    analyze_within_budget,
+    format_cascade_report,
+    is_failed_result,
+    model_manager,
+    open_run_journal,
+    rewrite_clauses,
+)
+from risk_assessment.autotuner import Autotuner, tune_offline
+from risk_assessment.extract_pdf import extract_clauses_cached
+from risk_assessment.metrics import metrics
+from risk_assessment.quick_scan import format_quick_scan, promote_scan, quick_scan
+from risk_assessment.regulation_index import RegulationIndex
+from risk_assessment.regulations import expand_regulations
+
+regulation_index = RegulationIndex(REGULATION_INDEX_PATH)
+
+
+def find_contracts(inputs):
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(glob.glob(os.path.join(item, "**", "*.pdf"), recursive=True))
+        else:
+            paths.extend(glob.glob(item, recursive=True) or [item])
+    # de-duplicate, keep a stable order
+    return sorted({os.path.abspath(p) for p in paths if p.lower().endswith(".pdf")})
+
+
+def result_path(out_dir, pdf_path):
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    digest = hashlib.sha1(pdf_path.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(out_dir, f"{stem}-{digest}.json")
+
+
+def is_completed(path, pdf_sha256):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("sha256") == pdf_sha256
+    except (OSError, ValueError):
+        return False
+
+
+def risk_summary(results):
+    summary = {"High": 0, "Medium": 0, "Low": 0, "Unknown": 0}
+    for res in results:
+        summary[res.get("Risk Level", "Unknown")] = summary.get(res.get("Risk Level", "Unknown"), 0) + 1
+    return summary
+
+
+def process_contract(pdf_path, out_dir, workers, extract_workers, cascade=False, rewrite=False, quick=False,
+                     promote=None):
+    with open(pdf_path, "rb") as f:
+        pdf_bytes = f.read()
+    pdf_sha256 = hashlib.sha256(pdf_bytes).hexdigest()
+    out_path = result_path(out_dir, pdf_path)
+    if is_completed(out_path, pdf_sha256):
+        return "skipped", 0
+
+    started = time.perf_counter()
+    clauses = extract_clauses_cached(pdf_bytes, workers=extract_workers)
+    # batches finished before a crash are read back from the journal instead of re-billed
+    journal = open_run_journal(clauses, "cascade" if cascade else "single")
+    cascade_report = None
+    if quick:
+        # the sample stays out of the journal, so unpromoted scans leave no incomplete (never
+        # pruned) journals behind; promote_scan records the sample once the full analysis starts
+        scan = quick_scan(clauses, start_id=1, max_workers=workers, cascade=cascade)
+        print(f"{os.path.basename(pdf_path)}\n{format_quick_scan(scan)}")
+        if promote is None or scan["estimate"]["High"]["high"] < promote:
+            return "done", scan["sampled"]
+        print(f"{os.path.basename(pdf_path)}: High share may reach {promote:.0%}, completing the full analysis")
+        results = promote_scan(scan, clauses, start_id=1, max_workers=workers, cascade=cascade, journal=journal)
+    elif cascade:
+        results, cascade_report = analyze_cascade(clauses, start_id=1, max_workers=workers, journal=journal)
+        print(f"{os.path.basename(pdf_path)}\n{format_cascade_report(cascade_report)}")
+    else:
+        results = analyze_all_batches(clauses, start_id=1, max_workers=workers, cascade=False, journal=journal)
+    if rewrite:
+        results = rewrite_clauses(results, max_workers=workers)
+
+    record = {
+        "contract": pdf_path,
+        "sha256": pdf_sha256,
+        "clauses": len(clauses),
+        "summary": risk_summary(results),
+        "seconds": round(time.perf_counter() - started, 2),
+        "results": results,
+    }
+    if cascade_report:
+        record["cascade"] = cascade_report
+    write_record(out_path, record)
+    regulation_index.index_contract(os.path.abspath(out_path), results, os.stat(out_path).st_mtime_ns)
+    return "done", len(results)
+
+
+def write_record(out_path, record):
+    tmp = out_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False, indent=2)
+    # the result file only appears once complete, so a crash never leaves a "done" contract behind
+    os.replace(tmp, out_path)
+
+
+def load_record(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# ---------------- Regulation Re-evaluation ----------------
+def sync_regulation_index(out_dir):
+    """Index new or changed result files (or all of them after a catalogue change) and drop removed ones."""
+    paths = {os.path.abspath(p) for p in glob.glob(os.path.join(out_dir, "*.json"))}
+    for contract in regulation_index.contracts():
+        if contract not in paths:
+            regulation_index.remove_contract(contract)
+    for path in sorted(paths):
+        mtime_ns = os.stat(path).st_mtime_ns
+        if not regulation_index.is_current(path, mtime_ns):
+            record = load_record(path)
+            if record and "results" in record:
+                regulation_index.index_contract(path, record["results"], mtime_ns)
+
+
+def reevaluate_portfolio(out_dir, regulations, budget, workers):
+    """
+    Queue the clauses affected by `regulations` (if any) and re-analyze as much of the
+    queue as `budget` LLM calls allow, updating the result files in place (a clause's
+    rewrite is kept unless its risk level changed). The budget
+    is a hard cap: batches are sent once without hedging or retries (a failed clause
+    stays queued) and pre-screened clauses cost nothing.
+    """
+    sync_regulation_index(out_dir)
+    names = list(dict.fromkeys(
+        name.strip() for reg in regulations for name in expand_regulations(reg).split(",") if name.strip()
+    ))
+    if names:
+        affected = regulation_index.affected(names)
+        regulation_index.enqueue(affected, reason=f"update: {', '.join(names)}")
+        print(f"{len(affected)} clauses cite or touch {', '.join(names)}")
+
+    # clause texts come from the result files; entries whose clause is gone are dropped
+    records, items, gone = {}, [], []
+    for contract, clause_id, _ in regulation_index.queued():
+        if contract not in records:
+            record = load_record(contract)
+            records[contract] = (record, {res["Clause ID"]: res for res in record["results"]}) if record else None
+        res = records[contract][1].get(clause_id) if records[contract] else None
+        if res is None:
+            gone.append((contract, clause_id))
+        else:
+            items.append((contract, clause_id, res["Contract Clause"]))
+    regulation_index.dequeue(gone)
+
+    # the longest prefix of the priority-ordered queue whose batches fit the budget
+    calls_before = metrics.snapshot()["counters"].get("llm_calls", 0)
+    results, planned = analyze_within_budget(
+        [text for _, _, text in items], list(range(len(items))), budget, max_workers=workers,
+    ) if items else ([], 0)
+    calls = metrics.snapshot()["counters"].get("llm_calls", 0) - calls_before
+
+    done, changed, touched = [], 0, set()
+    for res in results:
+        if is_failed_result(res):
+            continue
+        contract, clause_id, _ = items[res["Clause ID"]]
+        previous = records[contract][1][clause_id]
+        if previous.get("Risk Level") == res["Risk Level"]:
+            # the clause's rewrite (if any) still answers its risk level
+            res = {k: v for k, v in res.items() if k not in REWRITE_FIELDS}
+        else:
+            changed += 1
+            for field in REWRITE_FIELDS:
+                previous.pop(field, None)
+        previous.update({**res, "Clause ID": clause_id})
+        done.append((contract, clause_id))
+        touched.add(contract)
+
+    for contract in touched:
+        record = records[contract][0]
+        record["summary"] = risk_summary(record["results"])
+        record["reevaluated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        write_record(contract, record)
+        regulation_index.index_contract(contract, record["results"], os.stat(contract).st_mtime_ns)
+    regulation_index.dequeue(done)
+
+    print(f"Re-evaluated {len(done)} of {len(items)} queued clauses in {len(touched)} contracts "
+          f"({calls} LLM calls made, {planned} planned, budget {budget}); {len(items) - len(done)} still queued")
+    print(f"Risk level changed for {changed} clauses")
+    return {"queued": len(items), "reevaluated": len(done), "changed": changed, "contracts": len(touched),
+            "calls": calls}
+
+
+def print_summary(counts, clauses, elapsed):
+    snap = metrics.snapshot()
+    counters = snap["counters"]
+    cache = analysis_cache.stats()
+    minutes = elapsed / 60 or 1
+    print("\n---------------- Summary ----------------")
+    print(f"Contracts: {counts['done']} analyzed, {counts['skipped']} skipped, {counts['failed']} failed")
+    print(f"Elapsed: {elapsed:.1f}s")
+    print(f"Throughput: {counts['done'] / minutes:.2f} contracts/min, {clauses / elapsed if elapsed else 0:.2f} clauses/sec")
+    print(f"LLM calls: {snap['counters'].get('llm_calls', 0)} ({snap['counters'].get('llm_errors', 0)} failed)")
+    print(f"Cache: {cache['hits']} hits, {cache['misses']} misses ({cache['hit_rate']:.0%})")
+    wait = snap["timers"].get("rate_limit_wait", {}).get("seconds", 0)
+    call = snap["timers"].get("llm_call", {}).get("seconds", 0)
+    print(f"Time in LLM calls: {call:.1f}s, waiting on rate limits: {wait:.1f}s")
+    if counters.get("prescreen_skipped"):
+        print(f"Pre-screen: {counters['prescreen_skipped']} of {counters['prescreen_checked']} clauses scored locally, "
+              f"{counters.get('prescreen_calls_avoided', 0)} LLM calls avoided")
+    if counters.get("quick_scan_sampled"):
+        print(f"Quick scan: {counters['quick_scan_sampled']} clauses sampled")
+    if counters.get("journal_resumed"):
+        print(f"Resumed: {counters['journal_resumed']} clauses read back from interrupted runs")
+    if counters.get("similarity_reused"):
+        print(f"Reuse: {counters['similarity_reused']} clauses took the analysis of a similar clause from an earlier contract")
+    if "cascade_triaged" in counters:
+        print(f"Cascade: {counters['cascade_escalated']} of {counters['cascade_triaged']} clauses escalated, "
+              f"{counters['cascade_calls_saved']} calls and ~{counters['cascade_tokens_saved']} tokens saved")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="*", help="PDF files, directories or glob patterns")
+    parser.add_argument("--out", default="results", help="directory for per-contract result files")
+    parser.add_argument("--contracts", type=int, default=2, help="contracts processed in parallel")
+    parser.add_argument("--workers", type=int,
+                        help="concurrent LLM batches per contract (default: tuned profile, else ANALYSIS_CONCURRENCY)")
+    parser.add_argument("--extract-workers", type=int, default=1, help="processes for PDF page extraction")
+    parser.add_argument("--sheet", action="store_true", help="push a single contract to Google Sheets instead")
+    parser.add_argument("--cascade", action="store_true",
+                        help="triage with a fast model and send only risky clauses to a large model")
+    parser.add_argument("--rewrite", action="store_true", help="generate AI-Modified Clauses for High-risk clauses")
+    parser.add_argument("--reevaluate", nargs="*", metavar="REGULATION",
+                        help="re-analyze the clauses in --out affected by these added or changed regulations")
+    parser.add_argument("--budget", type=int, default=REEVALUATION_CALL_BUDGET,
+                        help="LLM calls a --reevaluate run may make")
+    parser.add_argument("--autotune", nargs="*", metavar="MODEL",
+                        help="tune batch size and concurrency of these models (default: all) on the fake backend")
+    parser.add_argument("--quick", action="store_true",
+                        help="estimate each contract's risk mix from a sample of its clauses")
+    parser.add_argument("--promote", type=float, default=None, metavar="SHARE",
+                        help="with --quick, fully analyze contracts whose High share may reach SHARE (0-1)")
+    args = parser.parse_args()
+    if args.promote is not None and not args.quick:
+        parser.error("--promote only applies to --quick")
+
+    if args.reevaluate is not None:
+        started = time.perf_counter()
+        stats = reevaluate_portfolio(args.out, args.reevaluate, args.budget, args.workers)
+        print_summary({"done": stats["contracts"], "skipped": 0, "failed": 0}, stats["reevaluated"],
+                      time.perf_counter() - started)
+        return
+
+    pdfs = find_contracts(args.inputs)
+    if not pdfs:
+        parser.error("no PDF files found")
+
+    if args.autotune is not None:
+        tuner = Autotuner(
+            AUTOTUNE_OFFLINE_PROFILE_PATH,
+            max_failure_rate=AUTOTUNE_MAX_FAILURE_RATE,
+            min_requests=AUTOTUNE_MIN_REQUESTS,
+            default_batch_size=PLANNER_MAX_CLAUSES,
+            default_concurrency=ANALYSIS_CONCURRENCY,
+        )
+        clauses = [cl for pdf in pdfs for cl in extract_clauses_cached(pdf, workers=args.extract_workers)]
+        chosen = tune_offline(clauses, args.autotune or model_manager.models, tuner)
+        print("\n---------------- Tuned settings ----------------")
+        for model, best in chosen.items():
+            if best is None:
+                print(f"{model}: no setting within the failure-rate limit, defaults kept")
+            else:
+                print(f"{model}: batch size {best['batch_size']}, concurrency {best['concurrency']} "
+                      f"({best['clauses_per_second']:.2f} clauses/s, {best['failure_rate']:.1%} failed)")
+        print(f"Offline profile written to {tuner.path}; apply a setting with --workers and PLANNER_MAX_CLAUSES")
+        return
+
+    if args.sheet:
+        if len(pdfs) != 1:
+            parser.error("--sheet takes exactly one contract")
+        # imported here: ingestion_processing authenticates with Google Sheets on import
+        from risk_assessment.ingestion_processing import ingest_to_sheet
+        ingest_to_sheet(extract_clauses_cached(pdfs[0], workers=args.extract_workers), max_workers=args.workers,
+                        cascade=args.cascade)
+        return
+
+    os.makedirs(args.out, exist_ok=True)
+    counts = {"done": 0, "skipped": 0, "failed": 0}
+    clauses_done = 0
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(1, args.contracts)) as executor:
+        futures = {
+            executor.submit(
+                process_contract, pdf, args.out, args.workers, args.extract_workers, args.cascade, args.rewrite,
+                args.quick, args.promote
+            ): pdf
+            for pdf in pdfs
+        }
+        for future in as_completed(futures):
+            pdf = futures[future]
+            try:
+                status, n_clauses = future.result()
+            except Exception as e:
+                status, n_clauses = "failed", 0
+                print(f"[failed] {pdf}: {type(e).__name__} → {e}")
+            counts[status] += 1
+            clauses_done += n_clauses
+            if status != "failed":
+                print(f"[{status}] {pdf} ({n_clauses} clauses)")
+
+    print_summary(counts, clauses_done, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
 from .extract_pdf import extract_clauses
 from .analyze_clauses import analyze_all_batches
-from .ingestion_processing import ingest_to_sheet
 from .notification_alert import send_compliance_alert
 
 __all__ = [
@@ -9,3 +8,12 @@ __all__ = [
     "ingest_to_sheet",
     "send_compliance_alert",
 ]
+
+
+def __getattr__(name):
+    # ingestion_processing authenticates with Google Sheets on import, so it is only
+    # loaded when ingest_to_sheet is actually used (extraction tools and benchmarks don't need it)
+    if name == "ingest_to_sheet":
+        from .ingestion_processing import ingest_to_sheet
+        return ingest_to_sheet
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+# ---------------- Clause Analysis Cache ----------------
+class AnalysisCache:
+    """
+    On-disk SQLite cache of clause analyses.
+
+    Entries are keyed by the hash of the cleaned clause text, the model that produced
+    the analysis and the prompt version. Rows written under a different prompt version
+    or older than `ttl_seconds` are treated as stale and purged. The table is kept under
+    `max_entries` by evicting the least recently used rows.
+    """
+
+    def __init__(self, path, prompt_version, max_entries=50000, ttl_seconds=None):
+        self.path = path
+        self.prompt_version = prompt_version
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    # connection is opened lazily so importing the analyzer never touches the disk
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS clause_analysis (
+                    text_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (text_hash, model, prompt_version)
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON clause_analysis (last_used)")
+            self._purge_stale()
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def text_hash(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _purge_stale(self):
+        cur = self._conn.execute(
+            "DELETE FROM clause_analysis WHERE prompt_version != ?", (self.prompt_version,)
+        )
+        self.evictions += cur.rowcount
+        if self.ttl_seconds:
+            cur = self._conn.execute(
+                "DELETE FROM clause_analysis WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self.evictions += cur.rowcount
+
+    def get(self, text, models):
+        """Return the most recent cached analysis of `text` by any of `models`, or None."""
+        models = list(models)
+        with self._lock:
+            conn = self._connect()
+            params = [self.text_hash(text), self.prompt_version] + models
+            query = (
+                "SELECT model, result, created_at FROM clause_analysis "
+                "WHERE text_hash = ? AND prompt_version = ? "
+                f"AND model IN ({','.join('?' * len(models))}) "
+                "ORDER BY last_used DESC LIMIT 1"
+            )
+            row = conn.execute(query, params).fetchone()
+            if row and self.ttl_seconds and row[2] < time.time() - self.ttl_seconds:
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE clause_analysis SET last_used = ? WHERE text_hash = ? AND model = ? AND prompt_version = ?",
+                (time.time(), params[0], row[0], self.prompt_version),
+            )
+            conn.commit()
+            self.hits += 1
+            return json.loads(row[1])
+
+    def put_many(self, items, model):
+        """Store `(clause_text, result)` pairs produced by `model`."""
+        if not items:
+            return
+        now = time.time()
+        rows = [
+            (self.text_hash(text), model, self.prompt_version, json.dumps(result), now, now)
+            for text, result in items
+        ]
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO clause_analysis "
+                "(text_hash, model, prompt_version, result, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict_lru()
+            conn.commit()
+
+    def _evict_lru(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM clause_analysis").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM clause_analysis WHERE rowid IN "
+                "(SELECT rowid FROM clause_analysis ORDER BY last_used ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += overflow
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM clause_analysis")
+            conn.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -1,11 +1,176 @@
+import functools
+import hashlib
 import json
+import math
+import queue
 import re
+import threading
 import time
-from groq import Groq
-from config import GROQ_API_KEY, ModelManager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import (
+    LLM_BACKEND,
+    ModelManager,
+    ANALYSIS_CONCURRENCY,
+    AUTOTUNE_ENABLED,
+    AUTOTUNE_MAX_FAILURE_RATE,
+    AUTOTUNE_MIN_REQUESTS,
+    AUTOTUNE_PROFILE_PATH,
+    PLANNER_MAX_CLAUSES,
+    ANALYSIS_CACHE_PATH,
+    ANALYSIS_CACHE_MAX_ENTRIES,
+    ANALYSIS_CACHE_TTL_SECONDS,
+    RATE_LIMITER_ENABLED,
+    RATE_LIMIT_STATE_PATH,
+    REWRITE_CACHE_PATH,
+    RUN_JOURNAL_DIR,
+    RUN_JOURNAL_TTL_SECONDS,
+    PRESCREEN_ENABLED,
+    RISK_PRIORITY_ENABLED,
+    SIMILARITY_INDEX_ENABLED,
+    SIMILARITY_INDEX_PATH,
+    SIMILARITY_THRESHOLD,
+    SIMILARITY_INDEX_MAX_ENTRIES,
+    CASCADE_ENABLED,
+    CASCADE_TRIAGE_MODEL,
+    CASCADE_MIN_CONFIDENCE,
+    CASCADE_TRIAGE_BATCH_SIZE,
+    CASCADE_ESCALATION_MODELS,
+    DEFAULT_LATENCY_PRIOR,
+)
+from risk_assessment.analysis_cache import AnalysisCache
+from risk_assessment.autotuner import Autotuner
+from risk_assessment.backends import make_backend
+from risk_assessment.batch_planner import (
+    SAFETY_FACTOR,
+    estimate_input_tokens,
+    estimate_request_tokens,
+    estimate_tokens,
+    max_tokens_for,
+    model_limits,
+    plan_batches_by_id,
+)
+from risk_assessment.hedging import HedgePolicy, hedged_call
+from risk_assessment.metrics import metrics
+from risk_assessment.prescreen import PreScreener
+from risk_assessment.rate_limiter import RateLimiter
+from risk_assessment.regulations import CODE_TABLE, REGULATION_LIST, expand_regulations
+from risk_assessment.retry_scheduler import RetryScheduler, backoff_delay
+from risk_assessment.run_journal import RunJournal, run_id
+from risk_assessment.similarity_index import SimilarityIndex
+from risk_assessment.stream_parser import JSONArrayStreamParser, parse_complete_objects
 
-groq_client = Groq(api_key=GROQ_API_KEY)
+llm_client = make_backend(LLM_BACKEND)
 model_manager = ModelManager()
+rate_limiter = RateLimiter(RATE_LIMIT_STATE_PATH) if RATE_LIMITER_ENABLED else None
+hedge_policy = HedgePolicy()
+autotuner = Autotuner(
+    AUTOTUNE_PROFILE_PATH,
+    max_failure_rate=AUTOTUNE_MAX_FAILURE_RATE,
+    min_requests=AUTOTUNE_MIN_REQUESTS,
+    default_batch_size=PLANNER_MAX_CLAUSES,
+    default_concurrency=ANALYSIS_CONCURRENCY,
+) if AUTOTUNE_ENABLED else None
+prescreener = PreScreener(REGULATION_LIST) if PRESCREEN_ENABLED else None
+# keyword matcher for the scheduling risk prior, shared with the pre-screener when it is on
+risk_scorer = prescreener or PreScreener(REGULATION_LIST)
+
+
+def set_backend(client):
+    """Send every model request to `client` (see risk_assessment/backends.py); returns the previous one."""
+    global llm_client
+    previous, llm_client = llm_client, client
+    return previous
+
+
+# ---------------- Prompt ----------------
+SYSTEM_PROMPT = "You are a legal compliance analyst. Respond ONLY with valid JSON. Risk Score must include %."
+
+# Assessment pass: rewrites are generated separately, and only on demand (see rewrite_clauses).
+# Built once at import and identical for every request, so the system message and this
+# prefix form a stable prompt prefix that the provider can cache; only the clauses vary.
+PROMPT_PREFIX = f"""
+Assess each contract clause for regulatory compliance risk. Return ONLY a JSON array, one object per clause:
+[{{"Clause ID": 1, "Regulation": "code(s)", "Risk Level": "High/Medium/Low", "Risk Score": "0%-100%", "Clause Identification": "short explanation (max 100 words)"}}]
+Regulation: best matching code(s) from the table, comma-separated. Risk Level strictly by regulation compliance risk, never Unknown.
+Regulation codes by jurisdiction: {CODE_TABLE}
+
+Clauses, as [Clause ID, clause text] pairs:
+"""
+
+PROMPT_TOKENS = estimate_tokens(SYSTEM_PROMPT + PROMPT_PREFIX)
+
+REWRITE_SYSTEM_PROMPT = "You are a legal compliance analyst. Respond ONLY with valid JSON."
+
+REWRITE_PROMPT_PREFIX = """
+You are a legal compliance analyst. Rewrite each of the following risky contract clauses
+into an "AI-Modified Clause" that strictly reduces risk.
+
+⚖️ Rules:
+- The rewritten "AI-Modified Clause" must always reduce High risk into Medium/Low.
+- Preserve the intent of the original clause but make it safer and compliant.
+For each clause, return ONLY valid JSON in this format:
+
+[
+  {
+    "Clause ID": 1,
+    "Clause Feedback & Fix": "feedback with fix (max 100 words)",
+    "AI-Modified Clause": "rewritten safer clause which always reduce High risk into Medium/Low",
+    "AI-Modified Risk Level": "Reassess the rewritten clause's risk. Must be either Medium or Low, never High or Unknown."
+  }
+]
+
+Clauses:
+"""
+
+REWRITE_PROMPT_TOKENS = estimate_tokens(REWRITE_SYSTEM_PROMPT + REWRITE_PROMPT_PREFIX)
+
+# Cheap first pass of the cascade: risk level only, no regulation mapping or rewrite
+TRIAGE_SYSTEM_PROMPT = "You are a legal compliance analyst. Respond ONLY with valid JSON."
+
+TRIAGE_PROMPT_PREFIX = """
+Triage the following contract clauses for regulatory compliance risk
+(data protection, financial, security, export control and similar regulations).
+
+For each clause, return ONLY valid JSON in this format:
+
+[
+  {"Clause ID": 1, "Risk Level": "High/Medium/Low", "Risk Score": "0%-100%", "Confidence": "0-100, how sure you are of the Risk Level"}
+]
+
+Clauses:
+"""
+
+TRIAGE_PROMPT_TOKENS = estimate_tokens(TRIAGE_SYSTEM_PROMPT + TRIAGE_PROMPT_PREFIX)
+# one short JSON object per clause
+TRIAGE_OUTPUT_TOKENS = 40
+
+# Any edit to the prompt or regulation list changes this, which invalidates cached analyses
+PROMPT_VERSION = hashlib.sha256(
+    (SYSTEM_PROMPT + PROMPT_PREFIX).encode("utf-8")
+).hexdigest()[:16]
+
+REWRITE_PROMPT_VERSION = hashlib.sha256(
+    (REWRITE_SYSTEM_PROMPT + REWRITE_PROMPT_PREFIX).encode("utf-8")
+).hexdigest()[:16]
+
+analysis_cache = AnalysisCache(
+    ANALYSIS_CACHE_PATH,
+    prompt_version=PROMPT_VERSION,
+    max_entries=ANALYSIS_CACHE_MAX_ENTRIES,
+    ttl_seconds=ANALYSIS_CACHE_TTL_SECONDS,
+)
+rewrite_cache = AnalysisCache(
+    REWRITE_CACHE_PATH,
+    prompt_version=REWRITE_PROMPT_VERSION,
+    max_entries=ANALYSIS_CACHE_MAX_ENTRIES,
+    ttl_seconds=ANALYSIS_CACHE_TTL_SECONDS,
+)
+similarity_index = SimilarityIndex(
+    SIMILARITY_INDEX_PATH,
+    prompt_version=PROMPT_VERSION,
+    threshold=SIMILARITY_THRESHOLD,
+    max_entries=SIMILARITY_INDEX_MAX_ENTRIES,
+) if SIMILARITY_INDEX_ENABLED else None
 
 # ---------------- Allowed Fields Schema ----------------
 ALLOWED_FIELDS = {
@@ -20,6 +185,12 @@ ALLOWED_FIELDS = {
     "AI-Modified Risk Level"   # <-- added
 }
 
+# fields filled in by the rewrite pass
+REWRITE_FIELDS = ("Clause Feedback & Fix", "AI-Modified Clause", "AI-Modified Risk Level")
+NO_REWRITE = "No AI-modified clause available."
+# what a near-duplicate clause takes over from the one it matched
+REUSED_FIELDS = ("Regulation", "Risk Level", "Risk Score", "Clause Identification")
+
 # ---------------- Cleaner ----------------
 def clean_clause_text(text: str) -> str:
     """Normalize clause text by stripping whitespace and collapsing spaces/newlines."""
@@ -79,187 +250,1063 @@ def is_valid_clause(clause: str) -> bool:
     return True
 
 # ---------------- Normalizer ----------------
-def normalize_result(parsed, clauses, start_id):
+def _normalize_one(ai_dict, clause, clause_id):
+    """Normalize one model-returned dict for `clause` into the result schema."""
+    base = {
+        "Clause ID": clause_id,
+        "Contract Clause": clean_clause_text(clause),
+        "Regulation": "Unknown",
+        "Risk Level": "Unknown",
+        "Risk Score": "0%",
+        "Clause Identification": "Unknown",
+        "Clause Feedback & Fix": "No feedback or recommendation available.",
+        "AI-Modified Clause": NO_REWRITE,
+        "AI-Modified Risk Level": "Unknown",  # default
+        "Analysis Source": "LLM"  # or Cache / Reused / Pre-screen / Triage
+    }
+
+    try:
+        if isinstance(ai_dict, dict):
+            for k, v in ai_dict.items():
+                if k in ALLOWED_FIELDS and k not in ("Clause ID", "Contract Clause"):
+                    if k == "Risk Score":
+                        base[k] = normalize_risk_score(v)
+                    elif k == "Regulation":
+                        # the prompt asks for codebook codes; store the full names
+                        base[k] = expand_regulations(v) or "Unknown"
+                    elif k == "Risk Level":
+                        base[k] = normalize_risk_level(v)
+                    elif k == "AI-Modified Risk Level":
+                        # normalize and force to Medium/Low if needed per rules
+                        norm = normalize_risk_level(v)
+                        # if the model returned High for AI-Modified, we lower it to Medium
+                        if norm == "High":
+                            norm = "Medium"
+                        base[k] = norm
+                    else:
+                        base[k] = clean_clause_text(v) if isinstance(v, str) else v
+    except Exception:
+        pass
+
+    # --- Fallback inference for AI-Modified Risk Level ---
+    # If model didn't provide AI-Modified Risk Level but did provide a rewritten clause,
+    # infer a safer level based on original Risk Level. This avoids Unknown states.
+    if base.get("AI-Modified Risk Level", "Unknown") == "Unknown":
+        modified_clause_present = base.get("AI-Modified Clause") and base.get("AI-Modified Clause") != NO_REWRITE
+        orig_rl = base.get("Risk Level", "Unknown")
+        if modified_clause_present:
+            if orig_rl == "High":
+                base["AI-Modified Risk Level"] = "Medium"
+            elif orig_rl == "Medium":
+                base["AI-Modified Risk Level"] = "Low"
+            elif orig_rl == "Low":
+                base["AI-Modified Risk Level"] = "Low"
+            else:
+                # If original is Unknown but model rewrote, assume Medium (safer default)
+                base["AI-Modified Risk Level"] = "Medium"
+
+    return base
+
+
+def _parsed_id(ai_dict):
+    try:
+        return int(ai_dict.get("Clause ID"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _match_parsed(parsed, clause_ids):
+    """
+    Map model output to clause IDs. Objects are matched by their "Clause ID" when every
+    returned ID is one we asked for (so a truncated or reordered array still lines up);
+    otherwise they are matched by position.
+    """
+    if not isinstance(parsed, list):
+        return {}
+    ids = [_parsed_id(d) if isinstance(d, dict) else None for d in parsed]
+    wanted = set(clause_ids)
+    if parsed and all(i in wanted for i in ids) and len(set(ids)) == len(ids):
+        return dict(zip(ids, parsed))
+    return dict(zip(clause_ids, parsed))
+
+
+def normalize_result(parsed, clauses, start_id, clause_ids=None):
     """
     Cleans AI output: ensures schema, strips unknown fields,
     fills defaults if missing, cleans whitespace.
+    `clause_ids` overrides the sequential IDs derived from `start_id`.
     """
+    clause_ids = clause_ids or [i + start_id for i in range(len(clauses))]
+    by_id = _match_parsed(parsed, clause_ids)
     normalized = []
-    for i, cl in enumerate(clauses):
+    for cid, cl in zip(clause_ids, clauses):
         if not is_valid_clause(cl):
             # Skip non-clauses (these will not be ingested)
             continue
-
-        base = {
-            "Clause ID": i + start_id,
-            "Contract Clause": clean_clause_text(cl),
-            "Regulation": "Unknown",
-            "Risk Level": "Unknown",
-            "Risk Score": "0%",
-            "Clause Identification": "Unknown",
-            "Clause Feedback & Fix": "No feedback or recommendation available.",
-            "AI-Modified Clause": "No AI-modified clause available.",
-            "AI-Modified Risk Level": "Unknown"  # default
-        }
-
-        try:
-            ai_dict = parsed[i] if isinstance(parsed, list) and i < len(parsed) else {}
-            if isinstance(ai_dict, dict):
-                for k, v in ai_dict.items():
-                    if k in ALLOWED_FIELDS:
-                        if k == "Risk Score":
-                            base[k] = normalize_risk_score(v)
-                        elif k == "Risk Level":
-                            base[k] = normalize_risk_level(v)
-                        elif k == "AI-Modified Risk Level":
-                            # normalize and force to Medium/Low if needed per rules
-                            norm = normalize_risk_level(v)
-                            # if the model returned High for AI-Modified, we lower it to Medium
-                            if norm == "High":
-                                norm = "Medium"
-                            base[k] = norm
-                        else:
-                            base[k] = clean_clause_text(v) if isinstance(v, str) else v
-        except Exception:
-            pass
-
-        # --- Fallback inference for AI-Modified Risk Level ---
-        # If model didn't provide AI-Modified Risk Level but did provide a rewritten clause,
-        # infer a safer level based on original Risk Level. This avoids Unknown states.
-        if base.get("AI-Modified Risk Level", "Unknown") == "Unknown":
-            modified_clause_present = base.get("AI-Modified Clause") and base.get("AI-Modified Clause") != "No AI-modified clause available."
-            orig_rl = base.get("Risk Level", "Unknown")
-            if modified_clause_present:
-                if orig_rl == "High":
-                    base["AI-Modified Risk Level"] = "Medium"
-                elif orig_rl == "Medium":
-                    base["AI-Modified Risk Level"] = "Low"
-                elif orig_rl == "Low":
-                    base["AI-Modified Risk Level"] = "Low"
-                else:
-                    # If original is Unknown but model rewrote, assume Medium (safer default)
-                    base["AI-Modified Risk Level"] = "Medium"
-
-        normalized.append(base)
+        normalized.append(_normalize_one(by_id.get(cid, {}), cl, cid))
     return normalized
 
 # ---------------- Safe JSON Parser ----------------
-def safe_json_parse(content, clauses, start_id):
+def safe_json_parse(content, clauses, start_id, clause_ids=None):
     try:
         parsed = json.loads(content)
-        return normalize_result(parsed, clauses, start_id)
+        return normalize_result(parsed, clauses, start_id, clause_ids)
     except:
         try:
             match = re.search(r"\[\s*{.*?}\s*\]", content, re.DOTALL)
             if match:
                 parsed = json.loads(match.group(0))
-                return normalize_result(parsed, clauses, start_id)
+                return normalize_result(parsed, clauses, start_id, clause_ids)
         except:
             pass
 
+    # salvage every complete object before a truncated or malformed tail
+    parsed = parse_complete_objects(content)
+    if parsed:
+        return normalize_result(parsed, clauses, start_id, clause_ids)
+
     # fallback if parsing fails
-    return normalize_result([], clauses, start_id)
+    return normalize_result([], clauses, start_id, clause_ids)
 
 # ---------------- Batch Analysis ----------------
-def analyze_batch(clauses, start_id=1, retries=3, timeout=30):
-    # Keep only valid clauses (this makes results consistent)
-    clauses = [clean_clause_text(cl) for cl in clauses if is_valid_clause(cl)]
-
-    regulation_list = (
-        "GDPR, UK GDPR, HIPAA, SOX, ITAR, SEC, FCPA, PCI-DSS, RBI, SEBI, IT Act, "
-        "CCPA, CPRA, GLBA, FERPA, COPPA, NIST, ISO 27001, SOC 2, SOC 1, SOC 3, "
-        "FINRA, MiFID II, EMIR, DORA, eIDAS, PIPEDA, LGPD, PDPA, APPI, POPIA, "
-        "BDSG, Swiss FADP, CIS Controls, NYDFS, MAS TRM, Basel III, AML/KYC, "
-        "OFAC, EAR, Export Control Act, Bank Secrecy Act, FedRAMP, FISMA, "
-        "HITECH, CMMC, CSA STAR, IRAP, ENS, NIS2, PSD2, ePrivacy Directive, "
-        "DPA 2018 (UK), PECR, PRA/FCA (UK), OSFI (Canada), HKMA, SAMA, "
-        "DFSA, DIFC, QFCRA, APRA CPS 234, OAIC (Australia), Privacy Act 1988, "
-        "Brazil LGPD, Mexico Federal Data Law, Chile Data Protection Bill, "
-        "South Africa POPIA, Kenya Data Protection Act, Nigeria NDPR, "
-        "Singapore PDPA, Malaysia PDPA, India DPDP Act 2023, China PIPL, "
-        "China CSL, China DSL, Russia Federal Data Law 152-FZ, UAE PDPL, "
-        "Qatar PDP Law, Bahrain PDPL, Turkey KVKK"
+def is_failed_result(res) -> bool:
+    """True when the model gave no usable assessment for a clause."""
+    return res["Risk Level"] == "Unknown" or res["Regulation"] == "Unknown"
+
+
+def _record_usage(model, usage, estimated_tokens):
+    """Count the token usage of a call and settle its rate-limiter reservation of `estimated_tokens`."""
+    if usage is None:
+        return
+    metrics.incr("llm_prompt_tokens", getattr(usage, "prompt_tokens", 0) or 0)
+    metrics.incr("llm_completion_tokens", getattr(usage, "completion_tokens", 0) or 0)
+    if rate_limiter:
+        rate_limiter.reconcile(model, estimated_tokens, getattr(usage, "total_tokens", None))
+
+
+def _stream_completion(model, messages, max_tokens, timeout, pending, on_clause):
+    """
+    Stream a completion and normalize each clause object as soon as it is complete.
+    Returns ({clause_id: result}, usage), usage as reported with the last chunk (None
+    if the stream carried none). If the stream fails part-way, the clauses parsed so
+    far are attached to the raised exception as `partial_results`.
+    """
+    clause_by_id = dict(pending)
+    order = [cid for cid, _ in pending]
+    parser = JSONArrayStreamParser()
+    parsed = {}
+    usage = None
+
+    def emit(ai_dict):
+        cid = _parsed_id(ai_dict)
+        if cid not in clause_by_id or cid in parsed:
+            # model renumbered the clauses: fall back to the next unparsed one in order
+            cid = next((c for c in order if c not in parsed), None)
+        if cid is None:
+            return
+        result = _normalize_one(ai_dict, clause_by_id[cid], cid)
+        parsed[cid] = result
+        if on_clause and not is_failed_result(result):
+            on_clause(result)
+
+    stream = llm_client.chat.completions.create(
+        model=model,
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=0,
+        timeout=timeout,
+        stream=True
     )
+    try:
+        for chunk in stream:
+            usage = _chunk_usage(chunk) or usage
+            if not chunk.choices:
+                continue
+            for ai_dict in parser.feed(chunk.choices[0].delta.content or ""):
+                emit(ai_dict)
+    except Exception as e:
+        e.partial_results = parsed
+        raise
+    return parsed, usage
 
-    prompt = f"""
-You are a legal compliance analyst. Analyze the following contract clauses. 
 
-For each contract clause, analyze risks and rewrite it into an "AI-Modified Clause" that strictly reduces risk.  
+def _chunk_usage(chunk):
+    """Token usage carried by a stream chunk (Groq sends it in `x_groq` with the last chunk)."""
+    return getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None)
 
-⚖️ Rules:
-- The rewritten "AI-Modified Clause" must always reduce High risk into Medium/Low.
-- Preserve the intent of the original clause but make it safer and compliant.
-For each clause, return ONLY valid JSON in this format:
 
-[
-  {{
-    "Clause ID": 1,
-    "Contract Clause": "...",
-    "Regulation": "Best matching regulation(s) from: {regulation_list}",
-    "Risk Level": "High/Medium/Low (determine strictly based on regulation compliance risk. Never use Unknown.)",
-    "Risk Score": "0%-100% (strictly must always include % sign)",
-    "Clause Identification": "short explanation (max 100 words)",
-    "Clause Feedback & Fix": "feedback with fix (max 100 words)",
-    "AI-Modified Clause": "rewritten safer clause which always reduce High risk into Medium/Low",
-    "AI-Modified Risk Level": "Reassess the rewritten clause's risk. Must be either Medium or Low, never High or Unknown."
-  }}
-]
+def _clauses_json(items):
+    """Clause payload for a prompt: compact separators and raw UTF-8 keep it to the fewest tokens."""
+    return json.dumps(items, ensure_ascii=False, separators=(",", ":"))
 
-Clauses:
-{json.dumps([{"Clause ID": i + start_id, "Contract Clause": cl} for i, cl in enumerate(clauses)])}
-"""
 
+def analysis_messages(pending):
+    """Chat messages of the assessment request for `(clause_id, clause)` pairs."""
+    prompt = PROMPT_PREFIX + _clauses_json([[cid, cl] for cid, cl in pending]) + "\n"
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _call_model(model, pending, timeout, stream=False, on_clause=None, tuning=None):
+    """
+    One request for the `(clause_id, clause)` pairs in `pending` to `model`. Reports
+    latency and outcome to the model manager (and, under the `tuning` setting, to the
+    autotuner) and returns results in `pending` order.
+    """
+    pending_ids = [cid for cid, _ in pending]
+    pending_clauses = [cl for _, cl in pending]
+    messages = analysis_messages(pending)
+    estimated_tokens = estimate_request_tokens(pending_clauses, PROMPT_TOKENS)
+    max_tokens = max_tokens_for(pending_clauses, model, PROMPT_TOKENS)
+
+    if rate_limiter:
+        metrics.observe("rate_limit_wait", rate_limiter.acquire(model, estimated_tokens))
+    started = time.perf_counter()
+    try:
+        metrics.incr("llm_calls")
+        if stream:
+            parsed, usage = _stream_completion(model, messages, max_tokens, timeout, pending, on_clause)
+            _record_usage(model, usage, estimated_tokens)
+            results = [parsed.get(cid) or _normalize_one({}, cl, cid) for cid, cl in pending]
+        else:
+            response = llm_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=0,
+                timeout=timeout
+            )
+            usage = getattr(response, "usage", None)
+            _record_usage(model, usage, estimated_tokens)
+            content = response.choices[0].message.content
+            results = safe_json_parse(content, pending_clauses, pending_ids[0], pending_ids)
+    except Exception as e:
+        elapsed = time.perf_counter() - started
+        metrics.observe("llm_call", elapsed)
+        metrics.incr("llm_errors")
+        model_manager.record_failure(model, elapsed, e)
+        _observe(model, tuning, elapsed, len(pending), len(pending), estimated_tokens)
+        raise
+
+    elapsed = time.perf_counter() - started
+    metrics.observe("llm_call", elapsed)
+    model_manager.record_success(model, elapsed, parse_ok=_parse_ok(results))
+    _observe(model, tuning, elapsed, len(pending), sum(1 for res in results if is_failed_result(res)),
+             getattr(usage, "total_tokens", None) or estimated_tokens)
+    return results
+
+
+def _observe(model, tuning, seconds, clauses, failed, tokens):
+    """Report one analysis request to the autotuner under `tuning`, the (batch size, concurrency) of its run."""
+    if autotuner is not None and tuning:
+        autotuner.record(model, *tuning, seconds, clauses, failed, tokens)
+
+
+def _parse_ok(results):
+    return not all(is_failed_result(res) for res in results)
+
+
+def _json_request(messages, parse, estimated_tokens, max_tokens, retries=2, timeout=30, models=None):
+    """
+    Non-streaming request for the auxiliary passes (triage, rewrite), retried across
+    `models`. `parse(content)` returns the parsed value, falsy if nothing usable came
+    back; `max_tokens(model)` gives the completion budget. Returns (value, model),
+    or (None, None) if every attempt failed.
+    """
     for attempt in range(retries):
-        model = model_manager.get_next_model()
+        model = model_manager.get_next_model(candidates=models)
+        if rate_limiter:
+            metrics.observe("rate_limit_wait", rate_limiter.acquire(model, estimated_tokens))
+        started = time.perf_counter()
         try:
-            response = groq_client.chat.completions.create(
+            metrics.incr("llm_calls")
+            response = llm_client.chat.completions.create(
                 model=model,
-                messages=[
-                    {"role": "system", "content": "You are a legal compliance analyst. Respond ONLY with valid JSON. Risk Score must include %."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=2000,
+                messages=messages,
+                max_tokens=max_tokens(model),
                 temperature=0,
                 timeout=timeout
             )
-            content = response.choices[0].message.content
-            return safe_json_parse(content, clauses, start_id)
+            _record_usage(model, getattr(response, "usage", None), estimated_tokens)
+            value = parse(response.choices[0].message.content)
         except Exception as e:
+            elapsed = time.perf_counter() - started
+            metrics.observe("llm_call", elapsed)
+            metrics.incr("llm_errors")
+            model_manager.record_failure(model, elapsed, e)
             print(f"Attempt {attempt + 1} with model '{model}' failed: {type(e).__name__} → {e}")
-            time.sleep(2)
+            if model_manager.classify_error(e) == "rate_limited":
+                metrics.incr("llm_rate_limited")
+                if rate_limiter:
+                    rate_limiter.on_rate_limited(model)
+                else:
+                    time.sleep(backoff_delay(attempt))
+            continue
+
+        elapsed = time.perf_counter() - started
+        metrics.observe("llm_call", elapsed)
+        model_manager.record_success(model, elapsed, parse_ok=bool(value))
+        if value:
+            return value, model
+    return None, None
+
+
+def _parse_objects(content):
+    """Model output as a list of objects, salvaging complete ones from a malformed array."""
+    try:
+        parsed = json.loads(content)
+    except ValueError:
+        match = re.search(r"\[\s*{.*}\s*\]", content or "", re.DOTALL)
+        try:
+            parsed = json.loads(match.group(0)) if match else None
+        except ValueError:
+            parsed = None
+    if not isinstance(parsed, list):
+        parsed = parse_complete_objects(content or "")
+    return parsed
+
+
+def _request_analysis(clauses, clause_ids, retries, timeout, stream=False, on_clause=None, models=None, hedge=None,
+                      tuning=None):
+    """
+    Send clauses to the model. Returns (results, model) — model is None if every attempt failed.
+    `models` restricts routing to a subset of the model list.
+    With `stream=True` clause objects are parsed as they arrive and passed to `on_clause`;
+    if the stream breaks off, the clauses already parsed are kept and only the rest are retried.
+    When hedging is enabled (non-streaming only), a request slower than the recent latency
+    percentile is also sent to a second model and the first valid answer wins; `hedge=False`
+    turns this off for the call. Every request, hedges included, is recorded by the
+    autotuner under `tuning`.
+    """
+    hedge = hedge_policy.enabled if hedge is None else hedge
+    done = {}
+    model_used = None
+
+    for attempt in range(retries):
+        pending = [(cid, cl) for cid, cl in zip(clause_ids, clauses) if cid not in done]
+        model = model_manager.get_next_model(candidates=models)
+        try:
+            if hedge and not stream:
+                def pick_secondary():
+                    others = [m for m in model_manager.available_models() if m != model and (not models or m in models)]
+                    return model_manager.get_next_model(candidates=others) if others else None
+
+                results, model = hedged_call(
+                    lambda m: _call_model(m, pending, timeout, tuning=tuning),
+                    model, pick_secondary, _parse_ok, hedge_policy, model_manager,
+                )
+            else:
+                results = _call_model(model, pending, timeout, stream=stream, on_clause=on_clause, tuning=tuning)
+            for res in results:
+                done[res["Clause ID"]] = res
+            return [done[cid] for cid in clause_ids if cid in done], model
+        except Exception as e:
+            # keep whatever a broken stream delivered; the next attempt only sends the rest
+            partial = getattr(e, "partial_results", None) or {}
+            if partial:
+                metrics.incr("llm_stream_partial_clauses", len(partial))
+                done.update(partial)
+                model_used = model
+            print(f"Attempt {attempt + 1} with model '{model}' failed: {type(e).__name__} → {e}")
+            # other failures fall through to the next healthy model straight away
+            if model_manager.classify_error(e) == "rate_limited":
+                metrics.incr("llm_rate_limited")
+                if rate_limiter:
+                    rate_limiter.on_rate_limited(model)
+                else:
+                    time.sleep(backoff_delay(attempt))
 
     print("All retries failed. Using fallback.")
-    return safe_json_parse("[]", clauses, start_id)
+    results = [done.get(cid) or _normalize_one({}, cl, cid) for cid, cl in zip(clause_ids, clauses)]
+    return results, model_used
 
 
-# ---------------- Auto-Retry ----------------
-def retry_failed_clauses(results, retries=1):
-    final_results = []
-    failed = []
+def _prior_result(clause, clause_id):
+    """
+    Result for `clause` that needs no model call: its cached analysis, or the analysis of
+    a near-duplicate clause found in the similarity index (marked "Reused"). None otherwise.
+    """
+    cached = analysis_cache.get(clause, model_manager.models)
+    if cached:
+        return {**cached, "Clause ID": clause_id, "Contract Clause": clause, "Analysis Source": "Cache"}
+    match = similarity_index.lookup(clause) if similarity_index is not None else None
+    if match is None:
+        return None
+    similarity, prior = match
+    result = _normalize_one({k: prior.get(k) for k in REUSED_FIELDS}, clause, clause_id)
+    result["Clause Identification"] = (
+        f"Reused from a {similarity:.0%} similar clause analyzed earlier. {result['Clause Identification']}"
+    )
+    result["Analysis Source"] = "Reused"
+    metrics.incr("similarity_reused")
+    return result
 
-    for res in results:
-        if res["Risk Level"] == "Unknown" or res["Regulation"] == "Unknown":
-            failed.append(res)
-        else:
-            final_results.append(res)
 
-    if failed and retries > 0:
-        print(f"Retrying {len(failed)} failed clauses...")
-        retry_clauses = [f["Contract Clause"] for f in failed if is_valid_clause(f["Contract Clause"])]
-        retried = analyze_batch(retry_clauses, start_id=failed[0]["Clause ID"])
-        final_results.extend(retried)
+def analyze_batch(clauses, start_id=1, retries=3, timeout=30, use_cache=True, stream=False, on_clause=None,
+                  clause_ids=None, models=None, refresh=False, hedge=None, tuning=None):
+    """
+    Analyze one batch of clauses. Cached and near-duplicate clauses are served without
+    a model call; with `refresh=True` every clause goes to the model and the fresh
+    analyses replace the stored ones. Each clause result is passed to `on_clause` as
+    soon as it is known: served ones straight away, analyzed ones when the batch
+    finishes or, with `stream=True`, as soon as they are parsed from the streamed
+    completion. `clause_ids` gives explicit (possibly non-contiguous) IDs instead of
+    numbering from `start_id`. `models` restricts which models may answer; `hedge=False`
+    never sends a second request for a slow one. `tuning` is the (batch size,
+    concurrency) the batch's requests are recorded under by the autotuner.
+    """
+    if clause_ids is None:
+        # Keep only valid clauses (this makes results consistent)
+        clauses = [clean_clause_text(cl) for cl in clauses if is_valid_clause(cl)]
+        clause_ids = [start_id + i for i in range(len(clauses))]
     else:
-        final_results.extend(failed)
+        kept = [(cid, clean_clause_text(cl)) for cid, cl in zip(clause_ids, clauses) if is_valid_clause(cl)]
+        clause_ids = [cid for cid, _ in kept]
+        clauses = [cl for _, cl in kept]
+    if not clauses:
+        return []
+
+    # Serve repeated and near-duplicate clauses without a model call and only send the rest
+    results = []
+    missing = []
+    for cid, cl in zip(clause_ids, clauses):
+        prior = _prior_result(cl, cid) if use_cache and not refresh else None
+        if prior:
+            results.append(prior)
+            if on_clause:
+                on_clause(prior)
+        else:
+            missing.append((cid, cl))
+
+    if missing:
+        miss_ids = [cid for cid, _ in missing]
+        miss_clauses = [cl for _, cl in missing]
+        analyzed, model = _request_analysis(
+            miss_clauses, miss_ids, retries, timeout, stream=stream, on_clause=on_clause, models=models, hedge=hedge,
+            tuning=tuning,
+        )
+        if on_clause and not stream:
+            for res in analyzed:
+                if not is_failed_result(res):
+                    on_clause(res)
+        if use_cache and model:
+            done = [res for res in analyzed if not is_failed_result(res)]
+            analysis_cache.put_many([(res["Contract Clause"], res) for res in done], model)
+            if similarity_index is not None:
+                similarity_index.add_many(
+                    [(res["Contract Clause"], {k: res[k] for k in REUSED_FIELDS}) for res in done], model
+                )
+        results.extend(analyzed)
+
+    results.sort(key=lambda x: x["Clause ID"])
+    return results
 
-    final_results.sort(key=lambda x: x["Clause ID"])
-    return final_results
 
 # ---------------- Batch Wrapper ----------------
-def analyze_all_batches(clauses, start_id=1, batch_size=6, max_workers=3):
+def _map_batches(fn, batches, max_workers, progress_callback=None):
+    """Run `fn(*batch)` for every batch on up to `max_workers` threads; returns the flattened results."""
+    total = len(batches)
     results = []
-    for i in range(0, len(clauses), batch_size):
-        batch = clauses[i:i + batch_size]
-        batch_results = analyze_batch(batch, start_id=start_id + i)
-        batch_results = retry_failed_clauses(batch_results, retries=1)
-        results.extend(batch_results)
+
+    if max_workers is None or max_workers <= 1 or total <= 1:
+        for done, batch in enumerate(batches, start=1):
+            results.extend(fn(*batch))
+            if progress_callback:
+                progress_callback(done, total)
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, total)) as executor:
+            futures = [executor.submit(fn, *batch) for batch in batches]
+            for done, future in enumerate(as_completed(futures), start=1):
+                results.extend(future.result())
+                if progress_callback:
+                    progress_callback(done, total)
+    return results
+
+
+def _analyze_with_retries(batches, run_batch, run_retry, plan_retry, max_workers, progress_callback=None):
+    """First pass over `batches`, then per-clause retries of whatever failed; returns results sorted by Clause ID."""
+    first_pass = _map_batches(run_batch, batches, max_workers, progress_callback)
+
+    scheduler = RetryScheduler(run_retry, plan_retry, is_failed_result)
+    results = scheduler.add(first_pass)
+    if len(scheduler):
+        print(f"Retrying {len(scheduler)} failed clauses...")
+        with ThreadPoolExecutor(max_workers=max(1, max_workers or 1)) as executor:
+            results.extend(scheduler.run(executor))
+
+    results.sort(key=lambda x: x["Clause ID"])
+    return results
+
+
+def _prescreen(pending):
+    """
+    Split `(clause_id, clause)` pairs into pre-screened Low results for non-substantive
+    chunks and the pairs that still need a model. Counts the LLM calls avoided.
+    """
+    if prescreener is None or not pending:
+        return [], pending
+    results, remaining = [], []
+    for cid, cl in pending:
+        screen = prescreener.screen(cl)
+        if screen["substantive"]:
+            remaining.append((cid, cl))
+            continue
+        result = _normalize_one({
+            "Regulation": ", ".join(screen["regulations"]) or "None",
+            "Risk Level": "Low",
+            "Risk Score": "0%",
+            "Clause Identification": f"Non-substantive {screen['kind']}; scored locally without a model call.",
+        }, cl, cid)
+        result["Analysis Source"] = "Pre-screen"
+        results.append(result)
+
+    if results:
+        def calls(pairs):
+            return len(plan_batches_by_id([cl for _, cl in pairs], [cid for cid, _ in pairs],
+                                          models=model_manager.models, prompt_tokens=PROMPT_TOKENS))
+        metrics.incr("prescreen_skipped", len(results))
+        metrics.incr("prescreen_calls_avoided", calls(pending) - calls(remaining))
+    metrics.incr("prescreen_checked", len(pending))
+    return results, remaining
+
+
+def _by_risk(pending):
+    """`(clause_id, clause)` pairs ordered by their local risk prior, riskiest first (stable)."""
+    return sorted(pending, key=lambda pair: -risk_scorer.risk_prior(pair[1]))
+
+
+def _numbered(clauses, start_id, clause_ids):
+    """`(clause_id, cleaned clause)` pairs for the valid clauses."""
+    if clause_ids is None:
+        clause_ids = range(start_id, start_id + len(clauses))
+    return [(cid, clean_clause_text(cl)) for cid, cl in zip(clause_ids, clauses) if is_valid_clause(cl)]
+
+
+def _resume(pending, journal):
+    """Split `(clause_id, clause)` pairs into results already in the run journal and the rest."""
+    if journal is None:
+        return [], pending
+    done = {cid: res for cid, res in journal.completed().items() if not is_failed_result(res)}
+    resumed = [done[cid] for cid, _ in pending if cid in done]
+    metrics.incr("journal_resumed", len(resumed))
+    return resumed, [(cid, cl) for cid, cl in pending if cid not in done]
+
+
+def open_run_journal(clauses, *options, start_id=1):
+    """
+    Journal for analyzing `clauses` (numbered from `start_id`) under the current prompt.
+    The run ID is derived from the clause texts, so restarting the same contract finds
+    the same journal; `options` tell apart runs of the same clauses in different modes.
+    The journal is complete once every valid clause has a result.
+    """
+    digest = hashlib.sha256("\x00".join(clean_clause_text(cl) for cl in clauses).encode("utf-8")).hexdigest()
+    return RunJournal(RUN_JOURNAL_DIR, run_id(digest, PROMPT_VERSION, *options), ttl_seconds=RUN_JOURNAL_TTL_SECONDS,
+                      clause_ids=[cid for cid, _ in _numbered(clauses, start_id, None)])
+
+
+def _journaled(run_batch, journal):
+    """Wrap a batch function so every batch's successful results are appended to the run journal."""
+    if journal is None:
+        return run_batch
+
+    def run(batch, batch_ids):
+        results = run_batch(batch, batch_ids)
+        journal.append([res for res in results if not is_failed_result(res)])
+        return results
+    return run
+
+
+# analysis runs in progress in this process (contracts in parallel, app sessions): the
+# autotuner's concurrency is what the whole process has in flight, shared between them
+_active_runs = 0
+_runs_lock = threading.Lock()
+_in_run = threading.local()
+
+
+def _counted_run(fn):
+    """Count calls of `fn` as analysis runs while they last (a run started inside another one is not counted)."""
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        global _active_runs
+        if getattr(_in_run, "active", False):
+            return fn(*args, **kwargs)
+        with _runs_lock:
+            _active_runs += 1
+        _in_run.active = True
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _in_run.active = False
+            with _runs_lock:
+                _active_runs -= 1
+    return run
+
+
+def _runs():
+    with _runs_lock:
+        return max(1, _active_runs)
+
+
+def batch_settings(models, max_workers=None):
+    """
+    (clauses per batch, concurrent batches) for a run on `models`. A tuned profile's
+    concurrency is for the whole process and is split between the runs in progress;
+    without one, each run gets ANALYSIS_CONCURRENCY. An explicit `max_workers` wins.
+    """
+    tuned = autotuner.settings(models) if autotuner else None
+    if tuned:
+        batch_size, workers = tuned[0], max(1, tuned[1] // _runs())
+    else:
+        batch_size, workers = PLANNER_MAX_CLAUSES, ANALYSIS_CONCURRENCY
+    return batch_size, workers if max_workers is None else max_workers
+
+
+def _tuning_key(batch_size, concurrency):
+    """
+    What the requests of a run are recorded under by the autotuner: its batch size and
+    the concurrency of the whole process, or None when the autotuner is off.
+    """
+    return (batch_size, concurrency * _runs()) if autotuner is not None else None
+
+
+@_counted_run
+def analyze_all_batches(clauses, start_id=1, batch_size=None, max_workers=None, progress_callback=None,
+                        stream=False, on_clause=None, cascade=None, clause_ids=None, refresh=False, journal=None,
+                        priority=None):
+    """
+    Analyze clauses in batches, running up to `max_workers` batches concurrently.
+    Clause IDs are `start_id` + position, or the explicit `clause_ids` (one per clause);
+    chunks that are not valid clauses are dropped and non-substantive ones are scored
+    by the local pre-screener without a model call.
+    Batches are sized by the token-budget planner unless a fixed `batch_size` is given;
+    the planner's clause cap and, unless given, `max_workers` come from the autotuner
+    profile, which also records every request of the run.
+    Clauses that still fail are retried by their own Clause IDs with jittered
+    exponential backoff, regrouped into full batches across the original ones.
+    Results are returned sorted by Clause ID. `progress_callback(done, total)` is
+    called after each first-pass batch finishes. `on_clause(result)` is called (from
+    worker threads) for each clause as soon as its result is known, see analyze_batch.
+    With `priority=True` (default: RISK_PRIORITY_ENABLED) clauses are batched and
+    dispatched in order of the pre-screener's local risk prior, so likely High-risk
+    clauses are analyzed, and reach `on_clause`, first.
+    With `cascade=True` (default: CASCADE_ENABLED) the work is done by analyze_cascade.
+    `refresh=True` bypasses the analysis cache and similarity index (see analyze_batch).
+    With a `journal` (RunJournal) every finished batch is journaled, clauses already in
+    the journal are not analyzed again (unless `refresh=True`), and the journal is
+    compacted at the end.
+    """
+    if CASCADE_ENABLED if cascade is None else cascade:
+        results, _ = analyze_cascade(clauses, start_id, max_workers, progress_callback, stream, on_clause,
+                                     clause_ids=clause_ids, journal=journal, priority=priority)
+        return results
+
+    resumed, pending = _resume(_numbered(clauses, start_id, clause_ids), None if refresh else journal)
+    results, pending = _prescreen(pending)
+    if journal is not None:
+        journal.append(results)
+    results.extend(resumed)
+    if on_clause:
+        for res in results:
+            on_clause(res)
+
+    if RISK_PRIORITY_ENABLED if priority is None else priority:
+        pending = _by_risk(pending)
+    texts = [cl for _, cl in pending]
+    ids = [cid for cid, _ in pending]
+    max_clauses, max_workers = batch_settings(model_manager.models, max_workers)
+    if batch_size:
+        max_clauses = batch_size
+        batches = [(texts[i:i + batch_size], ids[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+    else:
+        batches = plan_batches_by_id(texts, ids, models=model_manager.models, prompt_tokens=PROMPT_TOKENS,
+                                     max_clauses=max_clauses)
+
+    tuning = _tuning_key(max_clauses, max_workers)
+
+    def run_batch(batch, batch_ids):
+        return analyze_batch(batch, clause_ids=batch_ids, stream=stream, on_clause=on_clause, refresh=refresh,
+                             tuning=tuning)
+
+    def plan_retry(retry_clauses, retry_ids):
+        return plan_batches_by_id(retry_clauses, retry_ids, models=model_manager.models, prompt_tokens=PROMPT_TOKENS,
+                                  max_clauses=max_clauses)
+
+    run_batch = _journaled(run_batch, journal)
+    results.extend(_analyze_with_retries(batches, run_batch, run_batch, plan_retry, max_workers, progress_callback))
+    results.sort(key=lambda x: x["Clause ID"])
+    if journal is not None:
+        journal.compact(results)
+    if autotuner is not None:
+        autotuner.save()
     return results
+
+
+def analyze_iter(clauses, **kwargs):
+    """
+    Run analyze_all_batches (`kwargs` are passed through) on a background thread and
+    yield clause results as they become available, riskiest batches first when
+    priority scheduling is on. A clause whose final result differs from the one
+    yielded earlier (or that was never yielded, e.g. after failing every retry) is
+    yielded again at the end, so the last result per Clause ID is the final one.
+    Errors in the run are re-raised from the iterator.
+    """
+    finished = object()
+    arrived = queue.Queue()
+    outcome = {}
+
+    def run():
+        try:
+            outcome["results"] = analyze_all_batches(clauses, on_clause=arrived.put, **kwargs)
+        except BaseException as exc:  # re-raised in the consumer
+            outcome["error"] = exc
+        finally:
+            arrived.put(finished)
+
+    worker = threading.Thread(target=run, name="analyze-iter", daemon=True)
+    worker.start()
+    emitted = {}
+    while True:
+        res = arrived.get()
+        if res is finished:
+            break
+        emitted[res["Clause ID"]] = res
+        yield res
+    worker.join()
+    if "error" in outcome:
+        raise outcome["error"]
+    for res in outcome["results"]:
+        if emitted.get(res["Clause ID"]) != res:
+            yield res
+
+
+@_counted_run
+def analyze_within_budget(clauses, clause_ids, max_calls, max_workers=None):
+    """
+    Re-analyze clauses (in the given order, bypassing cache and similarity index) with
+    at most `max_calls` model requests. Non-substantive chunks are scored by the
+    pre-screener for free; the rest are packed into batches in order and only the first
+    `max_calls` batches are sent, each as one attempt without hedging or retry rounds,
+    so every batch costs exactly one call. Returns (results, batches sent); clauses not
+    sent are left out and those whose request failed come back as failed results.
+    """
+    results, pending = _prescreen(_numbered(clauses, 1, clause_ids))
+    max_clauses, max_workers = batch_settings(model_manager.models, max_workers)
+    batches = plan_batches_by_id([cl for _, cl in pending], [cid for cid, _ in pending],
+                                 models=model_manager.models, prompt_tokens=PROMPT_TOKENS,
+                                 max_clauses=max_clauses)[:max(0, max_calls)]
+
+    tuning = _tuning_key(max_clauses, max_workers)
+
+    def run_batch(batch, batch_ids):
+        return analyze_batch(batch, clause_ids=batch_ids, retries=1, refresh=True, hedge=False, tuning=tuning)
+
+    results.extend(_map_batches(run_batch, batches, max_workers))
+    results.sort(key=lambda x: x["Clause ID"])
+    if autotuner is not None:
+        autotuner.save()
+    return results, len(batches)
+
+
+# ---------------- Cascade Triage ----------------
+def _triage_confidence(value) -> int:
+    """Confidence as an integer percentage; accepts 0-1 fractions and "85%"-style strings."""
+    match = re.search(r"\d+(?:\.\d+)?", str(value if value is not None else ""))
+    if not match:
+        return 0
+    val = float(match.group(0))
+    if val <= 1 and "." in match.group(0):
+        val *= 100
+    return int(max(0, min(100, val)))
+
+
+def _triage_batch(pending, retries=2, timeout=30):
+    """
+    Rate `(clause_id, clause)` pairs with the fast triage model.
+    Returns {clause_id: (risk_level, risk_score, confidence)}; clauses the model
+    could not rate are left out, so the caller escalates them.
+    """
+    pending_ids = [cid for cid, _ in pending]
+    prompt = TRIAGE_PROMPT_PREFIX + _clauses_json(
+        [{"Clause ID": cid, "Contract Clause": cl} for cid, cl in pending]
+    ) + "\n"
+    messages = [
+        {"role": "system", "content": TRIAGE_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+    estimated_tokens = TRIAGE_PROMPT_TOKENS + sum(estimate_input_tokens(cl) + TRIAGE_OUTPUT_TOKENS for _, cl in pending)
+
+    def max_tokens(model):
+        return min(model_limits(model)["max_output"], math.ceil(len(pending) * TRIAGE_OUTPUT_TOKENS * SAFETY_FACTOR) + 64)
+
+    def parse(content):
+        triage = {}
+        for cid, ai_dict in _match_parsed(_parse_objects(content), pending_ids).items():
+            if not isinstance(ai_dict, dict):
+                continue
+            level = normalize_risk_level(ai_dict.get("Risk Level"))
+            if level != "Unknown":
+                triage[cid] = (
+                    level,
+                    normalize_risk_score(ai_dict.get("Risk Score")),
+                    _triage_confidence(ai_dict.get("Confidence")),
+                )
+        return triage
+
+    metrics.incr("cascade_triage_calls")
+    triage, _ = _json_request(messages, parse, estimated_tokens, max_tokens, retries, timeout,
+                              models=[CASCADE_TRIAGE_MODEL])
+    return triage or {}
+
+
+def _triaged_result(clause, clause_id, risk_score, confidence):
+    """Full-schema result for a clause the triage model rated Low with enough confidence."""
+    result = _normalize_one({
+        "Regulation": "None",
+        "Risk Level": "Low",
+        "Risk Score": risk_score,
+        "Clause Identification": (
+            f"Rated Low risk with {confidence}% confidence by the triage model; not escalated for full analysis."
+        ),
+    }, clause, clause_id)
+    result["Analysis Source"] = "Triage"
+    return result
+
+
+def _waves(batches, max_workers):
+    return math.ceil(batches / max(1, max_workers or 1))
+
+
+@_counted_run
+def analyze_cascade(clauses, start_id=1, max_workers=None, progress_callback=None, stream=False, on_clause=None,
+                    clause_ids=None, journal=None, priority=None):
+    """
+    Two-tier analysis. The triage model (CASCADE_TRIAGE_MODEL) rates every uncached
+    clause; clauses it rates Medium/High, rates below CASCADE_MIN_CONFIDENCE or fails
+    to rate are escalated to the large models in CASCADE_ESCALATION_MODELS for the
+    full assessment and regulation mapping. Clause IDs are `start_id` + position (or
+    the explicit `clause_ids`); non-substantive chunks are scored by the local
+    pre-screener before triage. A `journal` and `priority` work as in
+    analyze_all_batches; with priority on, escalations are ordered by triage score.
+
+    Returns (results, report). The report compares first-pass calls, estimated
+    tokens and wall-clock time with sending every uncached clause through the
+    single-tier path; the single-tier time is extrapolated from the measured
+    escalation batches.
+    """
+    started = time.perf_counter()
+    max_clauses, max_workers = batch_settings(CASCADE_ESCALATION_MODELS, max_workers)
+    resumed, pending = _resume(_numbered(clauses, start_id, clause_ids), journal)
+    screened, substantive = _prescreen(pending)
+    if journal is not None:
+        journal.append(screened)
+
+    results = {}
+    for res in screened + resumed:
+        results[res["Clause ID"]] = res
+        if on_clause:
+            on_clause(res)
+    misses = []
+    for cid, cl in substantive:
+        prior = _prior_result(cl, cid)
+        if prior:
+            results[cid] = prior
+            if on_clause:
+                on_clause(prior)
+        else:
+            misses.append((cid, cl))
+    priority = RISK_PRIORITY_ENABLED if priority is None else priority
+    if priority:
+        misses = _by_risk(misses)
+
+    # ---- tier 1: triage every miss with the fast model ----
+    triage_batches = [(misses[i:i + CASCADE_TRIAGE_BATCH_SIZE],) for i in range(0, len(misses), CASCADE_TRIAGE_BATCH_SIZE)]
+    triage = dict(_map_batches(lambda part: list(_triage_batch(part).items()), triage_batches, max_workers, progress_callback))
+    triage_seconds = time.perf_counter() - started
+
+    escalate = []
+    for cid, cl in misses:
+        level, score, confidence = triage.get(cid, ("Unknown", "0%", 0))
+        if level == "Low" and confidence >= CASCADE_MIN_CONFIDENCE:
+            results[cid] = _triaged_result(cl, cid, score, confidence)
+            if on_clause:
+                on_clause(results[cid])
+        else:
+            escalate.append((cid, cl))
+    if priority:
+        # stable, so equal triage scores keep the local risk-prior order
+        escalate.sort(key=lambda pair: -int(triage.get(pair[0], ("", "0%", 0))[1].rstrip("%")))
+    if journal is not None:
+        journal.append([results[cid] for cid, _ in misses if cid in results])
+
+    # ---- tier 2: full assessment of risky or uncertain clauses by the large models ----
+    escalation_started = time.perf_counter()
+    esc_clauses = [cl for _, cl in escalate]
+    esc_ids = [cid for cid, _ in escalate]
+
+    tuning = _tuning_key(max_clauses, max_workers)
+
+    def run_escalation(batch, batch_ids):
+        return analyze_batch(batch, clause_ids=batch_ids, stream=stream, on_clause=on_clause,
+                             models=CASCADE_ESCALATION_MODELS, tuning=tuning)
+
+    def plan_escalation(batch_clauses, batch_ids):
+        return plan_batches_by_id(batch_clauses, batch_ids, models=CASCADE_ESCALATION_MODELS,
+                                  prompt_tokens=PROMPT_TOKENS, max_clauses=max_clauses)
+
+    escalation_batches = plan_escalation(esc_clauses, esc_ids)
+    run_escalation = _journaled(run_escalation, journal)
+    for res in _analyze_with_retries(escalation_batches, run_escalation, run_escalation, plan_escalation,
+                                     max_workers, progress_callback):
+        results[res["Clause ID"]] = res
+    escalation_seconds = time.perf_counter() - escalation_started
+    elapsed = time.perf_counter() - started
+
+    # ---- savings against sending every miss through the single-tier path ----
+    miss_clauses = [cl for _, cl in misses]
+    single_batches = plan_batches_by_id(miss_clauses, [cid for cid, _ in misses],
+                                        models=model_manager.models, prompt_tokens=PROMPT_TOKENS,
+                                        max_clauses=batch_settings(model_manager.models)[0])
+    if escalation_batches:
+        seconds_per_wave = escalation_seconds / _waves(len(escalation_batches), max_workers)
+    else:
+        seconds_per_wave = model_manager.latency_percentile(0.5) or DEFAULT_LATENCY_PRIOR
+    single = {
+        "calls": len(single_batches),
+        "tokens": sum(estimate_request_tokens(batch, PROMPT_TOKENS) for batch, _ in single_batches),
+        "seconds": seconds_per_wave * _waves(len(single_batches), max_workers),
+    }
+    cascade = {
+        "calls": len(triage_batches) + len(escalation_batches),
+        "tokens": (
+            sum(TRIAGE_PROMPT_TOKENS + sum(estimate_input_tokens(cl) + TRIAGE_OUTPUT_TOKENS for _, cl in part)
+                for (part,) in triage_batches)
+            + sum(estimate_request_tokens(batch, PROMPT_TOKENS) for batch, _ in escalation_batches)
+        ),
+        "seconds": elapsed,
+    }
+    reused = sum(1 for cid, _ in substantive if results[cid]["Analysis Source"] == "Reused")
+    report = {
+        "clauses": len(pending) + len(resumed),
+        "resumed": len(resumed),
+        "prescreened": len(screened),
+        "cached": len(substantive) - len(misses) - reused,
+        "reused": reused,
+        "triaged": len(misses),
+        "escalated": len(escalate),
+        "triage_seconds": round(triage_seconds, 2),
+        "escalation_seconds": round(escalation_seconds, 2),
+    }
+    for key in ("calls", "tokens", "seconds"):
+        report[key] = {
+            "cascade": round(cascade[key], 2),
+            "single_tier": round(single[key], 2),
+            "saved": round(single[key] - cascade[key], 2),
+        }
+
+    metrics.incr("cascade_triaged", len(misses))
+    metrics.incr("cascade_escalated", len(escalate))
+    metrics.incr("cascade_calls_saved", report["calls"]["saved"])
+    metrics.incr("cascade_tokens_saved", report["tokens"]["saved"])
+
+    results = sorted(results.values(), key=lambda x: x["Clause ID"])
+    if journal is not None:
+        journal.compact(results)
+    if autotuner is not None:
+        autotuner.save()
+    return results, report
+
+
+def format_cascade_report(report) -> str:
+    lines = [
+        f"Cascade: {report['triaged']} clauses triaged, {report['escalated']} escalated, "
+        f"{report['cached']} cached, {report['reused']} reused, {report['prescreened']} pre-screened",
+    ]
+    for key, unit in (("calls", ""), ("tokens", ""), ("seconds", "s")):
+        r = report[key]
+        lines.append(f"  {key}: {r['cascade']}{unit} vs {r['single_tier']}{unit} single-tier (saved {r['saved']}{unit})")
+    return "\n".join(lines)
+
+
+# ---------------- On-Demand Rewrites ----------------
+def needs_rewrite(res, levels=("High",)) -> bool:
+    return res.get("Risk Level") in levels and res.get("AI-Modified Clause", NO_REWRITE) == NO_REWRITE
+
+
+def _merge_rewrite(res, ai_dict):
+    """`res` with the rewrite fields of `ai_dict` normalized in (AI-Modified Risk Level is inferred if missing)."""
+    assessed = {k: v for k, v in res.items() if k in ALLOWED_FIELDS and k not in REWRITE_FIELDS}
+    rewrite = {k: ai_dict[k] for k in REWRITE_FIELDS if k in ai_dict}
+    merged = _normalize_one({**assessed, **rewrite}, res["Contract Clause"], res["Clause ID"])
+    return {**res, **{k: merged[k] for k in REWRITE_FIELDS}}
+
+
+def _rewrite_batch(batch, retries=3, timeout=30):
+    """Rewrite one batch of assessed results; results the model did not rewrite are returned unchanged."""
+    ids = [res["Clause ID"] for res in batch]
+    texts = [res["Contract Clause"] for res in batch]
+    prompt = REWRITE_PROMPT_PREFIX + _clauses_json([
+        {k: res.get(k) for k in ("Clause ID", "Contract Clause", "Regulation", "Risk Level", "Clause Identification")}
+        for res in batch
+    ]) + "\n"
+    messages = [
+        {"role": "system", "content": REWRITE_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+    def parse(content):
+        by_id = _match_parsed(_parse_objects(content), ids)
+        return {cid: d for cid, d in by_id.items() if isinstance(d, dict) and d.get("AI-Modified Clause")}
+
+    metrics.incr("rewrite_calls")
+    rewrites, model = _json_request(
+        messages,
+        parse,
+        estimate_request_tokens(texts, REWRITE_PROMPT_TOKENS, rewrite=True),
+        lambda m: max_tokens_for(texts, m, REWRITE_PROMPT_TOKENS, rewrite=True),
+        retries,
+        timeout,
+    )
+    rewritten = [_merge_rewrite(res, rewrites[res["Clause ID"]]) if rewrites and res["Clause ID"] in rewrites else res
+                 for res in batch]
+    done = [res for res in rewritten if res["AI-Modified Clause"] != NO_REWRITE]
+    metrics.incr("rewrite_clauses", len(done))
+    if model:
+        rewrite_cache.put_many([(res["Contract Clause"], {k: res[k] for k in REWRITE_FIELDS}) for res in done], model)
+    return rewritten
+
+
+def rewrite_clauses(results, max_workers=None, levels=("High",), progress_callback=None):
+    """
+    Generate "AI-Modified Clause", feedback and the re-assessed risk level for results
+    whose Risk Level is in `levels` and that have no rewrite yet. The assessment pass
+    leaves these fields empty; this pass runs only when a rewrite is actually needed.
+    Batches run concurrently on up to `max_workers` threads (default: as batch_settings
+    gives for the analysis) and rewrites are cached by clause text. Returns a new list in the same order; other
+    results are unchanged.
+    """
+    max_workers = batch_settings(model_manager.models, max_workers)[1]
+    out = {res["Clause ID"]: res for res in results}
+    pending = []
+    for res in results:
+        if not needs_rewrite(res, levels):
+            continue
+        cached = rewrite_cache.get(res["Contract Clause"], model_manager.models)
+        if cached:
+            out[res["Clause ID"]] = {**res, **cached}
+        else:
+            pending.append(res)
+
+    by_id = {res["Clause ID"]: res for res in pending}
+    batches = plan_batches_by_id(
+        [res["Contract Clause"] for res in pending], list(by_id),
+        models=model_manager.models, prompt_tokens=REWRITE_PROMPT_TOKENS, rewrite=True,
+    )
+    rewritten = _map_batches(
+        lambda texts, ids: _rewrite_batch([by_id[cid] for cid in ids]),
+        batches, max_workers, progress_callback,
+    )
+    for res in rewritten:
+        out[res["Clause ID"]] = res
+    return [out[res["Clause ID"]] for res in results]
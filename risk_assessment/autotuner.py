@@ -0,0 +1,252 @@
+import json
+import math
+import os
+import threading
+import time
+
+from config import DEFAULT_RATE_LIMITS, RATE_LIMITS
+from risk_assessment.backends import FakeBackend
+from risk_assessment.batch_planner import estimate_request_tokens, max_batch_clauses, max_tokens_for, plan_batches_by_id
+
+# settings the offline tuner searches (batch sizes up to what the planner can pack for the
+# model); live runs are recorded under whatever they used
+BATCH_SIZES = (2, 4, 6, 8, 12, 16, 24, 32)
+CONCURRENCY_LEVELS = (1, 2, 3, 4, 6, 8)
+# a setting's totals are halved past this many requests, so the profile follows the service
+WINDOW_REQUESTS = 200
+# a neighbour must beat the current setting by this much for the search to move
+MIN_GAIN = 0.02
+
+_FIELDS = ("requests", "clauses", "failed", "seconds", "tokens")
+
+
+def _key(batch_size, concurrency):
+    return f"{batch_size}x{concurrency}"
+
+
+# ---------------- Autotuner ----------------
+class Autotuner:
+    """
+    Latency, token and parse-failure profile per (model, batch size, concurrency), kept
+    in a JSON file, and the setting with the best sustainable throughput per model.
+
+    A setting's throughput is the clauses per second its concurrent requests deliver
+    (`concurrency` x successful clauses / request seconds), capped by what the model's
+    requests-per-minute and tokens-per-minute limits allow. Settings whose failure rate
+    exceeds `max_failure_rate`, or with fewer than `min_requests` requests, are not
+    chosen; among settings within MIN_GAIN of the best, the lowest concurrency and then
+    the smallest batch win. Concurrency is what the whole process has in flight, so
+    parallel runs record (and share) one setting.
+    """
+
+    def __init__(self, path, max_failure_rate=0.05, min_requests=5, default_batch_size=12, default_concurrency=3):
+        self.path = path
+        self.max_failure_rate = max_failure_rate
+        self.min_requests = min_requests
+        self.default_batch_size = default_batch_size
+        self.default_concurrency = default_concurrency
+        self._lock = threading.Lock()
+        self._profile = None
+        self._dirty = False
+
+    # loaded lazily so importing the analyzer never touches the disk
+    def _load(self):
+        if self._profile is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._profile = json.load(f).get("models", {})
+            except (OSError, ValueError, AttributeError):
+                self._profile = {}
+        return self._profile
+
+    def record(self, model, batch_size, concurrency, seconds, clauses, failed, tokens):
+        """One request of `clauses` clauses made under (batch_size, concurrency); `failed` did not parse."""
+        with self._lock:
+            entry = self._load().setdefault(model, {}).setdefault(
+                _key(batch_size, concurrency), dict.fromkeys(_FIELDS, 0)
+            )
+            for field, value in zip(_FIELDS, (1, clauses, failed, seconds, tokens)):
+                entry[field] += value
+            if entry["requests"] > WINDOW_REQUESTS:
+                for field in _FIELDS:
+                    entry[field] /= 2
+            self._dirty = True
+
+    @staticmethod
+    def _throughput(model, concurrency, entry):
+        good = entry["clauses"] - entry["failed"]
+        if good <= 0 or entry["seconds"] <= 0:
+            return 0.0
+        limits = RATE_LIMITS.get(model, DEFAULT_RATE_LIMITS)
+        return min(
+            concurrency * good / entry["seconds"],
+            limits["rpm"] / 60 * good / entry["requests"],
+            limits["tpm"] / 60 * good / entry["tokens"] if entry["tokens"] else math.inf,
+        )
+
+    def summary(self, model):
+        """Per-setting statistics for `model`, best throughput first."""
+        with self._lock:
+            entries = dict(self._load().get(model, {}))
+        rows = []
+        for key, entry in entries.items():
+            batch_size, concurrency = (int(part) for part in key.split("x"))
+            requests = entry["requests"]
+            rows.append({
+                "batch_size": batch_size,
+                "concurrency": concurrency,
+                "requests": round(requests, 1),
+                "failure_rate": round(entry["failed"] / entry["clauses"], 3) if entry["clauses"] else 0.0,
+                "mean_latency": round(entry["seconds"] / requests, 3) if requests else 0.0,
+                "tokens_per_request": round(entry["tokens"] / requests) if requests else 0,
+                "clauses_per_second": round(self._throughput(model, concurrency, entry), 3),
+            })
+        rows.sort(key=lambda row: row["clauses_per_second"], reverse=True)
+        return rows
+
+    def score(self, row):
+        """Throughput of an eligible setting (a summary row), 0 for one that is not."""
+        if row["requests"] < self.min_requests or row["failure_rate"] > self.max_failure_rate:
+            return 0.0
+        return row["clauses_per_second"]
+
+    def best(self, model):
+        """The summary row of the setting to use for `model`, or None without an eligible one."""
+        rows = [row for row in self.summary(model) if self.score(row) > 0]
+        if not rows:
+            return None
+        top = max(self.score(row) for row in rows)
+        close = [row for row in rows if self.score(row) >= top * (1 - MIN_GAIN)]
+        return min(close, key=lambda row: (row["concurrency"], row["batch_size"]))
+
+    def settings(self, models):
+        """
+        (batch size, concurrency) for a run that may route to any of `models`: the smallest
+        of their tuned values, since any model may get any batch; None if none is tuned.
+        """
+        tuned = [best for best in (self.best(m) for m in models) if best]
+        if not tuned:
+            return None
+        return min(row["batch_size"] for row in tuned), min(row["concurrency"] for row in tuned)
+
+    def clear(self, model=None):
+        with self._lock:
+            if model is None:
+                self._load().clear()
+            else:
+                self._load().pop(model, None)
+            self._dirty = True
+
+    def save(self):
+        """Write the profile if anything was recorded since the last save."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps({"models": self._load()}, indent=1, sort_keys=True)
+            self._dirty = False
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
+
+# ---------------- Offline Tuning ----------------
+def _request(analyzer, backend, model, batch, batch_ids):
+    """
+    One assessment request for `batch` sent straight to `backend`, bypassing the
+    analyzer's client, rate limiter, hedging, caches and model statistics.
+    Returns (seconds, failed clauses, tokens); an error fails the whole batch.
+    """
+    estimated_tokens = estimate_request_tokens(batch, analyzer.PROMPT_TOKENS)
+    started = time.perf_counter()
+    try:
+        response = backend.chat.completions.create(
+            model=model,
+            messages=analyzer.analysis_messages(list(zip(batch_ids, batch))),
+            max_tokens=max_tokens_for(batch, model, analyzer.PROMPT_TOKENS),
+            temperature=0,
+            timeout=30,
+        )
+        results = analyzer.safe_json_parse(response.choices[0].message.content, batch, batch_ids[0], batch_ids)
+    except Exception:
+        return time.perf_counter() - started, len(batch), estimated_tokens
+    tokens = getattr(getattr(response, "usage", None), "total_tokens", None) or estimated_tokens
+    return time.perf_counter() - started, sum(1 for res in results if analyzer.is_failed_result(res)), tokens
+
+
+def _trial(analyzer, backend, tuner, clauses, model, batch_size, concurrency, trial_clauses):
+    """Send enough copies of `clauses` for several waves of requests under one setting, recording into `tuner`."""
+    n = max(trial_clauses, batch_size * concurrency * 3, batch_size * tuner.min_requests)
+    texts = (clauses * math.ceil(n / len(clauses)))[:n]
+    batches = plan_batches_by_id(
+        texts, list(range(1, n + 1)), models=[model], prompt_tokens=analyzer.PROMPT_TOKENS, max_clauses=batch_size
+    )
+    # seconds as the real service would take them, for backends running faster than real time
+    time_scale = getattr(backend, "time_scale", 1.0) or 1.0
+
+    def run(batch, batch_ids):
+        seconds, failed, tokens = _request(analyzer, backend, model, batch, batch_ids)
+        tuner.record(model, batch_size, concurrency, seconds / time_scale, len(batch), failed, tokens)
+        return []
+
+    analyzer._map_batches(run, batches, concurrency)
+
+
+def tune_offline(clauses, models, tuner, backend=None, trial_clauses=96, log=print):
+    """
+    Hill-climb each model's (batch size, concurrency) over BATCH_SIZES x CONCURRENCY_LEVELS
+    against `backend` (default: a FakeBackend at 1/50 of real time), starting from the
+    defaults and moving to the best neighbouring setting while it is better by MIN_GAIN.
+    Batch sizes the planner cannot pack for the model (see max_batch_clauses) are left
+    out of the grid, as their trials would only measure smaller batches.
+    Requests go straight to `backend`, so analyses running meanwhile in the same process
+    are unaffected. Previous measurements of the models in `tuner` are discarded; the
+    profile is saved. Returns {model: best summary row or None}.
+    """
+    # imported here: analyze_clauses imports this module
+    from risk_assessment import analyze_clauses as analyzer
+
+    backend = backend or FakeBackend(time_scale=0.02)
+    clauses = [cl for cl in (analyzer.clean_clause_text(c) for c in clauses) if analyzer.is_valid_clause(cl)]
+    if not clauses:
+        raise ValueError("no valid clauses to tune on")
+
+    def nearest(grid, value):
+        return min(range(len(grid)), key=lambda i: abs(grid[i] - value))
+
+    chosen = {}
+    for model in models:
+        tuner.clear(model)
+        scores = {}
+        cap = max_batch_clauses([model])
+        batch_sizes = tuple(size for size in BATCH_SIZES if size <= cap) or (cap,)
+
+        def evaluate(i, j):
+            if (i, j) not in scores:
+                batch_size, concurrency = batch_sizes[i], CONCURRENCY_LEVELS[j]
+                _trial(analyzer, backend, tuner, clauses, model, batch_size, concurrency, trial_clauses)
+                row = next(r for r in tuner.summary(model)
+                           if (r["batch_size"], r["concurrency"]) == (batch_size, concurrency))
+                scores[i, j] = tuner.score(row)
+                log(f"  {model} batch {batch_size:>2} x {concurrency} concurrent: "
+                    f"{row['clauses_per_second']:.2f} clauses/s, {row['failure_rate']:.1%} failed, "
+                    f"{row['mean_latency']:.2f}s per request")
+            return scores[i, j]
+
+        current = (nearest(batch_sizes, tuner.default_batch_size),
+                   nearest(CONCURRENCY_LEVELS, tuner.default_concurrency))
+        while True:
+            here = evaluate(*current)
+            i, j = current
+            neighbours = [(i + di, j + dj) for di, dj in ((-1, 0), (1, 0), (0, -1), (0, 1))
+                          if 0 <= i + di < len(batch_sizes) and 0 <= j + dj < len(CONCURRENCY_LEVELS)]
+            step = max(neighbours, key=lambda n: evaluate(*n))
+            if scores[step] <= here * (1 + MIN_GAIN):
+                break
+            current = step
+        chosen[model] = tuner.best(model)
+    tuner.save()
+    return chosen
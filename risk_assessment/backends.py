@@ -0,0 +1,220 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+from groq import Groq
+
+from config import FAKE_LLM_OPTIONS, GROQ_API_KEY
+from risk_assessment.batch_planner import ASSESSMENT_OUTPUT_TOKENS, CHARS_PER_TOKEN, estimate_tokens
+
+# keywords the fake rates High / Medium; everything else is Low
+_HIGH_TERMS = ("indemnif", "unlimited", "personal data", "export", "sanction", "brib", "penalt")
+_MEDIUM_TERMS = ("terminat", "liab", "confidential", "breach", "warrant", "damages")
+
+
+def make_backend(name, **options):
+    """
+    Client for model requests, shaped like the Groq client (`client.chat.completions.create`):
+    "groq" for the Groq API, "fake" for a FakeBackend built with `options` (default:
+    config.FAKE_LLM_OPTIONS).
+    """
+    if name == "groq":
+        return Groq(api_key=GROQ_API_KEY)
+    if name == "fake":
+        return FakeBackend(**(options or FAKE_LLM_OPTIONS))
+    raise ValueError(f"unknown LLM backend {name!r} (expected 'groq' or 'fake')")
+
+
+class FakeAPIError(Exception):
+    """Injected API failure; `status_code` 429 is classified as a rate limit like the Groq error."""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# ---------------- Fake Backend ----------------
+class FakeBackend:
+    """
+    Deterministic local stand-in for the Groq client (streaming or not) that answers the
+    assessment, triage and rewrite prompts with JSON derived from the clause text.
+
+    Latency follows a simple serving model: `base_latency` plus `seconds_per_token` per
+    completion token, slowed by `contention` for every other request in flight and
+    multiplied by noise from `latency` ("constant", "lognormal" with sigma `jitter`,
+    "exponential", or a callable taking a random.Random). Sleeps are multiplied by
+    `time_scale` (0 answers instantly).
+
+    Faults are injected per request: `error_rate` (500), `rate_limit_rate` (429),
+    `truncate_rate` and `malformed_rate` (prose-wrapped or broken JSON). Completions
+    longer than `truncation_tokens` are also cut off with a probability growing with
+    their length, and always at `max_tokens`. Each request draws its randomness from
+    `seed` and the prompt (plus how often that prompt was seen), so runs are repeatable
+    whatever the thread scheduling. Token usage is reported like Groq's (on the last
+    chunk when streaming) and totalled per model in `usage`.
+    """
+
+    def __init__(self, seed=0, base_latency=0.35, seconds_per_token=0.004, contention=0.12, latency="lognormal",
+                 jitter=0.2, time_scale=1.0, error_rate=0.0, rate_limit_rate=0.0, truncate_rate=0.0,
+                 malformed_rate=0.0, truncation_tokens=2400):
+        self.seed = seed
+        self.base_latency = base_latency
+        self.seconds_per_token = seconds_per_token
+        self.contention = contention
+        self.latency = latency
+        self.jitter = jitter
+        self.time_scale = time_scale
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.truncate_rate = truncate_rate
+        self.malformed_rate = malformed_rate
+        self.truncation_tokens = truncation_tokens
+        self.calls = 0
+        self.faults = {"error": 0, "rate_limited": 0, "truncated": 0, "malformed": 0}
+        self.usage = {}
+        self._seen = {}
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        # Groq client shape
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, model, messages, max_tokens=None, temperature=0, timeout=None, stream=False, **kwargs):
+        prompt = messages[-1]["content"]
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        with self._lock:
+            self.calls += 1
+            attempt = self._seen[digest] = self._seen.get(digest, 0) + 1
+            self._in_flight += 1
+            in_flight = self._in_flight
+        rng = random.Random(f"{self.seed}:{digest}:{attempt}")
+
+        try:
+            items = json.loads(prompt.strip().rsplit("\n", 1)[-1])
+            content = json.dumps([self._answer(prompt, item) for item in items], ensure_ascii=False)
+            completion_tokens = estimate_tokens(content)
+            fault = self._fault(rng, completion_tokens)
+            if fault in ("error", "rate_limited"):
+                # failures come back quicker than answers
+                self._sleep(self.base_latency * self._noise(rng), in_flight)
+                self._count(fault)
+                if fault == "rate_limited":
+                    raise FakeAPIError(f"Rate limit reached for model `{model}` (fake backend)", 429)
+                raise FakeAPIError("Internal server error (fake backend)", 500)
+            if max_tokens and completion_tokens > max_tokens:
+                fault, content = "truncated", content[:max_tokens * CHARS_PER_TOKEN]
+            elif fault == "truncated":
+                content = content[:rng.randint(1, max(1, len(content) - 1))]
+            elif fault == "malformed":
+                content = self._malform(rng, content)
+            if fault:
+                self._count(fault)
+            completion_tokens = estimate_tokens(content)
+            self._sleep((self.base_latency + self.seconds_per_token * completion_tokens) * self._noise(rng), in_flight)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        with self._lock:
+            totals = self.usage.setdefault(model, {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            totals["requests"] += 1
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+        usage = SimpleNamespace(
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        )
+        if stream:
+            return self._chunks(content, usage)
+        message = SimpleNamespace(content=content)
+        finish_reason = "length" if fault == "truncated" else "stop"
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason=finish_reason)], usage=usage)
+
+    def total_tokens(self):
+        with self._lock:
+            return sum(t["prompt_tokens"] + t["completion_tokens"] for t in self.usage.values())
+
+    def _fault(self, rng, completion_tokens):
+        roll = rng.random()
+        for fault, rate in (("error", self.error_rate), ("rate_limited", self.rate_limit_rate),
+                            ("truncated", self.truncate_rate), ("malformed", self.malformed_rate)):
+            if roll < rate:
+                return fault
+            roll -= rate
+        if completion_tokens > self.truncation_tokens and rng.random() < min(
+            0.9, (completion_tokens - self.truncation_tokens) / (2 * self.truncation_tokens)
+        ):
+            return "truncated"
+        return None
+
+    def _count(self, fault):
+        with self._lock:
+            self.faults[fault] += 1
+
+    def _noise(self, rng):
+        if callable(self.latency):
+            return self.latency(rng)
+        if self.latency == "lognormal":
+            return rng.lognormvariate(0, self.jitter)
+        if self.latency == "exponential":
+            return rng.expovariate(1.0)
+        return 1.0
+
+    def _sleep(self, seconds, in_flight):
+        if self.time_scale > 0:
+            time.sleep(seconds * (1 + self.contention * (in_flight - 1)) * self.time_scale)
+
+    @staticmethod
+    def _malform(rng, content):
+        kind = rng.randrange(3)
+        if kind == 0:
+            # the array wrapped in prose and a code fence
+            return f"Here is the analysis you asked for:\n```json\n{content}\n```\nLet me know if you need more."
+        if kind == 1:
+            # a trailing comma and a missing closing bracket
+            return content[:-1] + ","
+        # Python-style quoting
+        return content.replace('"', "'")
+
+    @staticmethod
+    def _chunks(content, usage, size=24):
+        for i in range(0, len(content), size):
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + size]))])
+        # like Groq, the usage comes with a final chunk
+        yield SimpleNamespace(choices=[], x_groq=SimpleNamespace(usage=usage))
+
+    @staticmethod
+    def _answer(prompt, item):
+        if isinstance(item, list):
+            cid, clause = item
+        else:
+            cid, clause = item.get("Clause ID"), item.get("Contract Clause", "")
+        text = clause.lower()
+        level = "High" if any(t in text for t in _HIGH_TERMS) else "Medium" if any(t in text for t in _MEDIUM_TERMS) \
+            else "Low"
+        # stable pseudo-random score within the level's band
+        spread = int(hashlib.sha256(clause.encode("utf-8")).hexdigest()[:4], 16) % 20
+        score = {"High": 75, "Medium": 45, "Low": 10}[level] + spread
+        if "AI-Modified Clause" in prompt:
+            return {
+                "Clause ID": cid,
+                "Risk Level": level,
+                "Clause Feedback & Fix": "Narrow the obligation and cap the liability it creates.",
+                "AI-Modified Clause": f"{clause} Liability under this clause is capped at the fees paid in the "
+                                      "preceding twelve months.",
+                "AI-Modified Risk Level": "Medium" if level == "High" else "Low",
+            }
+        if "Triage" in prompt:
+            return {"Clause ID": cid, "Risk Level": level, "Risk Score": f"{score}%", "Confidence": 0.9}
+        # filler so the completion is about as long as a real assessment
+        words = ASSESSMENT_OUTPUT_TOKENS * CHARS_PER_TOKEN // len("compliance ") - 10
+        return {
+            "Clause ID": cid,
+            "Regulation": "GDPR" if "data" in text else "SOX",
+            "Risk Level": level,
+            "Risk Score": f"{score}%",
+            "Clause Identification": " ".join(["compliance"] * words),
+        }
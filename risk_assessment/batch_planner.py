@@ -0,0 +1,115 @@
+import math
+
+from config import MODEL_LIMITS, DEFAULT_MODEL_LIMITS, PLANNER_MAX_OUTPUT_TOKENS, PLANNER_MAX_CLAUSES
+
+# rough size heuristics for English legal text
+CHARS_PER_TOKEN = 4
+# assessment pass: JSON keys, ID, regulation, risk fields and a <=100-word identification per clause
+ASSESSMENT_OUTPUT_TOKENS = 200
+# rewrite pass: JSON keys, ID, risk level and a <=100-word feedback per clause...
+REWRITE_OVERHEAD_TOKENS = 180
+# ...plus an "AI-Modified Clause" of similar length to the original
+REWRITE_TEXT_MULTIPLIER = 1.2
+# rewrite requests also carry the clause's regulation and identification
+REWRITE_INPUT_TOKENS = 160
+# headroom so an estimate that runs a little short does not truncate the JSON array
+SAFETY_FACTOR = 1.25
+MIN_MAX_TOKENS = 512
+
+
+# ---------------- Token Estimates ----------------
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token)."""
+    return max(1, math.ceil(len(text or "") / CHARS_PER_TOKEN))
+
+
+def estimate_input_tokens(clause: str, rewrite=False) -> int:
+    # clause text plus its {"Clause ID": n, "Contract Clause": "..."} wrapper
+    return estimate_tokens(clause) + 12 + (REWRITE_INPUT_TOKENS if rewrite else 0)
+
+
+def estimate_output_tokens(clause: str, rewrite=False) -> int:
+    """Completion tokens for one clause in the assessment pass, or in the rewrite pass with `rewrite=True`."""
+    if rewrite:
+        return REWRITE_OVERHEAD_TOKENS + math.ceil(estimate_tokens(clause) * REWRITE_TEXT_MULTIPLIER)
+    return ASSESSMENT_OUTPUT_TOKENS
+
+
+def estimate_request_tokens(clauses, prompt_tokens=0, rewrite=False) -> int:
+    """Expected prompt + completion tokens of one request, for rate-limit accounting."""
+    return prompt_tokens + sum(
+        estimate_input_tokens(cl, rewrite) + estimate_output_tokens(cl, rewrite) for cl in clauses
+    )
+
+
+def model_limits(model: str) -> dict:
+    return MODEL_LIMITS.get(model, DEFAULT_MODEL_LIMITS)
+
+
+def _shared_limits(models):
+    """Most restrictive limits across `models`, so any model can take any planned batch."""
+    limits = [model_limits(m) for m in models] or [DEFAULT_MODEL_LIMITS]
+    return (
+        min(l["context"] for l in limits),
+        min(l["max_output"] for l in limits),
+    )
+
+
+# ---------------- Batch Planner ----------------
+def _pack(clauses, models, prompt_tokens, max_output_tokens, max_clauses, rewrite=False):
+    """Greedy in-order packing; returns lists of clause indexes."""
+    context, max_output = _shared_limits(models or list(MODEL_LIMITS))
+    output_budget = min(max_output, max_output_tokens)
+
+    groups, group = [], []
+    batch_in, batch_out = prompt_tokens, 0
+
+    for i, clause in enumerate(clauses):
+        clause_in = estimate_input_tokens(clause, rewrite)
+        clause_out = estimate_output_tokens(clause, rewrite)
+        # the request asks for at least MIN_MAX_TOKENS (see max_tokens_for), so that much must fit too
+        fits = (
+            len(group) < max_clauses
+            and (batch_out + clause_out) * SAFETY_FACTOR <= output_budget
+            and batch_in + clause_in + max((batch_out + clause_out) * SAFETY_FACTOR, MIN_MAX_TOKENS) <= context
+        )
+        if group and not fits:
+            groups.append(group)
+            group = []
+            batch_in, batch_out = prompt_tokens, 0
+        group.append(i)
+        batch_in += clause_in
+        batch_out += clause_out
+
+    if group:
+        groups.append(group)
+    return groups
+
+
+def plan_batches_by_id(clauses, clause_ids, models=None, prompt_tokens=0,
+                       max_output_tokens=PLANNER_MAX_OUTPUT_TOKENS, max_clauses=PLANNER_MAX_CLAUSES, rewrite=False):
+    """
+    Pack clauses (in the given order) into batches whose estimated prompt and completion
+    fit the context window and output cap of every model in `models`. `clause_ids` are
+    the clauses' (possibly non-contiguous) IDs; returns `(batch_clauses, batch_ids)`
+    tuples. `rewrite=True` sizes the batches for the rewrite pass.
+    """
+    groups = _pack(clauses, models, prompt_tokens, max_output_tokens, max_clauses, rewrite)
+    return [([clauses[i] for i in group], [clause_ids[i] for i in group]) for group in groups]
+
+
+def max_batch_clauses(models=None, max_output_tokens=PLANNER_MAX_OUTPUT_TOKENS) -> int:
+    """Most clauses the planner puts in one assessment batch for `models`, whatever its clause cap."""
+    _, max_output = _shared_limits(models or list(MODEL_LIMITS))
+    return max(1, int(min(max_output, max_output_tokens) // (ASSESSMENT_OUTPUT_TOKENS * SAFETY_FACTOR)))
+
+
+def max_tokens_for(clauses, model, prompt_tokens=0, rewrite=False) -> int:
+    """
+    Completion budget for one request: the batch's estimated output plus headroom, at
+    least MIN_MAX_TOKENS, within the model's output cap and what the context has left.
+    """
+    limits = model_limits(model)
+    wanted = math.ceil(sum(estimate_output_tokens(cl, rewrite) for cl in clauses) * SAFETY_FACTOR)
+    room = limits["context"] - prompt_tokens - sum(estimate_input_tokens(cl, rewrite) for cl in clauses)
+    return min(room, max(MIN_MAX_TOKENS, min(wanted, limits["max_output"])))
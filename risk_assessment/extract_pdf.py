@@ -1,27 +1,226 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+
 import PyPDF2
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
-def extract_clauses(pdf_path):
-    clauses = []
+from config import CLAUSE_SPLITTER, EXTRACTION_CACHE_DIR, EXTRACTION_CACHE_MAX_ENTRIES
+from risk_assessment import segmenter
+from risk_assessment.extraction_cache import ExtractionCache
+
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+SEPARATORS = ["\n\n", "\n", ".", ";"]
+MIN_CLAUSE_WORDS = 5
+SPLITTERS = ("structure", "recursive")
+
+# below this many pages, process start-up costs more than parallel extraction saves
+PARALLEL_MIN_PAGES = 40
+
+extraction_cache = ExtractionCache(EXTRACTION_CACHE_DIR, max_entries=EXTRACTION_CACHE_MAX_ENTRIES)
+
+
+def _make_splitter():
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        separators=SEPARATORS
+    )
+
+
+def splitter_config(splitter=None):
+    """Everything that changes the clause list for a given PDF; part of the extraction cache key."""
+    splitter = splitter or CLAUSE_SPLITTER
+    if splitter not in SPLITTERS:
+        raise ValueError(f"Unknown splitter '{splitter}', expected one of {SPLITTERS}")
+    if splitter == "structure":
+        return {
+            "splitter": splitter,
+            "version": segmenter.VERSION,
+            "min_words": segmenter.MIN_WORDS,
+            "max_chars": segmenter.MAX_CHARS,
+            "min_clause_words": MIN_CLAUSE_WORDS,
+        }
+    return {
+        "splitter": splitter,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "separators": SEPARATORS,
+        "min_clause_words": MIN_CLAUSE_WORDS,
+    }
+
+
+def _keep(chunks):
+    for chunk in chunks:
+        chunk_clean = chunk.strip()
+        if len(chunk_clean.split()) >= MIN_CLAUSE_WORDS:
+            yield chunk_clean
+
+
+def split_text_into_clauses(full_text, splitter=None):
+    """Split extracted contract text into clauses with the structure-aware segmenter or the recursive splitter."""
+    if splitter_config(splitter)["splitter"] == "structure":
+        chunks = segmenter.segment_text(full_text)
+    else:
+        chunks = _make_splitter().split_text(full_text)
+    return list(_keep(chunks))
+
+
+@contextmanager
+def _open_pdf(pdf_source):
+    """Open a PDF given as a path, raw bytes or a binary file-like object (e.g. a Streamlit upload)."""
+    if isinstance(pdf_source, (bytes, bytearray)):
+        yield BytesIO(pdf_source)
+    elif hasattr(pdf_source, "read"):
+        pdf_source.seek(0)
+        yield pdf_source
+    else:
+        with open(pdf_source, "rb") as f:
+            yield f
 
-    full_text = ""
-    with open(pdf_path, "rb") as f:
+
+def _iter_page_texts(pdf_source):
+    """Yield the text of each page as it is read."""
+    with _open_pdf(pdf_source) as f:
         reader = PyPDF2.PdfReader(f)
         for page in reader.pages:
             text = page.extract_text()
             if text:
-                full_text += "\n" + text
+                yield text
 
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=500,
-        chunk_overlap=50,
-        separators=["\n\n", "\n", ".", ";"]
-    )
-    chunks = splitter.split_text(full_text)
 
-    for chunk in chunks:
-        chunk_clean = chunk.strip()
-        if len(chunk_clean.split()) >= 5:
-            clauses.append(chunk_clean)
+def _extract_page_range(pdf_source, start, end):
+    """Worker: extract the text of pages [start, end) in its own process."""
+    with _open_pdf(pdf_source) as f:
+        reader = PyPDF2.PdfReader(f)
+        return [reader.pages[i].extract_text() or "" for i in range(start, end)]
 
+
+def _parallel_page_texts(pdf_source, workers):
+    # file objects can't be shipped to worker processes; send their bytes instead
+    if hasattr(pdf_source, "read"):
+        pdf_source.seek(0)
+        pdf_source = pdf_source.read()
+
+    with _open_pdf(pdf_source) as f:
+        page_count = len(PyPDF2.PdfReader(f).pages)
+    if page_count < PARALLEL_MIN_PAGES:
+        return list(_iter_page_texts(pdf_source))
+
+    # a few ranges per worker keeps the pool busy when some pages are much heavier than others
+    n_ranges = min(page_count, workers * 2)
+    bounds = [page_count * i // n_ranges for i in range(n_ranges + 1)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        parts = executor.map(
+            _extract_page_range,
+            [pdf_source] * n_ranges,
+            bounds[:-1],
+            bounds[1:],
+        )
+        # map() yields in submission order, so pages are reassembled in document order
+        return [text for part in parts for text in part if text]
+
+
+def extract_text(pdf_source, workers=1):
+    """
+    Text of a PDF path, bytes or binary file object, one line break before each page.
+    With `workers` > 1 (or None for one per CPU), page text is extracted in a process
+    pool for large documents and reassembled in page order.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1:
+        page_texts = _parallel_page_texts(pdf_source, workers)
+    else:
+        page_texts = _iter_page_texts(pdf_source)
+    return "".join("\n" + text for text in page_texts)
+
+
+def extract_clauses(pdf_source, workers=1, splitter=None):
+    """
+    Extract clauses from a PDF path, bytes or binary file object (see extract_text for
+    `workers`). `splitter` is "structure" or "recursive" (defaults to config.CLAUSE_SPLITTER).
+    """
+    return split_text_into_clauses(extract_text(pdf_source, workers), splitter)
+
+
+def extraction_key(pdf_bytes, splitter=None):
+    """Content address of a PDF under the given splitter configuration."""
+    digest = hashlib.sha256(pdf_bytes)
+    digest.update(json.dumps(splitter_config(splitter), sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def extract_clauses_cached(pdf_source, workers=1, splitter=None, on_clause=None):
+    """
+    extract_clauses with an on-disk cache keyed by the SHA-256 of the PDF bytes and
+    the splitter configuration, so re-uploading the same contract skips parsing.
+    With `on_clause`, a PDF that is not cached is parsed page by page with
+    iter_clauses (instead of with `workers` processes) and every clause is passed to
+    `on_clause(clause)` as soon as it is found.
+    """
+    if isinstance(pdf_source, (bytes, bytearray)):
+        pdf_bytes = bytes(pdf_source)
+    else:
+        with _open_pdf(pdf_source) as f:
+            pdf_bytes = f.read()
+
+    key = extraction_key(pdf_bytes, splitter)
+    clauses = extraction_cache.get(key)
+    if clauses is None:
+        if on_clause:
+            clauses = []
+            for clause in iter_clauses(pdf_bytes, splitter=splitter):
+                clauses.append(clause)
+                on_clause(clause)
+        else:
+            clauses = extract_clauses(pdf_bytes, workers=workers, splitter=splitter)
+        extraction_cache.put(key, clauses)
     return clauses
+
+
+def iter_clauses(pdf_source, splitter=None):
+    """
+    Generator variant of extract_clauses: reads the PDF page by page and yields
+    clauses as soon as their boundaries are known, so analysis can start before
+    the whole document is parsed. The last section/chunk of each page is held back
+    and re-split with the next page, which keeps clauses that span page breaks intact.
+    """
+    if splitter_config(splitter)["splitter"] == "structure":
+        yield from _iter_structured_clauses(pdf_source)
+        return
+
+    text_splitter = _make_splitter()
+    buffer = ""
+
+    for text in _iter_page_texts(pdf_source):
+        buffer += "\n" + text
+        chunks = text_splitter.split_text(buffer)
+        if len(chunks) < 2:
+            continue
+
+        yield from _keep(chunks[:-1])
+
+        tail = chunks[-1]
+        pos = buffer.rfind(tail)
+        buffer = buffer[pos:] if pos != -1 else tail
+
+    yield from _keep(text_splitter.split_text(buffer))
+
+
+def _iter_structured_clauses(pdf_source):
+    pending, ended_line = [], False
+    for text in _iter_page_texts(pdf_source):
+        # the same lines as extract_text's pages joined by line breaks: a page that ends
+        # with a line break leaves a blank line before the next one
+        lines = ([""] if ended_line else []) + text.splitlines()
+        ended_line = text.splitlines(True)[-1] != text.splitlines()[-1]
+        # sections before the last heading are complete; the last one may run onto the next page
+        complete, pending = segmenter.split_complete(pending + lines)
+        if complete:
+            yield from _keep(segmenter.segment_lines(complete))
+    yield from _keep(segmenter.segment_lines(pending))
@@ -0,0 +1,109 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from config import HEDGE_ENABLED, HEDGE_MAX_EXTRA_FRACTION, HEDGE_MIN_DELAY, HEDGE_PERCENTILE
+from risk_assessment.metrics import metrics
+
+# requests run here so the caller can stop waiting on a slow one; a losing request
+# that is already in flight cannot be aborted and simply finishes in the background
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+
+
+# ---------------- Hedged Requests ----------------
+class HedgePolicy:
+    """
+    Decides when a slow request gets a hedge and caps the extra spend: hedges may
+    never exceed `max_extra_fraction` of primary requests.
+    """
+
+    def __init__(self, enabled=HEDGE_ENABLED, percentile=HEDGE_PERCENTILE, min_delay=HEDGE_MIN_DELAY,
+                 max_extra_fraction=HEDGE_MAX_EXTRA_FRACTION):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_extra_fraction = max_extra_fraction
+        self.primary = 0
+        self.fired = 0
+        self.won = 0
+        self.skipped_budget = 0
+        self._lock = threading.Lock()
+
+    def delay(self, model_manager):
+        """Seconds to wait before hedging: the configured percentile of recent latency, or None without enough history."""
+        p = model_manager.latency_percentile(self.percentile)
+        return None if p is None else max(self.min_delay, p)
+
+    def _count_primary(self):
+        with self._lock:
+            self.primary += 1
+
+    def _try_fire(self):
+        with self._lock:
+            if self.fired + 1 > self.max_extra_fraction * self.primary:
+                self.skipped_budget += 1
+                metrics.incr("hedge_skipped_budget")
+                return False
+            self.fired += 1
+        metrics.incr("hedge_fired")
+        return True
+
+    def _record_win(self):
+        with self._lock:
+            self.won += 1
+        metrics.incr("hedge_won")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "primary": self.primary,
+                "fired": self.fired,
+                "won": self.won,
+                "skipped_budget": self.skipped_budget,
+                "fire_rate": round(self.fired / self.primary, 3) if self.primary else 0.0,
+            }
+
+
+def hedged_call(call_fn, model, pick_secondary, is_valid, policy, model_manager):
+    """
+    Run `call_fn(model)`; if it has not returned within the policy's delay, also send the
+    same request to `pick_secondary()`. The first valid result wins and the other request
+    is cancelled (or abandoned if already running); a request cancelled before it started
+    gives its model's slot back to `model_manager`. Returns `(result, winning_model)`;
+    raises the primary's error if no attempt produced a result.
+    """
+    policy._count_primary()
+    primary = _executor.submit(call_fn, model)
+    delay = policy.delay(model_manager)
+    done, _ = wait([primary], timeout=delay)
+    if done or not policy._try_fire():
+        return primary.result(), model
+
+    second_model = pick_secondary()
+    if second_model is None:
+        return primary.result(), model
+    if second_model == model:
+        model_manager.release(second_model)
+        return primary.result(), model
+    secondary = _executor.submit(call_fn, second_model)
+    owners = {primary: model, secondary: second_model}
+
+    pending = set(owners)
+    fallback = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is not None:
+                continue
+            result = future.result()
+            if is_valid(result):
+                for other in pending:
+                    if other.cancel():
+                        model_manager.release(owners[other])
+                if future is secondary:
+                    policy._record_win()
+                return result, owners[future]
+            fallback = fallback or (result, owners[future])
+
+    if fallback:
+        return fallback
+    return primary.result(), model
@@ -9,7 +9,10 @@ from google.oauth2.service_account import Credentials
 load_dotenv()
 
 # Import the batch analysis function from analyze_clauses
-from risk_assessment.analyze_clauses import analyze_all_batches
+from risk_assessment.analyze_clauses import analyze_all_batches, open_run_journal, rewrite_clauses
+from config import CASCADE_ENABLED
+from risk_assessment.metrics import metrics
+from risk_assessment.reports import sheet_rows
 
 # Google Sheets setup
 google_auth_file = "services.json"
@@ -40,37 +43,38 @@ for attempt in range(max_retries):
             raise e  # Give up after max retries
 
 # Clause ingestion and analysis
-def ingest_to_sheet(clauses, batch_size=6, max_workers=3):
+def ingest_to_sheet(clauses, batch_size=None, max_workers=None, cascade=None, rewrite=True):
     """
     Analyze clauses in batches and upload results to Google Sheets.
+    Batches are planned by token budget unless a fixed `batch_size` is given.
+    `cascade` switches to the two-tier triage path (default: CASCADE_ENABLED).
+    With `rewrite=True` High-risk clauses also get their AI-Modified Clause.
     """
-    rows = [
-        ["Clause ID", "Contract Clause", "Regulation", "Risk Level", "Risk Score",
-         "Clause Identification", "Clause Feedback & Fix", "AI-Modified Clause", "AI-Modified Risk Level"]
-    ]
+    # an interrupted ingest of the same clauses resumes from its last finished batch
+    cascade = CASCADE_ENABLED if cascade is None else cascade
+    journal = open_run_journal(clauses, "cascade" if cascade else "single")
 
-    # Process clauses in batches
-    for i in tqdm(range(0, len(clauses), batch_size), desc="Processing Batches"):
-        batch = clauses[i:i + batch_size]
+    # Analyze all batches concurrently, ticking the progress bar as each batch finishes
+    with tqdm(desc="Processing Batches") as bar:
+        def on_progress(done, total):
+            bar.total = total
+            bar.update(1)
 
-        # Analyze the batch using multiple workers
-        results = analyze_all_batches(batch, start_id=i + 1, max_workers=max_workers)
-
-        # Append results to rows
-        for res in results:
-            rows.append([
-                res.get("Clause ID"),
-                res.get("Contract Clause"),
-                res.get("Regulation"),
-                res.get("Risk Level"),
-                res.get("Risk Score", "0%"),
-                res.get("Clause Identification"),
-                res.get("Clause Feedback & Fix", "No feedback or recommendation available."),
-                res.get("AI-Modified Clause", "No AI-modified clause available."),
-                res.get("AI-Modified Risk Level", "Unknown")
-            ])
+        results = analyze_all_batches(
+            clauses,
+            start_id=1,
+            batch_size=batch_size,
+            max_workers=max_workers,
+            progress_callback=on_progress,
+            cascade=cascade,
+            journal=journal,
+        )
+    if rewrite:
+        results = rewrite_clauses(results, max_workers=max_workers)
+    # time spent waiting on the rate limiter vs. inside Groq calls
+    print(metrics.report())
 
     # Clear existing content and update sheet
     worksheet.clear()
-    worksheet.update(values=rows, range_name="A1")
+    worksheet.update(values=sheet_rows(results), range_name="A1")
 
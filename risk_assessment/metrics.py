@@ -0,0 +1,41 @@
+import threading
+
+
+# ---------------- Hot-Path Metrics ----------------
+class Metrics:
+    """Thread-safe counters and timers for the analysis pipeline."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.timers = {}
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, seconds):
+        with self._lock:
+            total, count = self.timers.get(name, (0.0, 0))
+            self.timers[name] = (total + seconds, count + 1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "timers": {k: {"seconds": round(t, 3), "count": c} for k, (t, c) in self.timers.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.timers.clear()
+
+    def report(self):
+        snap = self.snapshot()
+        lines = [f"{k}: {v}" for k, v in sorted(snap["counters"].items())]
+        lines += [f"{k}: {v['seconds']}s over {v['count']}" for k, v in sorted(snap["timers"].items())]
+        return "\n".join(lines)
+
+
+metrics = Metrics()
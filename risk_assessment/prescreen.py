@@ -0,0 +1,207 @@
+import re
+from collections import deque
+
+
+# ---------------- Vocabulary ----------------
+# topic phrases that point at a regulation even when it is not named; "*" marks a prefix
+TOPIC_KEYWORDS = {
+    "personal data": "GDPR",
+    "data subject*": "GDPR",
+    "data protection": "GDPR",
+    "data controller": "GDPR",
+    "data processor": "GDPR",
+    "data breach*": "GDPR",
+    "transfer of personal": "GDPR",
+    "protected health information": "HIPAA",
+    "health information": "HIPAA",
+    "medical record*": "HIPAA",
+    "business associate": "HIPAA",
+    "cardholder": "PCI-DSS",
+    "payment card*": "PCI-DSS",
+    "credit card*": "PCI-DSS",
+    "internal control*": "SOX",
+    "financial statement*": "SOX",
+    "financial reporting": "SOX",
+    "securities": "SEC",
+    "insider trading": "SEC",
+    "brib*": "FCPA",
+    "anti-corruption": "FCPA",
+    "foreign official*": "FCPA",
+    "kickback*": "FCPA",
+    "money laundering": "AML/KYC",
+    "know your customer": "AML/KYC",
+    "sanction*": "OFAC",
+    "embargo*": "OFAC",
+    "export control*": "EAR",
+    "re-export*": "EAR",
+    "defense article*": "ITAR",
+    "munitions": "ITAR",
+    "information security": "ISO 27001",
+    "security incident*": "ISO 27001",
+    "consumer privacy": "CCPA",
+    "sale of personal information": "CCPA",
+    "education record*": "FERPA",
+    "under the age of 13": "COPPA",
+}
+
+# wording that makes a chunk worth a model call even if it looks like boilerplate
+RISK_TERMS = [
+    "shall", "must", "indemnif*", "liabilit*", "liable", "breach*", "terminat*", "penalt*",
+    "damages", "warrant*", "confidential*", "obligat*", "compl*", "audit*", "insur*",
+    "arbitrat*", "governing law", "jurisdiction", "exclusiv*", "non-compete", "fine", "fines",
+]
+
+# weights of the cheap local risk prior used to schedule the riskiest clauses first;
+# each distinct term counts once, and every regulation the clause touches adds REGULATION_PRIOR
+RISK_PRIOR_WEIGHTS = {
+    "indemnif*": 5, "hold harmless": 5, "liabilit*": 4, "liable": 4, "unlimited": 3,
+    "personal data": 4, "data breach*": 4, "export*": 3, "sanction*": 3, "brib*": 4,
+    "penalt*": 3, "fine": 3, "fines": 3, "terminat*": 2, "damages": 2, "breach*": 2,
+    "exclusiv*": 2, "non-compete": 2, "warrant*": 1, "confidential*": 1, "audit*": 1, "insur*": 1,
+}
+REGULATION_PRIOR = 3
+
+# "shall" inside a definition does not create an obligation
+DEFINITIONAL_SHALL_RE = re.compile(r"\bshall (?:mean|have the meaning|include|be construed)", re.IGNORECASE)
+
+# shapes of chunks that carry no compliance risk on their own
+NON_SUBSTANTIVE_FORMS = [
+    ("signature block", re.compile(r"\bIN WITNESS WHEREOF\b", re.IGNORECASE), 1),
+    ("signature block", re.compile(r"\b(?:By|Name|Title|Date|Signed|Signature)\s*:"), 2),
+    ("address block", re.compile(r"\b(?:Attn|Attention|Address|Tel|Telephone|Fax|E-?mail|Phone)\s*:", re.IGNORECASE), 2),
+    ("recital", re.compile(r"^\s*(?:WHEREAS|RECITALS?|BACKGROUND|NOW,? THEREFORE)\b"), 1),
+    ("definition", re.compile(
+        r"^\s*(?:\d+(?:\.\d+)*\.?\s*)?[\"“][^\"”]{1,80}[\"”]\s+(?:means|shall mean|has the meaning|shall have the meaning|refers to)\b",
+        re.IGNORECASE,
+    ), 1),
+    ("boilerplate", re.compile(r"\bexecuted in (?:any number of )?counterparts\b", re.IGNORECASE), 1),
+    ("boilerplate", re.compile(r"\bheadings\b.{0,60}\bfor (?:convenience|reference)\b", re.IGNORECASE), 1),
+]
+
+
+# ---------------- Multi-Pattern Matcher ----------------
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton: finds every occurrence of many patterns in one pass over
+    the text. Matches must start and end on word boundaries; a pattern ending in "*"
+    only needs to start on one (so "indemnif*" matches "indemnify" and "indemnification").
+    """
+
+    def __init__(self, patterns, case_sensitive=False):
+        self.case_sensitive = case_sensitive
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern, label in patterns.items():
+            prefix = pattern.endswith("*")
+            key = pattern.rstrip("*")
+            if not case_sensitive:
+                key = key.lower()
+            node = 0
+            for ch in key:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((len(key), prefix, label))
+
+        # breadth-first failure links; each node inherits the outputs of its fallback
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text):
+        """Yield `(start, end, label)` for every whole-word match in `text`."""
+        haystack = text if self.case_sensitive else text.lower()
+        node = 0
+        for i, ch in enumerate(haystack):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, prefix, label in self._out[node]:
+                start, end = i - length + 1, i + 1
+                if start > 0 and haystack[start - 1].isalnum():
+                    continue
+                if not prefix and end < len(haystack) and haystack[end].isalnum():
+                    continue
+                yield start, end, label
+
+
+# ---------------- Pre-Screener ----------------
+def _regulation_names(regulation_list):
+    """Split the prompt's comma-separated regulation list, dropping parenthetical qualifiers."""
+    names = {}
+    for item in regulation_list.split(","):
+        name = item.strip()
+        if name:
+            names[name] = re.sub(r"\s*\(.*?\)", "", name).strip()
+    return names
+
+
+class PreScreener:
+    """
+    Local, model-free first look at a clause. Tags regulations that the clause names
+    (or whose topic it mentions) and marks chunks that are clearly not substantive —
+    signature and address blocks, recitals, plain definitions, counterparts/headings
+    boilerplate — so they can be scored Low without an LLM call. A chunk that matches
+    a regulation or any risk term is always treated as substantive.
+    """
+
+    def __init__(self, regulation_list, topic_keywords=None, risk_terms=None, prior_weights=None):
+        names = _regulation_names(regulation_list)
+        # acronyms ("SEC", "IT Act") are matched case-sensitively so "sec." or "it acts" do not count
+        acronyms = {key: label for label, key in names.items() if re.search(r"\b[A-Z]{2,}", key)}
+        phrases = {key: label for label, key in names.items() if key not in acronyms}
+        phrases.update(TOPIC_KEYWORDS if topic_keywords is None else topic_keywords)
+        self._acronyms = KeywordMatcher(acronyms, case_sensitive=True)
+        self._phrases = KeywordMatcher(phrases)
+        self._risk = KeywordMatcher({t: t for t in (RISK_TERMS if risk_terms is None else risk_terms)})
+        self._prior_weights = RISK_PRIOR_WEIGHTS if prior_weights is None else prior_weights
+        self._prior = KeywordMatcher({t: t for t in self._prior_weights})
+
+    def tag(self, text):
+        """Regulations the clause names or touches on, in order of first mention."""
+        hits = sorted(list(self._acronyms.find(text)) + list(self._phrases.find(text)))
+        return list(dict.fromkeys(label for _, _, label in hits))
+
+    def risk_terms(self, text):
+        text = DEFINITIONAL_SHALL_RE.sub("", text)
+        return list(dict.fromkeys(label for _, _, label in self._risk.find(text)))
+
+    def risk_prior(self, text):
+        """Cheap keyword score of how risky `text` looks; higher is riskier, 0 for boilerplate."""
+        if self.form(text):
+            return 0
+        terms = {label for _, _, label in self._prior.find(text)}
+        return sum(self._prior_weights[t] for t in terms) + REGULATION_PRIOR * len(self.tag(text))
+
+    @staticmethod
+    def form(text):
+        """Name of the non-substantive shape `text` has, or None."""
+        for kind, pattern, min_hits in NON_SUBSTANTIVE_FORMS:
+            if len(pattern.findall(text)) >= min_hits:
+                return kind
+        return None
+
+    def screen(self, text):
+        """{"substantive": bool, "kind": form or None, "regulations": [...], "risk_terms": [...]}"""
+        regulations = self.tag(text)
+        kind = self.form(text)
+        terms = self.risk_terms(text) if kind else []
+        return {
+            "substantive": kind is None or bool(regulations) or bool(terms),
+            "kind": kind,
+            "regulations": regulations,
+            "risk_terms": terms,
+        }
@@ -0,0 +1,164 @@
+import math
+import random
+import time
+from statistics import NormalDist
+
+from config import QUICK_SCAN_CONFIDENCE, QUICK_SCAN_FRACTION, QUICK_SCAN_MIN_SAMPLE
+from risk_assessment.analyze_clauses import (
+    _numbered,
+    _prescreen,
+    _prior_result,
+    analyze_all_batches,
+    is_failed_result,
+    risk_scorer,
+)
+from risk_assessment.metrics import metrics
+
+RISK_LEVELS = ("High", "Medium", "Low")
+
+# lower bounds of the risk-prior bands the sample is stratified by; clauses in the same
+# band tend to get the same risk level, which narrows the intervals
+PRIOR_STRATA = (0, 5, 10, 20)
+
+
+def _stratum(clause):
+    prior = risk_scorer.risk_prior(clause)
+    return sum(1 for bound in PRIOR_STRATA[1:] if prior >= bound)
+
+
+def _allocate(sizes, n):
+    """Split a sample of `n` over strata of `sizes` in proportion, at least two per stratum where `n` allows."""
+    total = sum(sizes)
+    shares = [n * size / total for size in sizes]
+    alloc = [int(share) for share in shares]
+    # largest remainders take what rounding down left over
+    for h in sorted(range(len(sizes)), key=lambda h: shares[h] - alloc[h], reverse=True)[:n - sum(alloc)]:
+        alloc[h] += 1
+    floors = [min(size, 2) for size in sizes]
+    for h in range(len(sizes)):
+        while alloc[h] < floors[h]:
+            donor = max(range(len(sizes)), key=lambda g: alloc[g] - floors[g])
+            if alloc[donor] <= floors[donor]:
+                break
+            alloc[donor] -= 1
+            alloc[h] += 1
+    return alloc
+
+
+# ---------------- Quick Scan ----------------
+def quick_scan(clauses, start_id=1, clause_ids=None, fraction=None, min_sample=None, confidence=None, seed=None,
+               **kwargs):
+    """
+    Estimate the share of High/Medium/Low clauses of a contract from a sample.
+
+    Clauses with a result that costs no model call (pre-screened, cached, reused) are
+    counted exactly. The rest are stratified by the pre-screener's risk prior and a
+    proportional random sample of `fraction` of them (at least `min_sample`) is sent to
+    analyze_all_batches (`kwargs` are passed through). Clause IDs are numbered as in
+    analyze_all_batches.
+
+    Returns {"clauses", "known", "sampled", "unsampled", "confidence", "seconds",
+    "estimate": {level: {"share", "low", "high", "count"}}, "results"}. The intervals
+    are normal approximations of the stratified estimator with finite population
+    correction; stratum variances are Laplace-smoothed so an all-Low sample does not
+    claim a zero-width interval. Pass the scan to promote_scan for the full analysis.
+    """
+    fraction = QUICK_SCAN_FRACTION if fraction is None else fraction
+    min_sample = QUICK_SCAN_MIN_SAMPLE if min_sample is None else min_sample
+    confidence = QUICK_SCAN_CONFIDENCE if confidence is None else confidence
+    started = time.perf_counter()
+
+    known, pending = _prescreen(_numbered(clauses, start_id, clause_ids))
+    strata = [[] for _ in PRIOR_STRATA]
+    for cid, cl in pending:
+        prior = _prior_result(cl, cid)
+        if prior:
+            known.append(prior)
+        else:
+            strata[_stratum(cl)].append((cid, cl))
+
+    unknown = sum(len(stratum) for stratum in strata)
+    n = min(unknown, max(min_sample, math.ceil(fraction * unknown)))
+    rnd = random.Random(seed)
+    sample = []
+    for stratum, size in zip(strata, _allocate([len(s) for s in strata], n) if unknown else []):
+        sample.extend(rnd.sample(stratum, size))
+    sampled = analyze_all_batches(
+        [cl for _, cl in sample], clause_ids=[cid for cid, _ in sample], **kwargs
+    ) if sample else []
+    metrics.incr("quick_scan_sampled", len(sample))
+
+    by_id = {res["Clause ID"]: res for res in sampled if not is_failed_result(res)}
+    total = len(known) + unknown
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    estimate = {}
+    for level in RISK_LEVELS:
+        count = sum(1 for res in known if res.get("Risk Level") == level)
+        variance = 0.0
+        for stratum in strata:
+            size = len(stratum)
+            if not size:
+                continue
+            hits = [by_id[cid].get("Risk Level") == level for cid, _ in stratum if cid in by_id]
+            if hits:
+                rate, smoothed = sum(hits) / len(hits), (sum(hits) + 1) / (len(hits) + 2)
+                variance += size ** 2 * (1 - len(hits) / size) * smoothed * (1 - smoothed) / len(hits)
+            else:
+                # nothing usable sampled from this stratum: no information, widest interval
+                rate = 0.5
+                variance += size ** 2 * 0.25
+            count += size * rate
+        share = count / total if total else 0.0
+        margin = z * math.sqrt(variance) / total if total else 0.0
+        estimate[level] = {
+            "share": round(share, 3),
+            "low": round(max(0.0, share - margin), 3),
+            "high": round(min(1.0, share + margin), 3),
+            "count": round(count, 1),
+        }
+
+    results = sorted(known + sampled, key=lambda x: x["Clause ID"])
+    return {
+        "clauses": total,
+        "known": len(known),
+        "sampled": len(sample),
+        "unsampled": unknown - len(sample),
+        "confidence": confidence,
+        "seconds": round(time.perf_counter() - started, 2),
+        "estimate": estimate,
+        "results": results,
+    }
+
+
+def promote_scan(scan, clauses, start_id=1, clause_ids=None, **kwargs):
+    """
+    Complete a quick scan into the full analysis: only clauses without a usable scan result
+    go to analyze_all_batches (`kwargs` are passed through). With a `journal` the scan
+    results are recorded in it first, so the journal covers the whole contract. Returns
+    results sorted by Clause ID.
+    """
+    done = {res["Clause ID"]: res for res in scan["results"] if not is_failed_result(res)}
+    journal = kwargs.get("journal")
+    if journal is not None and done:
+        journal.compact(list(done.values()))
+    if clause_ids is None:
+        clause_ids = range(start_id, start_id + len(clauses))
+    rest = [(cid, cl) for cid, cl in zip(clause_ids, clauses) if cid not in done]
+    results = list(done.values())
+    if rest:
+        results.extend(analyze_all_batches([cl for _, cl in rest], clause_ids=[cid for cid, _ in rest], **kwargs))
+    results.sort(key=lambda x: x["Clause ID"])
+    return results
+
+
+def format_quick_scan(scan) -> str:
+    lines = [
+        f"Quick scan: {scan['sampled']} of {scan['clauses']} clauses analyzed, {scan['known']} known without "
+        f"a model call, {scan['unsampled']} left for a full run ({scan['seconds']}s)"
+    ]
+    for level in RISK_LEVELS:
+        est = scan["estimate"][level]
+        lines.append(
+            f"  {level:<7} {est['share']:>6.1%}  ({scan['confidence']:.0%} CI {est['low']:.1%} – {est['high']:.1%})"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+import time
+
+from config import RATE_LIMITS, DEFAULT_RATE_LIMITS
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# ---------------- Cross-Process File Lock ----------------
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+        self._fh = None
+
+    def __enter__(self):
+        self._fh = open(self.path, "a+b")
+        if fcntl:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        else:
+            self._fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl:
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            else:
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._fh.close()
+
+
+# ---------------- Token-Bucket Rate Limiter ----------------
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute token buckets per model, stored in a
+    JSON state file guarded by a file lock so every thread and process on the host
+    (Streamlit sessions, batch jobs) draws from the same Groq budget. `acquire`
+    blocks until the model has capacity instead of letting the call hit a 429.
+    """
+
+    def __init__(self, state_path, limits=None):
+        self.state_path = state_path
+        self.limits = limits or RATE_LIMITS
+        self._thread_lock = threading.Lock()
+        directory = os.path.dirname(state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file_lock = _FileLock(state_path + ".lock")
+
+    def _limits(self, model):
+        return self.limits.get(model, DEFAULT_RATE_LIMITS)
+
+    def _load(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, state):
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_path)
+
+    def _refill(self, state, model, now):
+        limits = self._limits(model)
+        bucket = state.get(model) or {"requests": limits["rpm"], "tokens": limits["tpm"], "updated": now}
+        elapsed = max(0.0, now - bucket["updated"])
+        bucket["requests"] = min(limits["rpm"], bucket["requests"] + elapsed * limits["rpm"] / 60.0)
+        bucket["tokens"] = min(limits["tpm"], bucket["tokens"] + elapsed * limits["tpm"] / 60.0)
+        bucket["updated"] = now
+        state[model] = bucket
+        return bucket, limits
+
+    def acquire(self, model, tokens):
+        """Block until one request and `tokens` tokens are available for `model`. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._thread_lock, self._file_lock:
+                now = time.time()
+                state = self._load()
+                bucket, limits = self._refill(state, model, now)
+                # a request larger than the whole bucket only has to wait for a full bucket
+                need = min(tokens, limits["tpm"])
+                if bucket["requests"] >= 1 and bucket["tokens"] >= need:
+                    bucket["requests"] -= 1
+                    bucket["tokens"] -= need
+                    self._save(state)
+                    return waited
+                wait = max(
+                    (1 - bucket["requests"]) * 60.0 / limits["rpm"],
+                    (need - bucket["tokens"]) * 60.0 / limits["tpm"],
+                )
+            wait = min(max(wait, 0.05), 5.0)
+            time.sleep(wait)
+            waited += wait
+
+    def reconcile(self, model, estimated, actual):
+        """
+        Correct the token bucket once the real usage of a call is known. `estimated` is
+        what was passed to `acquire`, which took at most a full bucket of it.
+        """
+        if actual is None:
+            return
+        with self._thread_lock, self._file_lock:
+            state = self._load()
+            bucket, limits = self._refill(state, model, time.time())
+            deducted = min(estimated, limits["tpm"])
+            if actual == deducted:
+                return
+            bucket["tokens"] = min(limits["tpm"], bucket["tokens"] + deducted - actual)
+            self._save(state)
+
+    def on_rate_limited(self, model):
+        """The provider returned a 429: drain the model's buckets so every process backs off."""
+        with self._thread_lock, self._file_lock:
+            state = self._load()
+            bucket, _ = self._refill(state, model, time.time())
+            bucket["requests"] = 0
+            bucket["tokens"] = min(bucket["tokens"], 0)
+            self._save(state)
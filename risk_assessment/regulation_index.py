@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from risk_assessment.prescreen import TOPIC_KEYWORDS, PreScreener
+from risk_assessment.regulations import REGULATION_LIST
+
+# changes whenever a regulation or topic keyword is added or edited, so clauses are
+# re-tagged by the pre-screener against the current catalogue
+CATALOGUE_VERSION = hashlib.sha256(
+    (REGULATION_LIST + json.dumps(TOPIC_KEYWORDS, sort_keys=True)).encode("utf-8")
+).hexdigest()[:16]
+
+# clauses that cite a regulation outrank those the pre-screener only tagged
+CITED_PRIORITY = 100
+
+
+def _risk_score(res):
+    try:
+        return int(str(res.get("Risk Score", "0")).rstrip("%"))
+    except ValueError:
+        return 0
+
+
+# ---------------- Regulation -> Clause Index ----------------
+class RegulationIndex:
+    """
+    On-disk reverse index from regulation to the analyzed clauses of every contract in
+    the portfolio, with a persistent queue of clauses awaiting re-evaluation.
+
+    A clause is indexed under each regulation its analysis cites ("cited") and each one
+    the local pre-screener tags it with ("screened"). Contracts are keyed by their result
+    file; a contract is re-indexed when that file changes or when the regulation
+    catalogue (CATALOGUE_VERSION) does, which is how newly added regulations pick up
+    the clauses that mention them.
+    """
+
+    def __init__(self, path, screener=None):
+        self.path = path
+        self.screener = screener or PreScreener(REGULATION_LIST)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    # connection is opened lazily so importing never touches the disk
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS clause_regulation (
+                    regulation TEXT NOT NULL,
+                    contract TEXT NOT NULL,
+                    clause_id INTEGER NOT NULL,
+                    source TEXT NOT NULL,
+                    risk_score INTEGER NOT NULL,
+                    PRIMARY KEY (regulation, contract, clause_id, source)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_regulation_contract ON clause_regulation (contract);
+                CREATE TABLE IF NOT EXISTS indexed_contract (
+                    contract TEXT PRIMARY KEY,
+                    mtime_ns INTEGER NOT NULL,
+                    catalogue TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS reevaluation_queue (
+                    contract TEXT NOT NULL,
+                    clause_id INTEGER NOT NULL,
+                    priority INTEGER NOT NULL,
+                    reason TEXT NOT NULL,
+                    queued_at REAL NOT NULL,
+                    PRIMARY KEY (contract, clause_id)
+                );
+                """
+            )
+            self._conn.commit()
+        return self._conn
+
+    def is_current(self, contract, mtime_ns):
+        """True if `contract` was indexed from this version of its file under the current catalogue."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT mtime_ns, catalogue FROM indexed_contract WHERE contract = ?", (contract,)
+            ).fetchone()
+        return row is not None and row[0] == mtime_ns and row[1] == CATALOGUE_VERSION
+
+    def index_contract(self, contract, results, mtime_ns=0):
+        """(Re)index the clause results of one contract."""
+        rows = set()
+        for res in results:
+            cid, score = res["Clause ID"], _risk_score(res)
+            for name in str(res.get("Regulation", "")).split(","):
+                name = name.strip()
+                if name and name not in ("Unknown", "None"):
+                    rows.add((name, contract, cid, "cited", score))
+            for name in self.screener.tag(res.get("Contract Clause", "")):
+                rows.add((name, contract, cid, "screened", score))
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM clause_regulation WHERE contract = ?", (contract,))
+            conn.executemany("INSERT OR IGNORE INTO clause_regulation VALUES (?, ?, ?, ?, ?)", rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO indexed_contract (contract, mtime_ns, catalogue) VALUES (?, ?, ?)",
+                (contract, mtime_ns, CATALOGUE_VERSION),
+            )
+            conn.commit()
+
+    def remove_contract(self, contract):
+        with self._lock:
+            conn = self._connect()
+            for table in ("clause_regulation", "indexed_contract", "reevaluation_queue"):
+                conn.execute(f"DELETE FROM {table} WHERE contract = ?", (contract,))
+            conn.commit()
+
+    def contracts(self):
+        with self._lock:
+            return [row[0] for row in self._connect().execute("SELECT contract FROM indexed_contract")]
+
+    def affected(self, regulations):
+        """
+        `(contract, clause_id, priority)` for every clause citing or tagged with any of
+        `regulations`; cited clauses rank above screened ones, riskier clauses first.
+        """
+        regulations = list(regulations)
+        if not regulations:
+            return []
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT contract, clause_id, "
+                f"MAX(risk_score + CASE source WHEN 'cited' THEN {CITED_PRIORITY} ELSE 0 END) AS priority "
+                f"FROM clause_regulation WHERE regulation IN ({','.join('?' * len(regulations))}) "
+                "GROUP BY contract, clause_id ORDER BY priority DESC",
+                regulations,
+            ).fetchall()
+        return [tuple(row) for row in rows]
+
+    # ---- re-evaluation queue ----
+    def enqueue(self, items, reason):
+        """Queue `(contract, clause_id, priority)` items; a clause already queued keeps its higher priority."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT INTO reevaluation_queue (contract, clause_id, priority, reason, queued_at) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (contract, clause_id) DO UPDATE SET "
+                "priority = MAX(priority, excluded.priority), reason = CASE WHEN instr(reason, excluded.reason) "
+                "THEN reason ELSE reason || '; ' || excluded.reason END",
+                [(contract, cid, priority, reason, now) for contract, cid, priority in items],
+            )
+            conn.commit()
+        return len(items)
+
+    def queued(self):
+        """Queued `(contract, clause_id, reason)` items, highest priority first."""
+        with self._lock:
+            return [tuple(row) for row in self._connect().execute(
+                "SELECT contract, clause_id, reason FROM reevaluation_queue ORDER BY priority DESC, queued_at"
+            )]
+
+    def dequeue(self, items):
+        """Remove `(contract, clause_id)` pairs from the queue."""
+        with self._lock:
+            conn = self._connect()
+            conn.executemany("DELETE FROM reevaluation_queue WHERE contract = ? AND clause_id = ?", list(items))
+            conn.commit()
+
+    def stats(self):
+        with self._lock:
+            conn = self._connect()
+            return {
+                "contracts": conn.execute("SELECT COUNT(*) FROM indexed_contract").fetchone()[0],
+                "entries": conn.execute("SELECT COUNT(*) FROM clause_regulation").fetchone()[0],
+                "queued": conn.execute("SELECT COUNT(*) FROM reevaluation_queue").fetchone()[0],
+            }
@@ -0,0 +1,116 @@
+import re
+
+
+# ---------------- Regulation Codebook ----------------
+# Regulations grouped by jurisdiction, code -> full name. The prompt lists each code once
+# under its group (the group carries the country qualifier), the model answers with codes
+# and normalize_result expands them back to the full names.
+REGULATION_CODEBOOK = {
+    "EU": {
+        "GDPR": "GDPR",
+        "ePrivacy": "ePrivacy Directive",
+        "NIS2": "NIS2",
+        "DORA": "DORA",
+        "PSD2": "PSD2",
+        "MiFID II": "MiFID II",
+        "EMIR": "EMIR",
+        "eIDAS": "eIDAS",
+    },
+    "UK": {
+        "UK GDPR": "UK GDPR",
+        "DPA 2018": "DPA 2018 (UK)",
+        "PECR": "PECR",
+        "PRA/FCA": "PRA/FCA (UK)",
+    },
+    "US": {
+        "HIPAA": "HIPAA",
+        "HITECH": "HITECH",
+        "SOX": "SOX",
+        "SEC": "SEC",
+        "FINRA": "FINRA",
+        "GLBA": "GLBA",
+        "BSA": "Bank Secrecy Act",
+        "AML/KYC": "AML/KYC",
+        "OFAC": "OFAC",
+        "EAR": "EAR",
+        "ITAR": "ITAR",
+        "ECA": "Export Control Act",
+        "FCPA": "FCPA",
+        "CCPA": "CCPA",
+        "CPRA": "CPRA",
+        "FERPA": "FERPA",
+        "COPPA": "COPPA",
+        "NYDFS": "NYDFS",
+        "NIST": "NIST",
+        "FedRAMP": "FedRAMP",
+        "FISMA": "FISMA",
+        "CMMC": "CMMC",
+    },
+    "Standards": {
+        "ISO 27001": "ISO 27001",
+        "SOC 1": "SOC 1",
+        "SOC 2": "SOC 2",
+        "SOC 3": "SOC 3",
+        "PCI-DSS": "PCI-DSS",
+        "CIS Controls": "CIS Controls",
+        "CSA STAR": "CSA STAR",
+        "Basel III": "Basel III",
+    },
+    "DE": {"BDSG": "BDSG"},
+    "CH": {"FADP": "Swiss FADP"},
+    "ES": {"ENS": "ENS"},
+    "CA": {"PIPEDA": "PIPEDA", "OSFI": "OSFI (Canada)"},
+    "BR": {"LGPD": "LGPD"},
+    "MX": {"Federal Data Law": "Mexico Federal Data Law"},
+    "CL": {"Data Protection Bill": "Chile Data Protection Bill"},
+    "IN": {"RBI": "RBI", "SEBI": "SEBI", "IT Act": "IT Act", "DPDP": "India DPDP Act 2023"},
+    "CN": {"PIPL": "China PIPL", "CSL": "China CSL", "DSL": "China DSL"},
+    "JP": {"APPI": "APPI"},
+    "HK": {"HKMA": "HKMA"},
+    "SG": {"PDPA": "Singapore PDPA", "MAS TRM": "MAS TRM"},
+    "MY": {"MY PDPA": "Malaysia PDPA"},
+    "AU": {"IRAP": "IRAP", "CPS 234": "APRA CPS 234", "OAIC": "OAIC (Australia)", "Privacy Act 1988": "Privacy Act 1988"},
+    "ZA": {"POPIA": "POPIA"},
+    "KE": {"Kenya DPA": "Kenya Data Protection Act"},
+    "NG": {"NDPR": "Nigeria NDPR"},
+    "RU": {"152-FZ": "Russia Federal Data Law 152-FZ"},
+    "SA": {"SAMA": "SAMA"},
+    "AE": {"UAE PDPL": "UAE PDPL", "DFSA": "DFSA", "DIFC": "DIFC"},
+    "QA": {"QFCRA": "QFCRA", "PDP Law": "Qatar PDP Law"},
+    "BH": {"Bahrain PDPL": "Bahrain PDPL"},
+    "TR": {"KVKK": "Turkey KVKK"},
+}
+
+_CODES = {code: name for group in REGULATION_CODEBOOK.values() for code, name in group.items()}
+
+# full names, for the pre-screener and anything else that wants the plain list
+REGULATION_LIST = ", ".join(_CODES.values())
+
+# "EU: GDPR, ePrivacy, ...; UK: UK GDPR, ..." -- what the prompt actually carries
+CODE_TABLE = "; ".join(f"{group}: {', '.join(codes)}" for group, codes in REGULATION_CODEBOOK.items())
+
+# the prompt lists codes under their group, so answers may come back as "EU: GDPR"
+_GROUP_PREFIX_RE = re.compile(
+    r"^(?:%s)\s*:\s*" % "|".join(re.escape(group) for group in REGULATION_CODEBOOK), re.IGNORECASE
+)
+
+_BY_CODE = {name.upper(): name for name in _CODES.values()}
+_BY_CODE.update({code.upper(): name for code, name in _CODES.items()})
+
+
+def expand_regulations(value):
+    """
+    Map the model's regulation codes back to full names ("GDPR, CPS 234" -> "GDPR, APRA CPS 234"),
+    with or without their group prefix ("AU: CPS 234"). Anything that is not a known code or
+    name is kept as written.
+    """
+    if isinstance(value, (list, tuple)):
+        items = [str(v) for v in value]
+    else:
+        items = re.split(r"[,;]", str(value or ""))
+    names = []
+    for item in items:
+        item = _GROUP_PREFIX_RE.sub("", item.strip().strip("\"'")).strip()
+        if item:
+            names.append(_BY_CODE.get(item.upper(), item))
+    return ", ".join(dict.fromkeys(names))
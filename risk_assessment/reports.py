@@ -0,0 +1,62 @@
+from io import BytesIO
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+
+SHEET_COLUMNS = [
+    "Clause ID", "Contract Clause", "Regulation", "Risk Level", "Risk Score",
+    "Clause Identification", "Clause Feedback & Fix", "AI-Modified Clause", "AI-Modified Risk Level",
+    "Analysis Source",
+]
+
+
+# ---------------- Google Sheets Rows ----------------
+def sheet_rows(results):
+    """Header plus one row per clause result, as uploaded to the results sheet."""
+    rows = [list(SHEET_COLUMNS)]
+    for res in results:
+        rows.append([
+            res.get("Clause ID"),
+            res.get("Contract Clause"),
+            res.get("Regulation"),
+            res.get("Risk Level"),
+            res.get("Risk Score", "0%"),
+            res.get("Clause Identification"),
+            res.get("Clause Feedback & Fix", "No feedback or recommendation available."),
+            res.get("AI-Modified Clause", "No AI-modified clause available."),
+            res.get("AI-Modified Risk Level", "Unknown"),
+            res.get("Analysis Source", "LLM")
+        ])
+    return rows
+
+
+# ---------------- Rewritten Clauses PDF ----------------
+def generate_rewritten_pdf(df):
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    styles = getSampleStyleSheet()
+    story = []
+
+    story.append(Paragraph("<b>AI-Rewritten Contract Clauses Report</b>", styles["Title"]))
+    story.append(Spacer(1, 20))
+
+    for _, row in df.iterrows():
+        clause_id = row["Clause ID"]
+        original = row["Contract Clause"]
+        risk_level = row.get("Risk Level", "Unknown")
+        modified = row.get("AI-Modified Clause", "⚠️ Not available")
+        modified_risk = row.get("AI-Modified Risk Level", "Unknown")
+
+        story.append(Paragraph(f"<b>Clause ID:</b> {clause_id}", styles["Heading2"]))
+        story.append(Spacer(1, 6))
+        story.append(Paragraph(f"<b>Original Risk Level:</b> {risk_level}", styles["Normal"]))
+        story.append(Paragraph(f"<b>Original Clause:</b> {original}", styles["Normal"]))
+        story.append(Spacer(1, 6))
+        story.append(Paragraph(f"<b>AI-Modified Clause:</b> {modified}", styles["Normal"]))
+        story.append(Paragraph(f"<b>AI-Modified Risk Level:</b> {modified_risk}", styles["Normal"]))
+        story.append(Spacer(1, 15))
+
+    doc.build(story)
+    buffer.seek(0)
+    return buffer.getvalue()
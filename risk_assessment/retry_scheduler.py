@@ -0,0 +1,107 @@
+import random
+import threading
+import time
+
+from config import RETRY_BASE_DELAY, RETRY_MAX_ATTEMPTS, RETRY_MAX_DELAY
+from risk_assessment.metrics import metrics
+
+_rng = random.Random()
+_rng_lock = threading.Lock()
+
+
+def backoff_delay(attempt, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY):
+    """Exponential backoff with jitter: a random delay in [d/2, d] where d = base * 2**attempt, capped."""
+    delay = min(cap, base * (2 ** attempt))
+    with _rng_lock:
+        return _rng.uniform(delay / 2, delay)
+
+
+# ---------------- Per-Clause Retry Scheduler ----------------
+class RetryScheduler:
+    """
+    Retries failed clauses by their real Clause ID. Each clause waits a jittered,
+    exponentially growing delay between attempts; clauses that come due around the
+    same time (from any batch) are regrouped by `plan_fn` into full batches rather
+    than being resent as many tiny ones.
+
+    `analyze_fn(clauses, clause_ids)` returns one result per clause and
+    `plan_fn(clauses, clause_ids)` returns `(batch_clauses, batch_ids)` groups.
+    """
+
+    def __init__(self, analyze_fn, plan_fn, is_failed, max_attempts=RETRY_MAX_ATTEMPTS,
+                 base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY, group_window=None):
+        self.analyze_fn = analyze_fn
+        self.plan_fn = plan_fn
+        self.is_failed = is_failed
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # anything due within this window of the earliest item joins the same round
+        self.group_window = base_delay if group_window is None else group_window
+        self._queue = {}  # clause_id -> {"text", "result", "attempts", "due"}
+
+    def __len__(self):
+        return len(self._queue)
+
+    def add(self, results):
+        """Queue every failed result; returns the ones that succeeded."""
+        ok = []
+        now = time.monotonic()
+        for res in results:
+            if self.is_failed(res) and self.max_attempts > 0:
+                self._queue[res["Clause ID"]] = {
+                    "text": res["Contract Clause"],
+                    "result": res,
+                    "attempts": 0,
+                    "due": now + backoff_delay(0, self.base_delay, self.max_delay),
+                }
+            else:
+                ok.append(res)
+        return ok
+
+    def _due_round(self):
+        earliest = min(item["due"] for item in self._queue.values())
+        wait = earliest - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+            metrics.observe("retry_backoff_wait", wait)
+        cutoff = max(earliest, time.monotonic()) + self.group_window
+        return sorted(cid for cid, item in self._queue.items() if item["due"] <= cutoff)
+
+    def run(self, executor=None):
+        """Retry until every queued clause succeeds or runs out of attempts. Returns the final results."""
+        final = []
+        started = time.perf_counter()
+        while self._queue:
+            ids = self._due_round()
+            groups = self.plan_fn([self._queue[cid]["text"] for cid in ids], ids)
+            metrics.incr("retry_calls", len(groups))
+            metrics.incr("retry_clauses", len(ids))
+
+            if executor is not None and len(groups) > 1:
+                futures = [executor.submit(self.analyze_fn, batch, batch_ids) for batch, batch_ids in groups]
+                outputs = [f.result() for f in futures]
+            else:
+                outputs = [self.analyze_fn(batch, batch_ids) for batch, batch_ids in groups]
+
+            now = time.monotonic()
+            returned = {res["Clause ID"]: res for out in outputs for res in out}
+            for cid in ids:
+                item = self._queue[cid]
+                item["attempts"] += 1
+                res = returned.get(cid, item["result"])
+                if not self.is_failed(res):
+                    metrics.incr("retry_recovered")
+                    final.append(res)
+                    del self._queue[cid]
+                elif item["attempts"] >= self.max_attempts:
+                    metrics.incr("retry_exhausted")
+                    final.append(res)
+                    del self._queue[cid]
+                else:
+                    item["result"] = res
+                    item["due"] = now + backoff_delay(item["attempts"], self.base_delay, self.max_delay)
+
+        if final:
+            metrics.observe("retry_phase", time.perf_counter() - started)
+        return final
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+def run_id(*parts):
+    """Stable run ID from whatever identifies the run (content hash, prompt version, mode...)."""
+    return hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:24]
+
+
+# ---------------- Run Journal ----------------
+class RunJournal:
+    """
+    Append-only JSONL journal of the clause results of one analysis run.
+
+    Each completed batch is appended (and fsynced) as one line keyed by its Clause IDs,
+    so a run that dies part-way can be restarted with the same run ID and skip every
+    journaled clause. A torn last line from a crash mid-write is ignored. When a run
+    finishes, `compact` rewrites the journal as a single line holding every journaled
+    result, so runs over parts of the clauses (a sample, then the rest) add up. The
+    journal is complete once it holds all `clause_ids` of the run (at the first
+    compaction when they are not given); complete journals older than `ttl_seconds` are removed
+    whenever another journal in the directory is compacted.
+    """
+
+    def __init__(self, directory, run_id, ttl_seconds=7 * 24 * 3600, clause_ids=None):
+        self.directory = directory
+        self.run_id = run_id
+        self.path = os.path.join(directory, f"{run_id}.jsonl")
+        self.ttl_seconds = ttl_seconds
+        self.clause_ids = None if clause_ids is None else set(clause_ids)
+        self._lock = threading.Lock()
+
+    def completed(self):
+        """Journaled results by Clause ID (later lines win)."""
+        results = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    for res in entry.get("results", []):
+                        results[res["Clause ID"]] = res
+        except OSError:
+            pass
+        return results
+
+    def is_complete(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.loads(f.readline()).get("complete", False)
+        except (OSError, ValueError):
+            return False
+
+    def append(self, results):
+        """Record one completed batch."""
+        if not results:
+            return
+        line = json.dumps(
+            {"clause_ids": [res["Clause ID"] for res in results], "results": results, "at": time.time()},
+            ensure_ascii=False,
+        )
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def compact(self, results):
+        """Replace the journal's lines with one holding the journaled results merged with `results` (which win)."""
+        with self._lock:
+            merged = self.completed()
+            merged.update((res["Clause ID"], res) for res in results)
+            results = [merged[cid] for cid in sorted(merged)]
+            complete = self.clause_ids is None or self.clause_ids <= merged.keys()
+            line = json.dumps(
+                {"complete": complete, "clause_ids": [res["Clause ID"] for res in results], "results": results,
+                 "at": time.time()},
+                ensure_ascii=False,
+            )
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(line + "\n")
+            os.replace(tmp, self.path)
+        self._prune()
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl_seconds
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not name.endswith(".jsonl") or path == self.path:
+                continue
+            try:
+                # journals of interrupted runs are kept whatever their age: resuming depends on them
+                if os.path.getmtime(path) < cutoff and RunJournal(self.directory, name[:-len(".jsonl")]).is_complete():
+                    os.remove(path)
+            except OSError:
+                continue
@@ -0,0 +1,151 @@
+import re
+
+# bump when segmentation changes, so cached structure-split extractions are redone
+VERSION = 2
+
+# Numbered headings that open a new clause: "Section 4.2", "Article 7", "4.2.1", "1. Definitions", "(a)", "(iv)".
+# Case-sensitive: a wrapped line starting with "section 4.2 hereof" is a cross-reference, not a heading
+HEADING_RE = re.compile(
+    r"""^\s*(?:
+        (?:Section|SECTION|Article|ARTICLE|Clause|CLAUSE)\s+\d+(?:\.\d+)*[a-z]?\b
+      | \d{1,3}(?:\.\d{1,3})+\.?(?=\s)
+      | \d{1,3}\.(?=\s+[A-Z])
+      | \((?:[a-z]{1,2}|[A-Z]{1,2}|[ivxlc]{1,5}|[IVXLC]{1,5}|\d{1,2})\)(?=\s)
+    )""",
+    re.VERBOSE,
+)
+# a heading only opens a clause after a finished sentence, a blank line or a title line;
+# otherwise it is a cross-reference wrapped onto the start of a line ("... arising under" / "Section 4.2 hereof")
+BOUNDARY_END_RE = re.compile(r"[.:;]\W*$")
+TITLE_SMALL_WORDS = frozenset("a an and as at by for in of on or the to with".split())
+TITLE_MAX_WORDS = 8
+# page furniture that PDF extraction leaves between clauses
+PAGE_NOISE_RE = re.compile(r"^\s*(?:page\s+\d+(?:\s+of\s+\d+)?|-?\s*\d{1,4}\s*-?)\s*$", re.IGNORECASE)
+SENTENCE_END_RE = re.compile(r"(?<=[.;:])\s+(?=[A-Z(\"])")
+
+MIN_WORDS = 8
+MAX_CHARS = 900
+
+
+def is_heading(line: str) -> bool:
+    return bool(HEADING_RE.match(line))
+
+
+def _is_title(line):
+    """A bare heading line such as "1. Definitions" or "ARTICLE 5 LIMITATION OF LIABILITY"."""
+    match = HEADING_RE.match(line)
+    if not match:
+        return False
+    title = line[match.end():].split()
+    return len(title) <= TITLE_MAX_WORDS and all(
+        not w[0].isalpha() or w[0].isupper() or w in TITLE_SMALL_WORDS for w in title
+    )
+
+
+def _heading_starts(lines):
+    """Indices of the lines that open a new section: headings right after a sentence end, blank line or title."""
+    starts, previous = [], ""
+    for i, line in enumerate(lines):
+        if PAGE_NOISE_RE.match(line) and line.strip():
+            continue
+        if is_heading(line) and (not previous.strip() or BOUNDARY_END_RE.search(previous) or _is_title(previous)):
+            starts.append(i)
+        previous = line
+    return starts
+
+
+def _join(lines):
+    return re.sub(r"\s+", " ", " ".join(lines)).strip()
+
+
+def _split_oversized(text, max_chars):
+    """Split a long section at sentence boundaries (word boundaries as a last resort), without overlap."""
+    if len(text) <= max_chars:
+        return [text]
+    pieces, current = [], ""
+    for sentence in SENTENCE_END_RE.split(text):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _sections(lines):
+    """Group lines into sections, starting a new one at every numbered heading that begins a line of its own."""
+    starts = set(_heading_starts(lines))
+    sections, current = [], []
+    for i, line in enumerate(lines):
+        if not line.strip() or PAGE_NOISE_RE.match(line):
+            continue
+        if i in starts and current:
+            sections.append(current)
+            current = []
+        current.append(line)
+    if current:
+        sections.append(current)
+    return sections
+
+
+def _merge_fragments(texts, min_words):
+    """Fold fragments shorter than `min_words` (bare headings, stray lines) into the next section."""
+    merged, carry = [], ""
+    for text in texts:
+        text = f"{carry} {text}".strip() if carry else text
+        if len(text.split()) < min_words:
+            carry = text
+            continue
+        merged.append(text)
+        carry = ""
+    if carry:
+        if merged:
+            merged[-1] = f"{merged[-1]} {carry}"
+        else:
+            merged.append(carry)
+    return merged
+
+
+def segment_lines(lines, min_words=MIN_WORDS, max_chars=MAX_CHARS):
+    texts = _merge_fragments([_join(sec) for sec in _sections(lines)], min_words)
+    clauses = []
+    for text in texts:
+        clauses.extend(_split_oversized(text, max_chars))
+    return clauses
+
+
+def segment_text(text, min_words=MIN_WORDS, max_chars=MAX_CHARS):
+    """
+    Contract-structure-aware segmentation: splits on numbered headings (1.1, (a),
+    Section 4.2), drops page furniture, merges short fragments and splits overly
+    long sections at sentence boundaries. Clauses never overlap.
+    """
+    return segment_lines(text.splitlines(), min_words=min_words, max_chars=max_chars)
+
+
+def split_complete(lines, min_words=MIN_WORDS):
+    """
+    For streaming: return (complete_lines, pending_lines). Pending starts at the last
+    heading seen — that section may still continue on the next page — and also takes
+    any short sections right before it, which would otherwise be merged forward.
+    """
+    headings = [i for i in _heading_starts(lines) if i > 0]
+    if not headings:
+        return [], lines
+    cut = headings.pop()
+    while headings and len(_join(lines[headings[-1]:cut]).split()) < min_words:
+        cut = headings.pop()
+    if not headings and len(_join(lines[:cut]).split()) < min_words:
+        # everything before the cut is one short section, which merges into the pending one
+        return [], lines
+    return lines[:cut], lines[cut:]
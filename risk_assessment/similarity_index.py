@@ -0,0 +1,256 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+import numpy as np
+
+
+# ---------------- Shingling ----------------
+# what varies between otherwise identical clauses is masked before shingling: company
+# names (capitalised words ending in a corporate suffix), numbers, amounts and dates
+_PARTY_RE = re.compile(
+    r"\b(?!(?:The|This|That|Each|Such|Any|Either|Neither)\b)(?:[A-Z][\w&'-]*\s+){1,5}"
+    r"(?:Inc|Incorporated|Corp|Corporation|Co|Company|Ltd|Limited|LLC|LLP|LP|PLC|plc|GmbH|AG|SA|S\.A|BV|B\.V|NV|Pty|Pvt)\b\.?"
+)
+_WORD_RE = re.compile(r"[a-z0-9]+(?:['’,./:-][a-z0-9]+)*")
+# spelled-out numbers and month names; "may" is left alone since it is mostly the verb
+_NUMBER_WORDS = frozenset(
+    "one two three four five six seven eight nine ten eleven twelve fifteen twenty thirty forty fifty sixty "
+    "ninety hundred thousand million billion january february march april june july august september "
+    "october november december".split()
+)
+# a clause and its negation share almost every shingle, so the negations are compared
+# separately: clauses that differ in them must not reuse each other's analysis
+_NEGATIONS = frozenset("not no never neither nor none nothing without unless except cannot".split())
+
+
+def words(text):
+    """Lower-cased words of the clause with party names, numbers, dates and amounts masked."""
+    text = _PARTY_RE.sub(" party ", text)
+    return ["#" if w[0].isdigit() or w in _NUMBER_WORDS else w for w in _WORD_RE.findall(text.lower())]
+
+
+def polarity(tokens):
+    """Hash of the negations among `tokens` ("won't" counts as "not"); 0 for a clause without any."""
+    found = sorted("not" if w.endswith(("n't", "n’t")) else w for w in tokens
+                   if w in _NEGATIONS or w.endswith(("n't", "n’t")))
+    return zlib.crc32(" ".join(found).encode("utf-8"))
+
+
+# ---------------- MinHash / LSH Index ----------------
+class SimilarityIndex:
+    """
+    On-disk MinHash/LSH index of analyzed clauses for reuse across contracts.
+
+    Each clause is reduced to a MinHash signature of its word shingles; the signature is
+    cut into `bands` bands and every band is hashed to one bucket key, so a lookup is a
+    single indexed query for the clause's bucket keys plus a signature comparison against
+    the candidates that share the most bands. The bucket keys also hash the clause's
+    negations, so a clause is never matched with one that negates it differently ("shall
+    not transfer" vs. "shall transfer"). Only candidates whose estimated Jaccard
+    similarity reaches `threshold` are returned. The default 16 bands of 8 rows find
+    ~99% of pairs at 0.85 similarity and few below 0.6; lower thresholds want shorter
+    bands. Rows written under a different prompt version or index layout are purged, and
+    the index is kept under `max_entries` by evicting the oldest rows.
+    """
+
+    def __init__(self, path, prompt_version, threshold=0.85, num_perm=128, bands=16, shingle_size=3,
+                 max_entries=500000, max_candidates=32, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = path
+        # signatures are only comparable under the same hash parameters
+        self.prompt_version = f"{prompt_version}:{num_perm}x{bands}:{shingle_size}:{seed}:polarity"
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+        self.max_candidates = max_candidates
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # multiply-shift hash family: h_i(x) = (a_i * x + b_i) mod 2**64 >> 32, with odd a_i;
+        # shingles and bands are hashed as sums of their parts times random odd multipliers
+        rng = np.random.default_rng(seed)
+
+        def odd(n):
+            return rng.integers(0, 2 ** 63, size=n, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+        self._a = odd(num_perm)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self._shingle_mult = odd(shingle_size)
+        self._band_mult = odd(self.rows)
+        self._band_salt = rng.integers(0, 2 ** 63, size=bands, dtype=np.uint64)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    # connection is opened lazily so importing the analyzer never touches the disk
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS clause_signature (
+                    id INTEGER PRIMARY KEY,
+                    text_hash TEXT NOT NULL UNIQUE,
+                    model TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    signature BLOB NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            # clustered on the bucket key, so a lookup reads only the matching rows
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS lsh_bucket (
+                    bucket INTEGER NOT NULL,
+                    clause_id INTEGER NOT NULL,
+                    PRIMARY KEY (bucket, clause_id)
+                ) WITHOUT ROWID
+                """
+            )
+            self._purge_stale()
+            self._conn.commit()
+        return self._conn
+
+    def _purge_stale(self):
+        cur = self._conn.execute(
+            "DELETE FROM clause_signature WHERE prompt_version != ?", (self.prompt_version,)
+        )
+        if cur.rowcount > 0:
+            self.evictions += cur.rowcount
+            self._conn.execute("DELETE FROM lsh_bucket WHERE clause_id NOT IN (SELECT id FROM clause_signature)")
+
+    def signature(self, text):
+        """MinHash signature of the word shingles of `text` as `num_perm` uint32 values."""
+        return self._signature(words(text))
+
+    def _signature(self, tokens):
+        if not tokens:
+            return None
+        hashed = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in tokens), dtype=np.uint64, count=len(tokens))
+        size = min(self.shingle_size, len(tokens))
+        count = len(tokens) - size + 1
+        with np.errstate(over="ignore"):
+            grams = np.zeros(count, dtype=np.uint64)
+            for j in range(size):
+                grams += hashed[j:j + count] * self._shingle_mult[j]
+            mixed = (self._a[:, None] * grams[None, :] + self._b[:, None]) >> np.uint64(32)
+        return mixed.min(axis=1).astype(np.uint32)
+
+    def _buckets(self, signature, negations=0):
+        """One non-negative 63-bit bucket key per band (the band number and `negations` are part of the hash)."""
+        with np.errstate(over="ignore"):
+            rows = signature.reshape(self.bands, self.rows).astype(np.uint64)
+            keys = (rows * self._band_mult).sum(axis=1, dtype=np.uint64) + self._band_salt + np.uint64(2 * negations)
+        return (keys >> np.uint64(1)).tolist()
+
+    def lookup(self, text):
+        """
+        Return `(similarity, result)` for the most similar indexed clause at or above the
+        threshold, or None.
+        """
+        tokens = words(text)
+        signature = self._signature(tokens)
+        if signature is None:
+            return None
+        buckets = self._buckets(signature, polarity(tokens))
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(
+                "SELECT signature, result FROM clause_signature WHERE id IN ("
+                f"SELECT clause_id FROM lsh_bucket WHERE bucket IN ({','.join('?' * len(buckets))}) "
+                "GROUP BY clause_id ORDER BY COUNT(*) DESC LIMIT ?)",
+                buckets + [self.max_candidates],
+            ).fetchall()
+            best = None
+            for blob, result in rows:
+                similarity = float(np.count_nonzero(np.frombuffer(blob, dtype=np.uint32) == signature)) / self.num_perm
+                if similarity >= self.threshold and (best is None or similarity > best[0]):
+                    best = (similarity, result)
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return best[0], json.loads(best[1])
+
+    def add_many(self, items, model):
+        """Index `(clause_text, result)` pairs produced by `model`; an already indexed text gets the new result."""
+        prepared = []
+        for text, result in items:
+            tokens = words(text)
+            signature = self._signature(tokens)
+            if signature is not None:
+                text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+                prepared.append((text_hash, signature, polarity(tokens), result))
+        if not prepared:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            for text_hash, signature, negations, result in prepared:
+                # same text, same signature and buckets: only the stored analysis changes
+                cur = conn.execute(
+                    "UPDATE clause_signature SET model = ?, result = ?, created_at = ? WHERE text_hash = ?",
+                    (model, json.dumps(result), now, text_hash),
+                )
+                if cur.rowcount:
+                    continue
+                cur = conn.execute(
+                    "INSERT INTO clause_signature "
+                    "(text_hash, model, prompt_version, signature, result, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (text_hash, model, self.prompt_version, signature.tobytes(), json.dumps(result), now),
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO lsh_bucket (bucket, clause_id) VALUES (?, ?)",
+                    [(key, cur.lastrowid) for key in self._buckets(signature, negations)],
+                )
+            self._evict_oldest()
+            conn.commit()
+
+    def _evict_oldest(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM clause_signature").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        # evict 5% past the limit at once so the bucket cleanup does not run on every insert
+        overflow = count - int(self.max_entries * 0.95)
+        cutoff = self._conn.execute(
+            "SELECT id FROM clause_signature ORDER BY id LIMIT 1 OFFSET ?", (overflow - 1,)
+        ).fetchone()[0]
+        self._conn.execute("DELETE FROM clause_signature WHERE id <= ?", (cutoff,))
+        self._conn.execute("DELETE FROM lsh_bucket WHERE clause_id <= ?", (cutoff,))
+        self.evictions += overflow
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM clause_signature").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM clause_signature")
+            conn.execute("DELETE FROM lsh_bucket")
+            conn.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,79 @@
+import json
+
+
+# ---------------- Incremental JSON Array Parser ----------------
+class JSONArrayStreamParser:
+    """
+    Incremental parser for a JSON array of objects arriving in chunks (e.g. a streamed
+    LLM completion). `feed` returns every top-level object completed by the new chunk,
+    so callers can act on each clause before the response has finished. Text before the
+    opening '[' (prose, ```json fences) is skipped, and a truncated tail simply never
+    produces an object.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._obj_start = None
+
+    def feed(self, chunk):
+        if not chunk:
+            return []
+        self._buffer += chunk
+        objects = []
+        buf = self._buffer
+        i = self._pos
+
+        while i < len(buf):
+            ch = buf[i]
+            if not self._started:
+                if ch == "[":
+                    self._started = True
+                i += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 0 and ch == "{":
+                    self._obj_start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    # closing bracket of the outer array
+                    self._started = False
+                else:
+                    self._depth -= 1
+                    if self._depth == 0 and self._obj_start is not None:
+                        try:
+                            obj = json.loads(buf[self._obj_start:i + 1])
+                            if isinstance(obj, dict):
+                                objects.append(obj)
+                        except ValueError:
+                            pass
+                        self._obj_start = None
+            i += 1
+
+        # drop consumed text so long streams don't grow the buffer
+        keep_from = self._obj_start if self._obj_start is not None else i
+        self._buffer = buf[keep_from:]
+        self._pos = i - keep_from
+        if self._obj_start is not None:
+            self._obj_start = 0
+        return objects
+
+
+def parse_complete_objects(content):
+    """All complete objects in a (possibly truncated or malformed) JSON array."""
+    return JSONArrayStreamParser().feed(content or "")
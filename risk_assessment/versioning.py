@@ -0,0 +1,131 @@
+from difflib import SequenceMatcher
+
+from risk_assessment.analyze_clauses import analyze_all_batches, clean_clause_text, normalize_risk_score
+from risk_assessment.metrics import metrics
+
+# a replaced clause counts as a modification of the old one at or above this similarity,
+# otherwise as a new clause (and the old one as deleted)
+MODIFIED_MIN_RATIO = 0.5
+
+RISK_LEVELS = ("High", "Medium", "Low")
+
+
+# ---------------- Clause Alignment ----------------
+def align_clauses(old_clauses, new_clauses):
+    """
+    Align two versions of a contract clause by clause with a sequence diff.
+
+    Returns `(change, old_index, new_index)` tuples in new-version order, with the
+    deletions after them; `change` is "unchanged", "modified", "inserted" (old_index
+    None) or "deleted" (new_index None).
+    """
+    old = [clean_clause_text(cl) for cl in old_clauses]
+    new = [clean_clause_text(cl) for cl in new_clauses]
+    changes, deleted = [], []
+    matcher = SequenceMatcher(None, old, new, autojunk=False)
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op == "equal":
+            changes.extend(("unchanged", i1 + k, j1 + k) for k in range(i2 - i1))
+            continue
+        unmatched = list(range(i1, i2))
+        for j in range(j1, j2):
+            # pair each new clause with the most similar old clause left in the block
+            best, best_ratio = None, MODIFIED_MIN_RATIO
+            for i in unmatched:
+                pair = SequenceMatcher(None, old[i], new[j], autojunk=False)
+                if pair.real_quick_ratio() >= best_ratio and pair.quick_ratio() >= best_ratio:
+                    ratio = pair.ratio()
+                    if ratio >= best_ratio:
+                        best, best_ratio = i, ratio
+            if best is None:
+                changes.append(("inserted", None, j))
+            else:
+                unmatched.remove(best)
+                changes.append(("modified", best, j))
+        deleted.extend(("deleted", i, None) for i in unmatched)
+    return changes + deleted
+
+
+# ---------------- Incremental Re-analysis ----------------
+def analyze_revision(old_clauses, old_results, new_clauses, start_id=1, **kwargs):
+    """
+    Analyze a revised version of a contract, sending only inserted and modified clauses
+    to analyze_all_batches (`kwargs` are passed through). Unchanged clauses carry their
+    previous result forward under their new Clause ID. Clause IDs are `start_id` +
+    position in either version, as in analyze_all_batches.
+
+    Returns (results, changes) where `changes` is the alignment from align_clauses.
+    """
+    changes = align_clauses(old_clauses, new_clauses)
+    old_by_id = {res["Clause ID"]: res for res in old_results or []}
+
+    results, todo = [], []
+    for change, i, j in changes:
+        if change == "deleted":
+            continue
+        previous = old_by_id.get(start_id + i) if change == "unchanged" else None
+        if previous is not None:
+            results.append({**previous, "Clause ID": start_id + j, "Analysis Source": "Previous version"})
+        else:
+            todo.append(j)
+
+    if todo:
+        results.extend(analyze_all_batches(
+            [new_clauses[j] for j in todo], clause_ids=[start_id + j for j in todo], **kwargs
+        ))
+    metrics.incr("revision_carried", len(results) - len(todo))
+    metrics.incr("revision_analyzed", len(todo))
+
+    results.sort(key=lambda x: x["Clause ID"])
+    return results, changes
+
+
+# ---------------- Risk Delta ----------------
+def _score(res):
+    return int(normalize_risk_score(res.get("Risk Score")).rstrip("%")) if res else None
+
+
+def risk_delta(old_results, new_results, changes, start_id=1):
+    """
+    Compare the risk profile of two analyzed versions.
+
+    Returns {"levels": {level: (old, new, delta)}, "average_score": (old, new, delta),
+    "clauses": [...]} where "clauses" lists every inserted, modified or deleted clause
+    and every unchanged one whose assessment moved, with old and new level and score.
+    """
+    def counts(results):
+        return {level: sum(1 for res in results if res.get("Risk Level") == level) for level in RISK_LEVELS}
+
+    def average(results):
+        scores = [_score(res) for res in results]
+        return round(sum(scores) / len(scores), 1) if scores else 0.0
+
+    before, after = counts(old_results), counts(new_results)
+    old_avg, new_avg = average(old_results), average(new_results)
+    old_by_id = {res["Clause ID"]: res for res in old_results}
+    new_by_id = {res["Clause ID"]: res for res in new_results}
+
+    rows = []
+    for change, i, j in changes:
+        old = old_by_id.get(start_id + i) if i is not None else None
+        new = new_by_id.get(start_id + j) if j is not None else None
+        if old is None and new is None:
+            continue
+        if change == "unchanged" and old and new and old.get("Risk Level") == new.get("Risk Level") \
+                and _score(old) == _score(new):
+            continue
+        rows.append({
+            "Change": change.capitalize(),
+            "Old Clause ID": old["Clause ID"] if old else None,
+            "Clause ID": new["Clause ID"] if new else None,
+            "Old Risk Level": old.get("Risk Level") if old else None,
+            "Risk Level": new.get("Risk Level") if new else None,
+            "Score Change": (_score(new) or 0) - (_score(old) or 0),
+            "Contract Clause": (new or old)["Contract Clause"],
+        })
+
+    return {
+        "levels": {level: (before[level], after[level], after[level] - before[level]) for level in RISK_LEVELS},
+        "average_score": (old_avg, new_avg, round(new_avg - old_avg, 1)),
+        "clauses": rows,
+    }
@@ -0,0 +1,25 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+# the analyzer builds its LLM client and caches on import: use the fake backend and a
+# scratch directory, so the tests need no API key and never touch .cache
+_SCRATCH = tempfile.mkdtemp(prefix="risk_assessment_tests_")
+atexit.register(shutil.rmtree, _SCRATCH, True)
+for name, value in {
+    "LLM_BACKEND": "fake",
+    "FAKE_LLM_TIME_SCALE": "0",
+    "ANALYSIS_CACHE_PATH": os.path.join(_SCRATCH, "analysis_cache.sqlite3"),
+    "REWRITE_CACHE_PATH": os.path.join(_SCRATCH, "rewrite_cache.sqlite3"),
+    "SIMILARITY_INDEX_PATH": os.path.join(_SCRATCH, "similarity_index.sqlite3"),
+    "REGULATION_INDEX_PATH": os.path.join(_SCRATCH, "regulation_index.sqlite3"),
+    "RUN_JOURNAL_DIR": os.path.join(_SCRATCH, "runs"),
+    "EXTRACTION_CACHE_DIR": os.path.join(_SCRATCH, "extractions"),
+    "AUTOTUNE_PROFILE_PATH": os.path.join(_SCRATCH, "autotune_profile.json"),
+    "RATE_LIMIT_STATE_PATH": os.path.join(_SCRATCH, "groq_rate_limits.json"),
+}.items():
+    os.environ[name] = value
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+
+from risk_assessment import analysis_cache
+from risk_assessment.analysis_cache import AnalysisCache
+
+MODELS = ["model-a"]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1_000_000.0)
+    monkeypatch.setattr(analysis_cache, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def result(n):
+    return {"Clause ID": n, "Risk Level": "Low"}
+
+
+def test_round_trip_and_stats(tmp_path, clock):
+    cache = AnalysisCache(str(tmp_path / "cache.sqlite3"), "v1")
+    assert cache.get("clause one", MODELS) is None
+    cache.put_many([("clause one", result(1))], "model-a")
+    assert cache.get("clause one", MODELS) == result(1)
+    assert cache.get("clause one", ["model-b"]) is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "evictions": 0, "hit_rate": 0.333}
+
+
+def test_evicts_least_recently_used(tmp_path, clock):
+    cache = AnalysisCache(str(tmp_path / "cache.sqlite3"), "v1", max_entries=2)
+    cache.put_many([("first", result(1))], "model-a")
+    clock.value += 1
+    cache.put_many([("second", result(2))], "model-a")
+    clock.value += 1
+    # reading "first" makes "second" the least recently used entry
+    assert cache.get("first", MODELS) == result(1)
+    clock.value += 1
+    cache.put_many([("third", result(3))], "model-a")
+
+    assert cache.get("second", MODELS) is None
+    assert cache.get("first", MODELS) == result(1)
+    assert cache.get("third", MODELS) == result(3)
+    assert cache.evictions == 1
+
+
+def test_expired_entries_miss_and_are_purged(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = AnalysisCache(path, "v1", ttl_seconds=60)
+    cache.put_many([("old", result(1))], "model-a")
+    clock.value += 30
+    cache.put_many([("new", result(2))], "model-a")
+    clock.value += 45
+
+    assert cache.get("old", MODELS) is None
+    assert cache.get("new", MODELS) == result(2)
+
+    reopened = AnalysisCache(path, "v1", ttl_seconds=60)
+    assert reopened.get("new", MODELS) == result(2)
+    assert reopened.evictions == 1
+
+
+def test_prompt_version_change_purges_entries(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    AnalysisCache(path, "v1").put_many([("clause", result(1)), ("other", result(2))], "model-a")
+
+    cache = AnalysisCache(path, "v2")
+    assert cache.get("clause", MODELS) is None
+    assert cache.evictions == 2
+    # going back does not resurrect the purged rows
+    assert AnalysisCache(path, "v1").get("clause", MODELS) is None
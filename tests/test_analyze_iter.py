@@ -0,0 +1,75 @@
+import pytest
+
+from risk_assessment import analyze_clauses
+from risk_assessment.analyze_clauses import analyze_iter, is_failed_result
+from risk_assessment.backends import FakeBackend
+
+# in document order: routine, riskier, riskiest (by the local risk prior), then boilerplate
+ROUTINE = "The Client will pay all invoices within forty-five days of receipt by bank transfer."
+RISKIER = "Either party may terminate this Agreement on thirty days written notice to the other."
+RISKIEST = "The Supplier shall indemnify the Customer for any misuse of personal data and all resulting fines."
+RECITAL = "WHEREAS, the Buyer wishes to purchase the Products from the Seller on the terms below."
+CLAUSES = [ROUTINE, RISKIER, RISKIEST, RECITAL]
+
+
+@pytest.fixture(params=[0.0])
+def client(request):
+    client = FakeBackend(base_latency=0, seconds_per_token=0, contention=0, latency="constant", time_scale=0,
+                         seed=1, malformed_rate=request.param)
+    previous = analyze_clauses.set_backend(client)
+    yield client
+    analyze_clauses.set_backend(previous)
+
+
+def emitted(priority):
+    return [res["Contract Clause"] for res in
+            analyze_iter(CLAUSES, max_workers=1, batch_size=1, refresh=True, priority=priority)]
+
+
+def test_riskiest_clauses_come_first(client):
+    # the pre-screened recital costs nothing and is reported at once
+    assert emitted(priority=True) == [RECITAL, RISKIEST, RISKIER, ROUTINE]
+
+
+def test_document_order_without_priority(client):
+    assert emitted(priority=False) == [RECITAL, ROUTINE, RISKIER, RISKIEST]
+
+
+@pytest.mark.parametrize("client", [0.4], indirect=True)
+def test_every_clause_is_emitted_once_with_its_final_result(client):
+    clauses = [f"The Supplier shall indemnify the Customer against penalties under order {i}." for i in range(12)]
+    results = list(analyze_iter(clauses, max_workers=2, batch_size=3, refresh=True))
+    # some clauses failed their first request and were only settled by the retry round
+    assert client.faults["malformed"] > 0
+    assert sorted(res["Clause ID"] for res in results) == list(range(1, 13))
+    assert not any(is_failed_result(res) for res in results)
+
+
+def fake_run(streamed, final):
+    def analyze_all_batches(clauses, on_clause=None, **kwargs):
+        for res in streamed:
+            on_clause(res)
+        return final
+    return analyze_all_batches
+
+
+def test_results_that_changed_after_streaming_are_emitted_again(monkeypatch):
+    first = {"Clause ID": 1, "Risk Level": "Medium"}
+    second = {"Clause ID": 2, "Risk Level": "Low"}
+    revised = {"Clause ID": 1, "Risk Level": "High"}
+    never_streamed = {"Clause ID": 3, "Risk Level": "Low"}
+    monkeypatch.setattr(analyze_clauses, "analyze_all_batches",
+                        fake_run([first, second], [revised, dict(second), never_streamed]))
+    assert list(analyze_iter(["a", "b", "c"])) == [first, second, revised, never_streamed]
+
+
+def test_errors_are_raised_from_the_iterator(monkeypatch):
+    def analyze_all_batches(clauses, on_clause=None, **kwargs):
+        on_clause({"Clause ID": 1, "Risk Level": "Low"})
+        raise RuntimeError("backend down")
+
+    monkeypatch.setattr(analyze_clauses, "analyze_all_batches", analyze_all_batches)
+    results = analyze_iter(["a"])
+    assert next(results)["Clause ID"] == 1
+    with pytest.raises(RuntimeError, match="backend down"):
+        next(results)
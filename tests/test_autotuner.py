@@ -0,0 +1,24 @@
+from benchmarks.synthetic import synthetic_contract_text
+from risk_assessment.autotuner import Autotuner, tune_offline
+from risk_assessment.backends import FakeBackend
+from risk_assessment.batch_planner import max_batch_clauses
+from risk_assessment.extract_pdf import split_text_into_clauses
+
+# a model with known limits and one falling back to the (smaller) default limits
+MODELS = ["llama-3.3-70b-versatile", "not-a-listed-model"]
+
+
+def test_best_batch_size_is_one_the_planner_can_produce(tmp_path):
+    text = "\n".join(line for page in synthetic_contract_text(2) for line in page)
+    clauses = split_text_into_clauses(text)
+    # requests cost the same whatever their size, so the search climbs to the largest batches
+    backend = FakeBackend(base_latency=1.0, seconds_per_token=0, contention=0, latency="constant",
+                          time_scale=0.001, truncation_tokens=10 ** 6)
+    tuner = Autotuner(str(tmp_path / "profile.json"), min_requests=2)
+
+    chosen = tune_offline(clauses, MODELS, tuner, backend=backend, trial_clauses=24, log=lambda line: None)
+    for model in MODELS:
+        assert chosen[model] is not None
+        assert chosen[model]["batch_size"] <= max_batch_clauses([model])
+        assert all(row["batch_size"] <= max_batch_clauses([model]) for row in tuner.summary(model))
+    assert chosen["llama-3.3-70b-versatile"]["batch_size"] == 24
@@ -0,0 +1,24 @@
+from config import DEFAULT_MODEL_LIMITS
+from risk_assessment.batch_planner import MIN_MAX_TOKENS, estimate_input_tokens, max_tokens_for, plan_batches_by_id
+
+# not in MODEL_LIMITS: planned with the default (8k context) limits
+MODEL = "not-a-listed-model"
+CLAUSE = "a" * 4000
+
+
+def test_max_tokens_never_exceeds_the_room_left_in_the_context():
+    prompt_tokens = DEFAULT_MODEL_LIMITS["context"] - estimate_input_tokens(CLAUSE) - 300
+    assert max_tokens_for([CLAUSE], MODEL, prompt_tokens) == 300
+
+
+def test_max_tokens_is_at_least_the_floor_when_there_is_room():
+    assert max_tokens_for([CLAUSE], MODEL) == MIN_MAX_TOKENS
+
+
+def test_planner_splits_batches_that_leave_less_than_the_floor():
+    # both clauses plus their estimated output fit, but not with MIN_MAX_TOKENS of completion
+    prompt_tokens = DEFAULT_MODEL_LIMITS["context"] - 2 * estimate_input_tokens(CLAUSE) - (MIN_MAX_TOKENS - 7)
+    batches = plan_batches_by_id([CLAUSE, CLAUSE], [1, 2], models=[MODEL], prompt_tokens=prompt_tokens)
+    assert [ids for _, ids in batches] == [[1], [2]]
+    for batch, _ in batches:
+        assert max_tokens_for(batch, MODEL, prompt_tokens) == MIN_MAX_TOKENS
@@ -0,0 +1,59 @@
+import pytest
+
+from risk_assessment import analyze_clauses
+from risk_assessment.backends import FakeBackend
+from risk_assessment.batch_planner import estimate_input_tokens, estimate_request_tokens
+
+# the fake backend rates these High, Medium and Low, the triage pass with 90% confidence
+HIGH = "The Supplier shall indemnify the Customer for any misuse of personal data processed under this Agreement."
+MEDIUM = "The Receiving Party shall keep the data confidential and notify the Disclosing Party of any breach."
+LOW = "The Customer may audit the data processing records of the Supplier once per year on thirty days notice."
+CLAUSES = [HIGH, MEDIUM, LOW]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # nothing served from the cache or the similarity index: every clause is triaged
+    monkeypatch.setattr(analyze_clauses, "_prior_result", lambda clause, clause_id: None)
+    client = FakeBackend(base_latency=0, seconds_per_token=0, contention=0, latency="constant", time_scale=0)
+    previous = analyze_clauses.set_backend(client)
+    yield client
+    analyze_clauses.set_backend(previous)
+
+
+def test_risky_clauses_are_escalated_and_confident_lows_stay_on_triage(client):
+    results, _ = analyze_clauses.analyze_cascade(CLAUSES, max_workers=1)
+    by_source = {res["Contract Clause"]: res["Analysis Source"] for res in results}
+    assert by_source == {HIGH: "LLM", MEDIUM: "LLM", LOW: "Triage"}
+
+    triaged = results[2]
+    assert triaged["Risk Level"] == "Low"
+    # "None" is what the regulation index skips; the source marks the triage
+    assert triaged["Regulation"] == "None"
+    assert [res["Risk Level"] for res in results[:2]] == ["High", "Medium"]
+
+
+def test_low_confidence_lows_are_escalated(client, monkeypatch):
+    monkeypatch.setattr(analyze_clauses, "CASCADE_MIN_CONFIDENCE", 95)
+    results, report = analyze_clauses.analyze_cascade(CLAUSES, max_workers=1)
+    assert report["escalated"] == 3
+    assert all(res["Analysis Source"] == "LLM" for res in results)
+
+
+def test_report_counts_the_calls_and_tokens_of_both_tiers(client):
+    _, report = analyze_clauses.analyze_cascade(CLAUSES, max_workers=1)
+    assert (report["clauses"], report["triaged"], report["escalated"]) == (3, 3, 2)
+    assert (report["prescreened"], report["cached"], report["reused"], report["resumed"]) == (0, 0, 0, 0)
+
+    # one triage request for all three, one escalation request for the two risky clauses
+    assert report["calls"] == {"cascade": 2, "single_tier": 1, "saved": -1}
+    assert client.calls == 2
+
+    prompt = analyze_clauses.PROMPT_TOKENS
+    triage = analyze_clauses.TRIAGE_PROMPT_TOKENS + sum(
+        estimate_input_tokens(cl) + analyze_clauses.TRIAGE_OUTPUT_TOKENS for cl in CLAUSES
+    )
+    tokens = report["tokens"]
+    assert tokens["single_tier"] == estimate_request_tokens(CLAUSES, prompt)
+    assert tokens["cascade"] == triage + estimate_request_tokens([HIGH, MEDIUM], prompt)
+    assert tokens["saved"] == tokens["single_tier"] - tokens["cascade"]
@@ -0,0 +1,63 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from benchmarks.synthetic import write_synthetic_pdf
+from risk_assessment import extract_pdf
+from risk_assessment.extract_pdf import extract_clauses, extract_clauses_cached, extract_text
+from risk_assessment.extraction_cache import ExtractionCache
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    """Process pools started by the extraction (a small PDF is enough to use one)."""
+    started = []
+
+    class RecordingPool(ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            started.append(self)
+
+    monkeypatch.setattr(extract_pdf, "PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(extract_pdf, "ProcessPoolExecutor", RecordingPool)
+    return started
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    return write_synthetic_pdf(str(tmp_path / "contract.pdf"), 6)
+
+
+def test_parallel_text_matches_serial_for_every_source(pdf_path, pools):
+    with open(pdf_path, "rb") as f:
+        pdf_bytes = f.read()
+    serial = extract_text(pdf_path)
+    assert extract_text(pdf_path, workers=3) == serial
+    assert extract_text(pdf_bytes, workers=3) == serial
+    with open(pdf_path, "rb") as f:
+        f.read(10)  # a partly read upload is read again from the start
+        assert extract_text(f, workers=3) == serial
+    assert len(pools) == 3
+
+
+def test_small_documents_stay_in_process(pdf_path, pools, monkeypatch):
+    monkeypatch.setattr(extract_pdf, "PARALLEL_MIN_PAGES", 40)
+    assert extract_text(pdf_path, workers=3) == extract_text(pdf_path)
+    assert pools == []
+
+
+@pytest.mark.parametrize("splitter", ["recursive", "structure"])
+def test_parallel_clauses_match_serial(pdf_path, pools, splitter):
+    assert extract_clauses(pdf_path, workers=3, splitter=splitter) == extract_clauses(pdf_path, splitter=splitter)
+
+
+def test_cached_parallel_extraction_matches_serial(pdf_path, pools, tmp_path, monkeypatch):
+    monkeypatch.setattr(extract_pdf, "extraction_cache", ExtractionCache(str(tmp_path / "extractions")))
+    with open(pdf_path, "rb") as f:
+        pdf_bytes = f.read()
+    serial = extract_clauses(pdf_bytes)
+    assert extract_clauses_cached(pdf_bytes, workers=3) == serial
+    assert len(pools) == 1
+    # the cache entry is shared with serial extraction
+    assert extract_clauses_cached(pdf_bytes) == serial
+    assert len(pools) == 1
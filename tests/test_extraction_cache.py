@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from benchmarks.synthetic import write_synthetic_pdf
+from risk_assessment import extract_pdf
+from risk_assessment.extract_pdf import extract_clauses_cached, extraction_key
+from risk_assessment.extraction_cache import ExtractionCache
+
+
+def test_round_trip_and_stats(tmp_path):
+    cache = ExtractionCache(str(tmp_path))
+    assert cache.get("missing") is None
+    cache.put("key", ["clause one", "clause two"])
+    assert cache.get("key") == ["clause one", "clause two"]
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ExtractionCache(str(tmp_path), max_entries=2)
+    cache.put("first", ["a"])
+    cache.put("second", ["b"])
+    os.utime(tmp_path / "first.json", (100, 100))
+    os.utime(tmp_path / "second.json", (200, 200))
+    # a hit refreshes "first", which leaves "second" the least recently used
+    assert cache.get("first") == ["a"]
+    cache.put("third", ["c"])
+
+    assert sorted(os.listdir(tmp_path)) == ["first.json", "third.json"]
+
+
+def test_key_depends_on_content_and_splitter():
+    assert extraction_key(b"%PDF one") == extraction_key(b"%PDF one")
+    assert extraction_key(b"%PDF one") != extraction_key(b"%PDF two")
+    assert extraction_key(b"%PDF one", "structure") != extraction_key(b"%PDF one", "recursive")
+
+
+@pytest.fixture
+def pdf_bytes(tmp_path, monkeypatch):
+    monkeypatch.setattr(extract_pdf, "extraction_cache", ExtractionCache(str(tmp_path / "extractions")))
+    with open(write_synthetic_pdf(str(tmp_path / "contract.pdf"), 2), "rb") as f:
+        return f.read()
+
+
+def test_cached_extraction_skips_parsing(pdf_bytes, monkeypatch):
+    clauses = extract_clauses_cached(pdf_bytes, splitter="recursive")
+    assert clauses == extract_pdf.extract_clauses(pdf_bytes, splitter="recursive")
+
+    def parse(*args, **kwargs):
+        raise AssertionError("a cached PDF was parsed again")
+
+    monkeypatch.setattr(extract_pdf, "extract_clauses", parse)
+    monkeypatch.setattr(extract_pdf, "iter_clauses", parse)
+    assert extract_clauses_cached(pdf_bytes, splitter="recursive") == clauses
+
+
+def test_streaming_extraction_reports_every_clause(pdf_bytes):
+    seen = []
+    clauses = extract_clauses_cached(pdf_bytes, splitter="structure", on_clause=seen.append)
+    assert seen == clauses == extract_pdf.extract_clauses(pdf_bytes, splitter="structure")
@@ -0,0 +1,119 @@
+import json
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+from config import ModelManager
+from risk_assessment import hedging
+from risk_assessment.analyze_clauses import analysis_messages
+from risk_assessment.backends import FakeBackend
+from risk_assessment.hedging import HedgePolicy, hedged_call
+
+CLAUSE = "The Supplier shall indemnify the Customer against any penalties for export control breaches."
+
+
+def backend(seconds, **faults):
+    return FakeBackend(base_latency=seconds, seconds_per_token=0, contention=0, latency="constant", **faults)
+
+
+def is_valid(content):
+    try:
+        return isinstance(json.loads(content), list)
+    except ValueError:
+        return False
+
+
+@pytest.fixture
+def manager():
+    manager = ModelManager(models=["primary", "secondary"], seed=0)
+    # enough history for a hedge delay of ~50 ms
+    for _ in range(10):
+        for model in manager.models:
+            manager.get_next_model(candidates=[model])
+            manager.record_success(model, 0.05)
+    return manager
+
+
+def run(manager, backends, policy=None):
+    """hedged_call of one clause: "primary" first, "secondary" as the hedge."""
+    def call(model):
+        started = time.perf_counter()
+        response = backends[model].create(model=model, messages=analysis_messages([(1, CLAUSE)]))
+        manager.record_success(model, time.perf_counter() - started)
+        return response.choices[0].message.content
+
+    policy = policy or HedgePolicy(enabled=True, percentile=0.5, min_delay=0.05, max_extra_fraction=1.0)
+    model = manager.get_next_model(candidates=["primary"])
+    content, winner = hedged_call(call, model, lambda: manager.get_next_model(candidates=["secondary"]),
+                                  is_valid, policy, manager)
+    return content, winner, policy
+
+
+def in_flight(manager):
+    return {model: st.in_flight for model, st in manager.stats.items()}
+
+
+def test_fast_primary_is_not_hedged(manager):
+    backends = {"primary": backend(0.001), "secondary": backend(0.001)}
+    content, winner, policy = run(manager, backends)
+    assert winner == "primary" and is_valid(content)
+    assert policy.stats()["fired"] == 0
+    assert backends["secondary"].calls == 0
+    assert in_flight(manager) == {"primary": 0, "secondary": 0}
+
+
+def test_slow_primary_loses_to_the_hedge(manager):
+    backends = {"primary": backend(0.5), "secondary": backend(0.001)}
+    content, winner, policy = run(manager, backends)
+    assert winner == "secondary" and is_valid(content)
+    assert policy.stats()["fired"] == 1 and policy.stats()["won"] == 1
+    # the abandoned primary finishes in the background and is still accounted for
+    time.sleep(0.6)
+    assert backends["primary"].calls == 1
+    assert in_flight(manager) == {"primary": 0, "secondary": 0}
+
+
+def test_two_invalid_answers_fall_back_to_the_first(manager):
+    backends = {"primary": backend(0.3, truncate_rate=1.0), "secondary": backend(0.001, truncate_rate=1.0)}
+    content, winner, policy = run(manager, backends)
+    assert winner == "secondary" and not is_valid(content)
+    assert backends["primary"].calls == backends["secondary"].calls == 1
+    assert policy.stats()["won"] == 0
+
+
+class PrimaryOnlyExecutor:
+    """Runs the first request; later ones stay queued, as behind a busy pool, until cancelled."""
+
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        self.started = False
+        self.queued = []
+
+    def submit(self, fn, *args):
+        if self.started:
+            self.queued.append(Future())
+            return self.queued[-1]
+        self.started = True
+        return self._pool.submit(fn, *args)
+
+
+def test_cancelled_hedge_gives_its_slot_back(manager, monkeypatch):
+    executor = PrimaryOnlyExecutor()
+    monkeypatch.setattr(hedging, "_executor", executor)
+    backends = {"primary": backend(0.2), "secondary": backend(0.001)}
+    content, winner, policy = run(manager, backends)
+    assert winner == "primary" and is_valid(content)
+    assert policy.stats()["fired"] == 1
+    assert backends["secondary"].calls == 0
+    assert [future.cancelled() for future in executor.queued] == [True]
+    assert in_flight(manager) == {"primary": 0, "secondary": 0}
+
+
+def test_released_probe_reopens_the_circuit(manager):
+    st = manager.stats["secondary"]
+    st.state, st.open_until = "open", 0
+    assert manager.get_next_model(candidates=["secondary"]) == "secondary"
+    assert st.state == "half_open" and st.in_flight == 1
+    manager.release("secondary")
+    assert st.state == "open" and st.in_flight == 0
@@ -0,0 +1,118 @@
+import json
+import os
+
+import pytest
+
+import main
+from benchmarks.synthetic import write_synthetic_pdf
+from risk_assessment import analyze_clauses, quick_scan
+from risk_assessment.backends import FakeBackend
+from risk_assessment.regulation_index import RegulationIndex
+
+
+def test_find_contracts(tmp_path):
+    (tmp_path / "nested").mkdir()
+    for name in ("a.pdf", "b.pdf", "notes.txt", "nested/c.pdf"):
+        (tmp_path / name).write_bytes(b"%PDF")
+    found = main.find_contracts([str(tmp_path), str(tmp_path / "a.pdf"), str(tmp_path / "*.pdf")])
+    assert found == sorted(os.path.abspath(tmp_path / name) for name in ("a.pdf", "b.pdf", "nested/c.pdf"))
+
+
+def test_result_path_tells_apart_contracts_with_the_same_name(tmp_path):
+    first = main.result_path(str(tmp_path), "/deals/one/contract.pdf")
+    second = main.result_path(str(tmp_path), "/deals/two/contract.pdf")
+    assert first != second
+    assert os.path.basename(first).startswith("contract-")
+
+
+@pytest.fixture
+def contract(tmp_path):
+    return write_synthetic_pdf(str(tmp_path / "contract.pdf"), 2)
+
+
+def test_completed_contracts_are_skipped(tmp_path, contract):
+    out = str(tmp_path / "out")
+    os.makedirs(out)
+    status, n_clauses = main.process_contract(contract, out, workers=2, extract_workers=1)
+    assert status == "done" and n_clauses > 0
+
+    with open(main.result_path(out, contract), encoding="utf-8") as f:
+        record = json.load(f)
+    assert record["clauses"] == n_clauses == len(record["results"])
+    assert sum(record["summary"].values()) == n_clauses
+    assert main.process_contract(contract, out, workers=2, extract_workers=1) == ("skipped", 0)
+
+    # a changed PDF at the same path is analyzed again
+    write_synthetic_pdf(contract, 3)
+    assert main.process_contract(contract, out, workers=2, extract_workers=1)[0] == "done"
+
+
+def test_quick_scan_writes_a_result_only_when_promoted(tmp_path, contract):
+    out = str(tmp_path / "out")
+    os.makedirs(out)
+    main.process_contract(contract, out, workers=2, extract_workers=1, quick=True, promote=1.01)
+    assert not os.path.exists(main.result_path(out, contract))
+
+    status, n_clauses = main.process_contract(contract, out, workers=2, extract_workers=1, quick=True, promote=0)
+    assert status == "done"
+    with open(main.result_path(out, contract), encoding="utf-8") as f:
+        record = json.load(f)
+    assert [res["Clause ID"] for res in record["results"]] == sorted(res["Clause ID"] for res in record["results"])
+    assert len(record["results"]) == n_clauses
+
+
+def test_promoted_quick_scan_is_resumed_by_a_plain_run(tmp_path, contract, monkeypatch):
+    # no cache or similarity reuse: every clause the journal misses costs a model call
+    monkeypatch.setattr(analyze_clauses, "_prior_result", lambda clause, clause_id: None)
+    monkeypatch.setattr(quick_scan, "_prior_result", lambda clause, clause_id: None)
+    client = FakeBackend(base_latency=0, seconds_per_token=0, contention=0, latency="constant", time_scale=0)
+    previous = analyze_clauses.set_backend(client)
+    try:
+        quick_out, plain_out = str(tmp_path / "quick"), str(tmp_path / "plain")
+        os.makedirs(quick_out)
+        os.makedirs(plain_out)
+        main.process_contract(contract, quick_out, workers=2, extract_workers=1, quick=True, promote=1.01)
+        main.process_contract(contract, quick_out, workers=2, extract_workers=1, quick=True, promote=0)
+        calls = client.calls
+        assert calls > 0
+
+        status, n_clauses = main.process_contract(contract, plain_out, workers=2, extract_workers=1)
+        assert status == "done" and n_clauses > 0
+        assert client.calls == calls
+    finally:
+        analyze_clauses.set_backend(previous)
+
+
+def test_reevaluation_updates_results_in_place_within_the_budget(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "regulation_index", RegulationIndex(str(tmp_path / "regulations.sqlite3")))
+    # one clause per call, so the budget cuts the queue between clauses
+    monkeypatch.setattr(analyze_clauses, "batch_settings", lambda models, max_workers=None: (1, 1))
+    clauses = [
+        # the fake backend rates these High, Medium and Low
+        "The Supplier shall indemnify the Customer for any misuse of personal data processed under this Agreement.",
+        "The Receiving Party shall keep the data confidential and notify the Disclosing Party of any breach.",
+        "The Customer may audit the data processing records of the Supplier once per year on thirty days notice.",
+    ]
+    recorded = [("High", "90%"), ("High", "60%"), ("Low", "10%")]
+    results = [
+        {"Clause ID": cid, "Contract Clause": clause, "Regulation": "GDPR", "Risk Level": level, "Risk Score": score,
+         "Clause Feedback & Fix": "Cap the liability.", "AI-Modified Clause": f"{clause} Liability is capped.",
+         "AI-Modified Risk Level": "Medium"}
+        for cid, (clause, (level, score)) in enumerate(zip(clauses, recorded), 1)
+    ]
+    out = tmp_path / "out"
+    out.mkdir()
+    path = str(out / "contract.json")
+    main.write_record(path, {"contract": "contract.pdf", "sha256": "0", "clauses": 3,
+                             "summary": main.risk_summary(results), "results": results})
+
+    report = main.reevaluate_portfolio(str(out), ["GDPR"], budget=2, workers=1)
+    assert report == {"queued": 3, "reevaluated": 2, "changed": 1, "contracts": 1, "calls": 2}
+
+    record = main.load_record(path)
+    kept, changed, unsent = record["results"]
+    assert kept["Risk Level"] == "High" and kept["AI-Modified Clause"] == results[0]["AI-Modified Clause"]
+    assert changed["Risk Level"] == "Medium" and changed.get("AI-Modified Clause") != results[1]["AI-Modified Clause"]
+    assert unsent == results[2]
+    assert record["summary"] == {"High": 1, "Medium": 1, "Low": 1, "Unknown": 0}
+    assert [cid for _, cid, _ in main.regulation_index.queued()] == [3]
@@ -0,0 +1,124 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import config
+from config import (
+    BREAKER_BASE_COOLDOWN,
+    BREAKER_FAILURE_THRESHOLD,
+    DECOMMISSIONED_COOLDOWN,
+    RATE_LIMIT_COOLDOWN,
+    ModelManager,
+)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, message="request failed"):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(config, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def fail(manager, model, times, error=None):
+    for _ in range(times):
+        manager.get_next_model(candidates=[model])
+        manager.record_failure(model, 1.0, error)
+
+
+def test_faster_model_gets_most_of_the_traffic():
+    manager = ModelManager(models=["fast", "slow"], seed=0)
+    latency = {"fast": 0.5, "slow": 5.0}
+    picks = []
+    for _ in range(300):
+        model = manager.get_next_model()
+        manager.record_success(model, latency[model])
+        picks.append(model)
+    assert picks[100:].count("fast") > 0.9 * 200
+    assert all(st.in_flight == 0 for st in manager.stats.values())
+
+
+def test_consecutive_failures_open_the_circuit_until_a_probe_succeeds(clock):
+    manager = ModelManager(models=["flaky", "steady"], seed=0)
+    fail(manager, "flaky", BREAKER_FAILURE_THRESHOLD - 1)
+    assert manager.stats["flaky"].state == "closed"
+    fail(manager, "flaky", 1)
+    assert manager.stats["flaky"].state == "open"
+    assert manager.available_models() == ["steady"]
+    assert {manager.get_next_model() for _ in range(20)} == {"steady"}
+
+    clock[0] += BREAKER_BASE_COOLDOWN
+    assert manager.get_next_model() == "flaky"
+    assert manager.stats["flaky"].state == "half_open"
+    # one probe at a time
+    assert manager.get_next_model() == "steady"
+    manager.record_success("flaky", 1.0)
+    assert manager.stats["flaky"].state == "closed"
+
+
+def test_failed_probe_reopens_with_a_longer_cooldown(clock):
+    manager = ModelManager(models=["flaky", "steady"], seed=0)
+    fail(manager, "flaky", BREAKER_FAILURE_THRESHOLD)
+    clock[0] += BREAKER_BASE_COOLDOWN
+    assert manager.get_next_model() == "flaky"
+    manager.record_failure("flaky", 1.0)
+
+    st = manager.stats["flaky"]
+    assert st.state == "open"
+    assert st.open_until - clock[0] == 2 * BREAKER_BASE_COOLDOWN
+
+
+def test_unparseable_responses_count_as_failures():
+    manager = ModelManager(models=["garbled", "steady"], seed=0)
+    for _ in range(BREAKER_FAILURE_THRESHOLD):
+        manager.get_next_model(candidates=["garbled"])
+        manager.record_success("garbled", 1.0, parse_ok=False)
+    assert manager.stats["garbled"].state == "open"
+    assert manager.stats["garbled"].parse_failures == BREAKER_FAILURE_THRESHOLD
+
+
+@pytest.mark.parametrize("error, cooldown", [
+    (StatusError(429), RATE_LIMIT_COOLDOWN),
+    (Exception("Rate limit reached for model"), RATE_LIMIT_COOLDOWN),
+    (StatusError(404), DECOMMISSIONED_COOLDOWN),
+    (Exception("The model has been decommissioned"), DECOMMISSIONED_COOLDOWN),
+])
+def test_rate_limits_and_retired_models_open_the_circuit_at_once(clock, error, cooldown):
+    manager = ModelManager(models=["model", "other"], seed=0)
+    fail(manager, "model", 1, error)
+    st = manager.stats["model"]
+    assert st.state == "open" and st.open_until - clock[0] == cooldown
+
+
+def test_all_circuits_open_falls_back_to_the_soonest_to_recover(clock):
+    manager = ModelManager(models=["a", "b"], seed=0)
+    fail(manager, "a", 1, StatusError(404))
+    fail(manager, "b", 1, StatusError(429))
+    assert manager.get_next_model() == "b"
+
+
+def test_concurrent_routing_keeps_the_counts_consistent():
+    manager = ModelManager(models=["a", "b", "c"], seed=0)
+
+    def worker():
+        for i in range(200):
+            model = manager.get_next_model()
+            if i % 10:
+                manager.record_success(model, 0.1)
+            else:
+                manager.record_failure(model, 0.1)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sum(st.requests for st in manager.stats.values()) == 8 * 200
+    assert sum(st.failures for st in manager.stats.values()) == 8 * 20
+    assert all(st.in_flight == 0 for st in manager.stats.values())
@@ -0,0 +1,78 @@
+import pytest
+
+from benchmarks.bench_prescreen import evaluate, load_samples
+from risk_assessment import analyze_clauses
+from risk_assessment.analyze_clauses import REGULATION_LIST
+from risk_assessment.backends import FakeBackend
+from risk_assessment.prescreen import KeywordMatcher, PreScreener
+
+
+@pytest.fixture(scope="module")
+def screener():
+    return PreScreener(REGULATION_LIST)
+
+
+def test_labelled_samples(screener):
+    report = evaluate(screener, load_samples())
+    # a substantive clause is never scored without the model
+    assert report["skipped_wrong"] == 0
+    assert report["skip_recall"] >= 0.9
+    assert report["tag_precision"] == report["tag_recall"] == 1.0
+
+
+@pytest.mark.parametrize("text, kind", [
+    ("IN WITNESS WHEREOF, the parties have executed this Agreement as of the Effective Date.", "signature block"),
+    ("By: ____________ Name: John Smith Title: Director", "signature block"),
+    ("Attention: Legal Department Address: 1 Main Street, Springfield Tel: 555 0100", "address block"),
+    ("WHEREAS, the Buyer wishes to purchase the Products from the Seller.", "recital"),
+    ('"Business Day" means a day on which banks are open in London.', "definition"),
+    ("The headings in this Agreement are for reference only.", "boilerplate"),
+])
+def test_non_substantive_chunks_are_skipped(screener, text, kind):
+    assert screener.screen(text) == {"substantive": False, "kind": kind, "regulations": [], "risk_terms": []}
+
+
+@pytest.mark.parametrize("text, reason", [
+    # boilerplate shapes that still carry an obligation, a risk term or a regulation are kept
+    ('"Losses" means all damages for which the Supplier is liable.', "risk_terms"),
+    ("WHEREAS, the Processor will process personal data on behalf of the Controller.", "regulations"),
+    ("Attention: Privacy Officer Email: privacy@acme.com. Notice of any breach shall be given at once.", "risk_terms"),
+    # a plain clause has no boilerplate shape at all
+    ("The Client will pay all invoices within forty-five days of receipt.", "kind"),
+])
+def test_substantive_chunks_are_kept(screener, text, reason):
+    screen = screener.screen(text)
+    assert screen["substantive"]
+    assert (screen["kind"] is None) if reason == "kind" else screen[reason]
+
+
+def test_definitional_shall_is_not_an_obligation(screener):
+    assert not screener.screen('"Territory" shall mean the United States and Canada.')["substantive"]
+    assert screener.screen('"Territory" shall mean the United States, and the Agent shall not sell outside it.')[
+        "substantive"]
+
+
+def test_matcher_respects_word_boundaries_and_prefixes():
+    matcher = KeywordMatcher({"indemnif*": "indemnity", "fine": "fine"})
+    assert [label for _, _, label in matcher.find("Indemnification and fines; indemnify")] == \
+        ["indemnity", "indemnity"]
+    assert [label for _, _, label in matcher.find("A fine of 5%, refined later")] == ["fine"]
+
+
+def test_acronyms_match_case_sensitively(screener):
+    assert screener.tag("Sec. 4 It acts as agent") == []
+    assert screener.tag("The Company shall file reports with the SEC under the IT Act.") == ["SEC", "IT Act"]
+
+
+def test_prescreened_chunks_cost_no_model_call():
+    client = FakeBackend(base_latency=0, seconds_per_token=0, contention=0, latency="constant", time_scale=0)
+    previous = analyze_clauses.set_backend(client)
+    try:
+        results = analyze_clauses.analyze_all_batches([
+            "IN WITNESS WHEREOF, the parties have executed this Agreement as of the Effective Date.",
+            "WHEREAS, the Buyer wishes to purchase the Products from the Seller.",
+        ], max_workers=1, refresh=True)
+    finally:
+        analyze_clauses.set_backend(previous)
+    assert client.calls == 0
+    assert [(res["Risk Level"], res["Analysis Source"]) for res in results] == [("Low", "Pre-screen")] * 2
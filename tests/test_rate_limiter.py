@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+import pytest
+
+from risk_assessment import rate_limiter
+from risk_assessment.rate_limiter import RateLimiter
+
+MODEL = "model-a"
+LIMITS = {MODEL: {"rpm": 60, "tpm": 6000}}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1_000_000.0, slept=[])
+
+    def sleep(seconds):
+        now.slept.append(seconds)
+        now.value += seconds
+
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(time=lambda: now.value, sleep=sleep))
+    return now
+
+
+@pytest.fixture
+def limiter(tmp_path, clock):
+    return RateLimiter(str(tmp_path / "limits.json"), limits=LIMITS)
+
+
+def bucket(limiter):
+    return limiter._load()[MODEL]
+
+
+def test_full_bucket_does_not_wait(limiter):
+    assert limiter.acquire(MODEL, 1000) == 0
+    assert bucket(limiter)["tokens"] == 5000
+    assert bucket(limiter)["requests"] == 59
+
+
+def test_tokens_refill_over_time(limiter, clock):
+    limiter.acquire(MODEL, 6000)
+    assert bucket(limiter)["tokens"] == 0
+    # 6000 tokens per minute: 1500 are back after 15 seconds
+    clock.value += 15
+    assert limiter.acquire(MODEL, 1500) == 0
+    assert bucket(limiter)["tokens"] == pytest.approx(0)
+
+
+def test_waits_for_missing_tokens(limiter, clock):
+    limiter.acquire(MODEL, 6000)
+    waited = limiter.acquire(MODEL, 300)
+    # 300 tokens at 100 per second
+    assert waited == pytest.approx(3.0)
+    assert all(wait <= 5.0 for wait in clock.slept)
+
+
+def test_request_larger_than_the_bucket_waits_for_a_full_bucket(limiter):
+    assert limiter.acquire(MODEL, 10000) == 0
+    assert bucket(limiter)["tokens"] == 0
+
+
+def test_rate_limited_response_drains_the_buckets(limiter, clock):
+    limiter.on_rate_limited(MODEL)
+    assert bucket(limiter)["requests"] == 0
+    assert bucket(limiter)["tokens"] == 0
+    # one request per second comes back at 60 rpm, the tokens at 100 per second
+    assert limiter.acquire(MODEL, 100) == pytest.approx(1.0)
+    assert limiter.acquire(MODEL, 6000) == pytest.approx(60.0)
+
+
+def test_limiters_on_the_same_state_file_share_the_budget(limiter):
+    other = RateLimiter(limiter.state_path, limits=LIMITS)
+    other.acquire(MODEL, 4000)
+    assert limiter.acquire(MODEL, 2000) == 0
+    assert bucket(limiter)["tokens"] == 0
+
+
+def test_reconcile_refunds_what_acquire_took(limiter):
+    limiter.acquire(MODEL, 2000)
+    limiter.reconcile(MODEL, 2000, 500)
+    assert bucket(limiter)["tokens"] == 5500
+    # an underestimate is charged on top
+    limiter.acquire(MODEL, 500)
+    limiter.reconcile(MODEL, 500, 1500)
+    assert bucket(limiter)["tokens"] == 4000
+
+
+def test_reconcile_of_an_oversized_request_is_clamped(limiter):
+    limiter.acquire(MODEL, 10000)
+    limiter.reconcile(MODEL, 10000, 1000)
+    assert bucket(limiter)["tokens"] == 5000
+    limiter.reconcile(MODEL, 10000, 0)
+    assert bucket(limiter)["tokens"] == 6000
@@ -0,0 +1,30 @@
+from risk_assessment.analyze_clauses import _normalize_one
+from risk_assessment.regulation_index import RegulationIndex
+from risk_assessment.regulations import CODE_TABLE, expand_regulations
+
+
+def test_codes_expand_to_full_names():
+    assert expand_regulations("GDPR, CPS 234") == "GDPR, APRA CPS 234"
+    assert expand_regulations(["pipl", "Bank Secrecy Act"]) == "China PIPL, Bank Secrecy Act"
+    assert expand_regulations("Local Ordinance 12") == "Local Ordinance 12"
+
+
+def test_group_prefixed_answers_are_expanded():
+    assert expand_regulations("EU: GDPR, US: CCPA") == "GDPR, CCPA"
+    assert expand_regulations("AU: CPS 234") == "APRA CPS 234"
+    assert expand_regulations("Standards: SOC 2; cn: PIPL") == "SOC 2, China PIPL"
+    assert expand_regulations("EU: GDPR, GDPR") == "GDPR"
+    # a prefix that is not one of the codebook's groups is part of the name
+    assert expand_regulations("Foo: Bar") == "Foo: Bar"
+    assert CODE_TABLE.startswith("EU: GDPR, ")
+
+
+def test_prefixed_answer_is_indexed_under_the_full_name(tmp_path):
+    result = _normalize_one({"Regulation": "AU: CPS 234, EU: GDPR", "Risk Level": "High", "Risk Score": "80%"},
+                            "The Supplier shall store customer data in Australia.", 7)
+    assert result["Regulation"] == "APRA CPS 234, GDPR"
+
+    index = RegulationIndex(str(tmp_path / "regulations.sqlite3"))
+    index.index_contract("contract.json", [result])
+    assert [(contract, cid) for contract, cid, _ in index.affected(["APRA CPS 234"])] == [("contract.json", 7)]
+    assert index.affected(["AU: CPS 234"]) == []
@@ -0,0 +1,76 @@
+from risk_assessment.retry_scheduler import RetryScheduler, backoff_delay
+
+
+def failed(cid, text):
+    return {"Clause ID": cid, "Contract Clause": text, "Risk Level": "Unknown"}
+
+
+def ok(cid, text):
+    return {"Clause ID": cid, "Contract Clause": text, "Risk Level": "Low"}
+
+
+def is_failed(res):
+    return res["Risk Level"] == "Unknown"
+
+
+def plan_in_fours(clauses, clause_ids):
+    return [(clauses[i:i + 4], clause_ids[i:i + 4]) for i in range(0, len(clauses), 4)]
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    for attempt in range(6):
+        delay = min(8.0, 1.0 * 2 ** attempt)
+        assert delay / 2 <= backoff_delay(attempt, base=1.0, cap=8.0) <= delay
+
+
+def test_failed_clauses_from_several_batches_are_regrouped():
+    calls = []
+
+    def analyze(clauses, clause_ids):
+        calls.append(list(clause_ids))
+        return [ok(cid, text) for cid, text in zip(clause_ids, clauses)]
+
+    scheduler = RetryScheduler(analyze, plan_in_fours, is_failed, max_attempts=3, base_delay=0, max_delay=0)
+    # two failures from each of three original batches
+    first_pass = [failed(cid, f"clause {cid}") for cid in (2, 3, 11, 12, 21, 22)] + [ok(1, "clause 1")]
+    assert scheduler.add(first_pass) == [ok(1, "clause 1")]
+    assert len(scheduler) == 6
+
+    final = scheduler.run()
+    assert calls == [[2, 3, 11, 12], [21, 22]]
+    assert sorted(res["Clause ID"] for res in final) == [2, 3, 11, 12, 21, 22]
+    assert not any(is_failed(res) for res in final)
+    assert len(scheduler) == 0
+
+
+def test_clauses_that_keep_failing_are_returned_once_exhausted():
+    attempts = {}
+
+    def analyze(clauses, clause_ids):
+        for cid in clause_ids:
+            attempts[cid] = attempts.get(cid, 0) + 1
+        # clause 5 recovers on its second retry, clause 6 never does
+        return [ok(cid, text) if cid == 5 and attempts[cid] == 2 else failed(cid, text)
+                for cid, text in zip(clause_ids, clauses)]
+
+    scheduler = RetryScheduler(analyze, plan_in_fours, is_failed, max_attempts=3, base_delay=0, max_delay=0)
+    scheduler.add([failed(5, "clause 5"), failed(6, "clause 6")])
+    final = {res["Clause ID"]: res for res in scheduler.run()}
+
+    assert attempts == {5: 2, 6: 3}
+    assert not is_failed(final[5])
+    assert is_failed(final[6])
+    assert len(scheduler) == 0
+
+
+def test_missing_results_count_as_failed_attempts():
+    scheduler = RetryScheduler(lambda clauses, clause_ids: [], plan_in_fours, is_failed,
+                               max_attempts=2, base_delay=0, max_delay=0)
+    scheduler.add([failed(7, "clause 7")])
+    assert scheduler.run() == [failed(7, "clause 7")]
+
+
+def test_no_retries_when_attempts_are_disabled():
+    scheduler = RetryScheduler(None, plan_in_fours, is_failed, max_attempts=0)
+    assert scheduler.add([failed(1, "clause 1")]) == [failed(1, "clause 1")]
+    assert scheduler.run() == []
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from risk_assessment import analyze_clauses
+from risk_assessment.analyze_clauses import NO_REWRITE, REWRITE_FIELDS, needs_rewrite, rewrite_clauses
+from risk_assessment.backends import FakeBackend
+
+
+def contract(tag, n_high, n_other):
+    """Clauses the fake backend rates High, then Medium; `tag` keeps them out of other tests' caches."""
+    high = [f"The Supplier shall indemnify the Customer against export penalties under {tag} order {i}."
+            for i in range(n_high)]
+    other = [f"The Receiving Party shall keep the {tag} terms of order {i} confidential for five years."
+             for i in range(n_other)]
+    return high + other
+
+
+@pytest.fixture
+def client():
+    client = FakeBackend(base_latency=0, seconds_per_token=0, contention=0, latency="constant", time_scale=0)
+    previous = analyze_clauses.set_backend(client)
+    yield client
+    analyze_clauses.set_backend(previous)
+
+
+def test_assessment_pass_leaves_rewrites_for_later(client):
+    results = analyze_clauses.analyze_all_batches(contract("lean", 2, 2), max_workers=1, refresh=True)
+    assert [res["Risk Level"] for res in results] == ["High", "High", "Medium", "Medium"]
+    assert all(res["AI-Modified Clause"] == NO_REWRITE for res in results)
+    assert [needs_rewrite(res) for res in results] == [True, True, False, False]
+
+
+def test_only_high_clauses_are_rewritten(client):
+    results = analyze_clauses.analyze_all_batches(contract("high", 2, 2), max_workers=1, refresh=True)
+    calls = client.calls
+    rewritten = rewrite_clauses(results, max_workers=1)
+    assert client.calls == calls + 1
+
+    assert [res["Clause ID"] for res in rewritten] == [res["Clause ID"] for res in results]
+    for before, after in zip(results, rewritten):
+        if before["Risk Level"] == "High":
+            assert after["AI-Modified Clause"] != NO_REWRITE
+            assert after["AI-Modified Risk Level"] in ("Medium", "Low")
+            assert {k: v for k, v in after.items() if k not in REWRITE_FIELDS} == \
+                {k: v for k, v in before.items() if k not in REWRITE_FIELDS}
+        else:
+            assert after == before
+    # the input is left as it was
+    assert all(res["AI-Modified Clause"] == NO_REWRITE for res in results)
+    assert not any(needs_rewrite(res) for res in rewritten)
+
+
+def test_nothing_to_rewrite_costs_no_call(client):
+    results = analyze_clauses.analyze_all_batches(contract("none", 0, 3), max_workers=1, refresh=True)
+    calls = client.calls
+    assert rewrite_clauses(results) == results
+    assert client.calls == calls
+
+
+def test_rewrites_are_cached_by_clause_text(client):
+    results = analyze_clauses.analyze_all_batches(contract("cached", 2, 0), max_workers=1, refresh=True)
+    first = rewrite_clauses(results, max_workers=1)
+    calls = client.calls
+    assert rewrite_clauses(results, max_workers=1) == first
+    assert client.calls == calls
+
+
+def test_rewrite_batches_run_concurrently(client, monkeypatch):
+    results = analyze_clauses.analyze_all_batches(contract("concurrent", 30, 0), max_workers=1, refresh=True)
+    rewrite_batch = analyze_clauses._rewrite_batch
+    threads, running, peak = set(), [0], [0]
+    lock = threading.Lock()
+
+    def slow_batch(batch, *args, **kwargs):
+        with lock:
+            threads.add(threading.get_ident())
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        try:
+            return rewrite_batch(batch, *args, **kwargs)
+        finally:
+            with lock:
+                running[0] -= 1
+
+    monkeypatch.setattr(analyze_clauses, "_rewrite_batch", slow_batch)
+    rewritten = rewrite_clauses(results, max_workers=3)
+    assert not any(needs_rewrite(res) for res in rewritten)
+    assert len(threads) > 1 and peak[0] > 1
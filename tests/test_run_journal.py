@@ -0,0 +1,66 @@
+import os
+
+from risk_assessment import analyze_clauses
+from risk_assessment.backends import FakeBackend
+from risk_assessment.run_journal import RunJournal
+
+CLAUSES = [
+    "The Supplier shall indemnify the Customer against any penalties for export control breaches.",
+    "The Processor shall notify the Controller of any personal data breach within 72 hours.",
+]
+
+
+def result(clause_id, level="Low"):
+    return {"Clause ID": clause_id, "Regulation": "GDPR", "Risk Level": level, "Risk Score": "10%"}
+
+
+def test_compactions_of_parts_of_a_run_add_up(tmp_path):
+    journal = RunJournal(str(tmp_path), "run", clause_ids=[1, 2, 3])
+    journal.compact([result(1)])
+    journal.compact([result(2), result(3)])
+    assert sorted(journal.completed()) == [1, 2, 3]
+
+
+def test_compact_prefers_the_new_results(tmp_path):
+    journal = RunJournal(str(tmp_path), "run", clause_ids=[1])
+    journal.append([result(1, "Unknown")])
+    journal.compact([result(1, "High")])
+    assert journal.completed()[1]["Risk Level"] == "High"
+
+
+def test_complete_only_once_every_clause_is_covered(tmp_path):
+    journal = RunJournal(str(tmp_path), "run", clause_ids=[1, 2])
+    journal.compact([result(1)])
+    assert not journal.is_complete()
+    journal.compact([result(2)])
+    assert journal.is_complete()
+
+
+def test_prune_keeps_incomplete_journals(tmp_path):
+    partial = RunJournal(str(tmp_path), "partial", clause_ids=[1, 2])
+    partial.compact([result(1)])
+    done = RunJournal(str(tmp_path), "done", clause_ids=[1])
+    done.compact([result(1)])
+    for path in (partial.path, done.path):
+        os.utime(path, (0, 0))
+
+    RunJournal(str(tmp_path), "other", ttl_seconds=60).compact([result(1)])
+    assert os.path.exists(partial.path)
+    assert not os.path.exists(done.path)
+
+
+def test_refresh_does_not_resume_from_the_journal():
+    client = FakeBackend(base_latency=0, seconds_per_token=0, contention=0, latency="constant", time_scale=0)
+    previous = analyze_clauses.set_backend(client)
+    try:
+        journal = analyze_clauses.open_run_journal(CLAUSES, "test-refresh")
+        analyze_clauses.analyze_all_batches(CLAUSES, max_workers=1, journal=journal, refresh=True)
+        calls = client.calls
+        assert calls > 0 and journal.is_complete()
+
+        analyze_clauses.analyze_all_batches(CLAUSES, max_workers=1, journal=journal)
+        assert client.calls == calls
+        analyze_clauses.analyze_all_batches(CLAUSES, max_workers=1, journal=journal, refresh=True)
+        assert client.calls > calls
+    finally:
+        analyze_clauses.set_backend(previous)
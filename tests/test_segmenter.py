@@ -0,0 +1,72 @@
+from risk_assessment import segmenter
+from risk_assessment.segmenter import segment_lines, segment_text, split_complete
+
+
+def test_numbered_headings_open_clauses():
+    text = """1. Definitions
+1.1 Business Day means a day on which banks are open for business in London.
+1.2 Closing means the completion of the sale and purchase of the Shares.
+Page 2 of 10
+ARTICLE 2 PURCHASE PRICE
+Section 2.1 The purchase price shall be paid in immediately available funds at Closing.
+(a) The Purchaser shall pay the deposit into the escrow account within five days."""
+    assert segment_text(text) == [
+        "1. Definitions 1.1 Business Day means a day on which banks are open for business in London.",
+        "1.2 Closing means the completion of the sale and purchase of the Shares.",
+        "ARTICLE 2 PURCHASE PRICE Section 2.1 The purchase price shall be paid in immediately available funds at "
+        "Closing.",
+        "(a) The Purchaser shall pay the deposit into the escrow account within five days.",
+    ]
+
+
+def test_wrapped_section_reference_does_not_open_a_clause():
+    text = """4.1 The Company shall indemnify the Purchaser against all losses arising under
+Section 4.2 hereof, including reasonable legal fees and costs of enforcement.
+4.2 The Purchaser shall notify the Company of any claim within thirty days."""
+    assert segment_text(text) == [
+        "4.1 The Company shall indemnify the Purchaser against all losses arising under Section 4.2 hereof, "
+        "including reasonable legal fees and costs of enforcement.",
+        "4.2 The Purchaser shall notify the Company of any claim within thirty days.",
+    ]
+
+
+def test_wrapped_list_reference_does_not_open_a_clause():
+    text = """5.1 The Seller shall deliver the documents listed in Schedule 2 on the closing date under
+(a) the escrow agreement and (b) the disclosure letter, each duly executed by the Seller.
+5.2 The Purchaser shall pay the purchase price in immediately available funds."""
+    assert segment_text(text) == [
+        "5.1 The Seller shall deliver the documents listed in Schedule 2 on the closing date under (a) the escrow "
+        "agreement and (b) the disclosure letter, each duly executed by the Seller.",
+        "5.2 The Purchaser shall pay the purchase price in immediately available funds.",
+    ]
+
+
+def test_wrapped_number_does_not_open_a_clause():
+    # without the fragment merge: a lower-case word after "10." is never a heading
+    lines = ["3. The parties agree to", "10. paragraphs of Schedule 4 on the transfer of employees."]
+    assert segment_lines(lines, min_words=1) == [
+        "3. The parties agree to 10. paragraphs of Schedule 4 on the transfer of employees."
+    ]
+
+
+def test_lower_case_section_is_a_reference():
+    assert not segmenter.is_heading("section 4.2 hereof, including")
+    assert segmenter.is_heading("Section 4.2 Indemnities")
+    assert segmenter.is_heading("SECTION 4.2 INDEMNITIES")
+
+
+def test_streamed_pages_give_the_same_clauses():
+    pages = [
+        ["1. Definitions", "1.1 Business Day means a day on which banks are open for business in London and",
+         "Section 1.2 applies to any day that is not a Business Day."],
+        ["1.2 Closing means the completion of the sale and purchase of the Shares under",
+         "(a) this Agreement.", "2. Price"],
+        ["2.1 The purchase price shall be paid in immediately available funds at Closing."],
+    ]
+    streamed, pending = [], []
+    for page in pages:
+        complete, pending = split_complete(pending + page)
+        streamed.extend(segment_lines(complete))
+    streamed.extend(segment_lines(pending))
+    assert streamed == segment_lines([line for page in pages for line in page])
+    assert len(streamed) == 3
@@ -0,0 +1,56 @@
+import pytest
+
+from risk_assessment.similarity_index import SimilarityIndex, polarity, words
+
+CLAUSE = (
+    "The Supplier shall transfer personal data of the Customer's employees to sub-processors located outside "
+    "the European Economic Area only where adequate safeguards under Article 46 GDPR are in place, and shall "
+    "notify the Customer in writing at least thirty days before any such transfer takes place."
+)
+ANALYSIS = {"Regulation": "GDPR", "Risk Level": "Medium", "Risk Score": "55%"}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SimilarityIndex(str(tmp_path / "similarity.sqlite3"), "v1")
+    index.add_many([(CLAUSE, ANALYSIS)], "model-a")
+    return index
+
+
+def test_numbers_dates_and_parties_are_masked():
+    assert words("Pay USD 1,250.00 within 30 days of 1 March 2024") == \
+        ["pay", "usd", "#", "within", "#", "days", "of", "#", "#", "#"]
+    assert words("Acme Holdings Ltd. shall pay") == words("Globex Corporation shall pay") == ["party", "shall", "pay"]
+
+
+def test_near_duplicate_with_other_amounts_and_parties_is_reused(index):
+    variant = CLAUSE.replace("thirty", "sixty").replace("46", "28").replace("The Supplier", "Acme Holdings Ltd")
+    similarity, result = index.lookup(variant)
+    assert similarity >= index.threshold
+    assert result == ANALYSIS
+    assert index.lookup(CLAUSE) == (1.0, ANALYSIS)
+
+
+@pytest.mark.parametrize("negated", [
+    CLAUSE.replace("shall transfer", "shall not transfer"),
+    CLAUSE.replace("shall transfer", "won't transfer"),
+    CLAUSE.replace("shall transfer", "shall never transfer"),
+    CLAUSE.replace("only where", "unless"),
+])
+def test_negated_clause_is_not_reused(index, negated):
+    assert index.lookup(negated) is None
+
+
+def test_polarity_ignores_everything_but_negations():
+    assert polarity(words(CLAUSE)) == polarity(words(CLAUSE.replace("thirty", "sixty"))) == 0
+    assert polarity(words("shall not")) == polarity(words("won't")) != polarity(words("shall never"))
+    assert polarity(words("shall not")) != polarity(words("shall not and not"))
+
+
+def test_unrelated_clause_is_not_reused(index):
+    assert index.lookup("This Agreement is governed by the laws of England and Wales.") is None
+
+
+def test_prompt_version_change_purges_entries(tmp_path, index):
+    assert len(SimilarityIndex(index.path, "v2")) == 0
+    assert SimilarityIndex(index.path, "v1").lookup(CLAUSE) is None
@@ -0,0 +1,54 @@
+import json
+
+from risk_assessment.stream_parser import JSONArrayStreamParser, parse_complete_objects
+
+RESULTS = [
+    {"Clause ID": 1, "Risk Level": "High", "Clause Identification": "Transfers {personal} data [abroad]"},
+    {"Clause ID": 2, "Risk Level": "Low", "Clause Identification": 'Quotes "}" and \\"{\\" literally'},
+    {"Clause ID": 3, "Risk Level": "Medium", "Nested": {"codes": ["EU: GDPR", "US: CCPA"]}},
+]
+
+
+def feed_in_chunks(text, size):
+    parser = JSONArrayStreamParser()
+    emitted = []
+    for start in range(0, len(text), size):
+        emitted.append(parser.feed(text[start:start + size]))
+    return emitted
+
+
+def test_objects_split_across_chunks():
+    text = "```json\n" + json.dumps(RESULTS, indent=2) + "\n```"
+    for size in (1, 3, 7, 64, len(text)):
+        emitted = feed_in_chunks(text, size)
+        assert [obj for batch in emitted for obj in batch] == RESULTS
+
+
+def test_each_object_is_emitted_as_soon_as_it_closes():
+    first = json.dumps(RESULTS[0])
+    parser = JSONArrayStreamParser()
+    assert parser.feed("[" + first[:-1]) == []
+    assert parser.feed(first[-1] + ", " + json.dumps(RESULTS[1])[:10]) == [RESULTS[0]]
+
+
+def test_braces_and_escaped_quotes_inside_strings():
+    assert parse_complete_objects(json.dumps(RESULTS[:2])) == RESULTS[:2]
+
+
+def test_truncated_tail_yields_only_complete_objects():
+    text = json.dumps(RESULTS)
+    cut = text.index('{"Clause ID": 3') + 20
+    assert parse_complete_objects(text[:cut]) == RESULTS[:2]
+    # cut inside a string that contains a brace
+    cut = text.index("{personal}") + 3
+    assert parse_complete_objects(text[:cut]) == []
+
+
+def test_malformed_object_is_skipped():
+    text = '[{"Clause ID": 1, "Risk Level": High}, ' + json.dumps(RESULTS[1]) + "]"
+    assert parse_complete_objects(text) == [RESULTS[1]]
+
+
+def test_prose_and_empty_input():
+    assert parse_complete_objects(None) == []
+    assert parse_complete_objects("Sorry, I cannot help with that.") == []
@@ -0,0 +1,88 @@
+import pytest
+
+from risk_assessment import analyze_clauses, versioning
+from risk_assessment.backends import FakeBackend
+from risk_assessment.versioning import align_clauses, analyze_revision, risk_delta
+
+V1 = [
+    "The Supplier shall deliver the Products to the Customer's warehouse within ten business days of an order.",
+    "The Supplier shall indemnify the Customer against all penalties arising from export control breaches.",
+    "The Customer shall pay each invoice within thirty days of receipt by bank transfer to the stated account.",
+    "Either party may assign this Agreement to an affiliate with written notice to the other party.",
+]
+V2 = [
+    V1[0],
+    # modified: the indemnity is narrowed, the export wording is gone
+    "The Supplier shall reimburse the Customer for documented costs arising from late delivery of the Products.",
+    V1[2],
+    # inserted; V1[3] is deleted
+    "The Processor shall notify the Controller of any personal data incident within seventy-two hours.",
+]
+
+
+def test_alignment():
+    assert align_clauses(V1, V2) == [
+        ("unchanged", 0, 0), ("modified", 1, 1), ("unchanged", 2, 2), ("inserted", None, 3), ("deleted", 3, None),
+    ]
+
+
+def test_alignment_ignores_whitespace_and_tells_a_rewrite_from_a_new_clause():
+    assert align_clauses(["  The Supplier   shall deliver the Products. "], ["The Supplier shall deliver the Products."]) \
+        == [("unchanged", 0, 0)]
+    assert align_clauses(["The Supplier shall deliver the Products."], ["Governing law is the law of England."]) \
+        == [("inserted", None, 0), ("deleted", 0, None)]
+
+
+@pytest.fixture
+def analyzed(monkeypatch):
+    """(v1 results, v2 results, changes, clauses sent to the model for v2)."""
+    client = FakeBackend(base_latency=0, seconds_per_token=0, contention=0, latency="constant", time_scale=0)
+    previous = analyze_clauses.set_backend(client)
+    try:
+        old = analyze_clauses.analyze_all_batches(V1, max_workers=1, refresh=True)
+        sent = []
+
+        def analyze_all_batches(clauses, **kwargs):
+            sent.extend(clauses)
+            return analyze_clauses.analyze_all_batches(clauses, **kwargs)
+
+        monkeypatch.setattr(versioning, "analyze_all_batches", analyze_all_batches)
+        new, changes = analyze_revision(V1, old, V2, max_workers=1, refresh=True)
+    finally:
+        analyze_clauses.set_backend(previous)
+    return old, new, changes, sent
+
+
+def test_only_changed_clauses_are_analyzed(analyzed):
+    old, new, _, sent = analyzed
+    assert sent == [V2[1], V2[3]]
+    assert [res["Clause ID"] for res in new] == [1, 2, 3, 4]
+    assert [res["Analysis Source"] == "Previous version" for res in new] == [True, False, True, False]
+    assert new[2]["Risk Score"] == old[2]["Risk Score"]
+
+
+def test_risk_delta(analyzed):
+    old, new, changes, _ = analyzed
+    # the fake rates V1: Low, High, Low, Low and V2: Low, Low, Low, High
+    assert [res["Risk Level"] for res in old] == ["Low", "High", "Low", "Low"]
+    assert [res["Risk Level"] for res in new] == ["Low", "Low", "Low", "High"]
+    delta = risk_delta(old, new, changes)
+
+    assert delta["levels"] == {"High": (1, 1, 0), "Medium": (0, 0, 0), "Low": (3, 3, 0)}
+    old_avg, new_avg, diff = delta["average_score"]
+    assert diff == round(new_avg - old_avg, 1)
+
+    rows = {row["Change"]: row for row in delta["clauses"]}
+    assert sorted(rows) == ["Deleted", "Inserted", "Modified"]
+    assert (rows["Modified"]["Old Risk Level"], rows["Modified"]["Risk Level"]) == ("High", "Low")
+    assert rows["Inserted"]["Old Clause ID"] is None and rows["Inserted"]["Clause ID"] == 4
+    assert rows["Deleted"]["Clause ID"] is None and rows["Deleted"]["Contract Clause"] == V1[3]
+    assert rows["Modified"]["Score Change"] < 0 < rows["Inserted"]["Score Change"]
+
+
+def test_risk_delta_lists_unchanged_clauses_only_when_their_assessment_moved():
+    clause = {"Clause ID": 1, "Contract Clause": V1[0], "Risk Level": "Low", "Risk Score": "10%"}
+    changes = [("unchanged", 0, 0)]
+    assert risk_delta([clause], [dict(clause)], changes)["clauses"] == []
+    moved = risk_delta([clause], [{**clause, "Risk Level": "Medium", "Risk Score": "40%"}], changes)["clauses"]
+    assert [(row["Change"], row["Score Change"]) for row in moved] == [("Unchanged", 30)]